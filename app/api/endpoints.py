@@ -7,26 +7,34 @@ import time
 import json
 import hashlib
 import asyncio
+import threading
+import hmac
+import base64
 from typing import List, Optional, Dict, Any
 
 import torch
 import langid
 import numpy as np 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Response, Request
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Response, Request, Header, Depends
 from fastapi.responses import StreamingResponse, FileResponse, JSONResponse
 
 from app.core.engine import tts_engine 
 from app.core.config import settings
-from app.api.schemas import TTSRequest, OpenAISpeechRequest 
+from app.api.schemas import TTSRequest, TTSTemplateRequest, TTSBatchRequest, OpenAISpeechRequest, ProfileRequest, ModelReloadRequest
 from app.core.history import history_manager
 from app.core.audio import audio_processor
+from app.core.template import TemplateError, render_text
+from app.core.cache import tts_cache
+from app.core.metrics import set_request_labels
+from app.core.profiler import inference_profiler, ProfilerBusyError
+from app.core.registry import UnsupportedLanguageError, ReloadInProgressError
 
 logger = logging.getLogger("API")
 router = APIRouter()
 
-UPLOAD_DIR = "/app/uploads"
-HISTORY_DIR = "/app/history"
-CACHE_DIR = "/app/cache"
+UPLOAD_DIR = settings.UPLOAD_DIR
+HISTORY_DIR = settings.HISTORY_DIR
+CACHE_DIR = settings.CACHE_DIR
 
 for d in [UPLOAD_DIR, HISTORY_DIR, CACHE_DIR]:
     os.makedirs(d, exist_ok=True)
@@ -41,9 +49,11 @@ async def cleanup_files(file_paths: List[str]):
         except Exception as e:
             logger.warning(f"Failed to cleanup {path}: {e}")
 
-def calculate_vca_metrics(start_time, text, audio_bytes, sample_rate):
+def calculate_vca_metrics(start_time, text, audio_bytes, sample_rate, audio_len: Optional[int] = None,
+                          model_id: Optional[str] = None):
     process_time = time.perf_counter() - start_time
-    len_bytes = len(audio_bytes) if audio_bytes else 0
+    # audio_len: Cache hit'te byte'lar belleğe alınmadan dosya boyutu verilir
+    len_bytes = audio_len if audio_len is not None else (len(audio_bytes) if audio_bytes else 0)
     audio_duration_sec = len_bytes / (sample_rate * 2) if len_bytes > 0 else 0
     rtf = process_time / audio_duration_sec if audio_duration_sec > 0 else 0
     
@@ -51,7 +61,7 @@ def calculate_vca_metrics(start_time, text, audio_bytes, sample_rate):
         "X-VCA-Chars": str(len(text)),
         "X-VCA-Time": f"{process_time:.3f}",
         "X-VCA-RTF": f"{rtf:.4f}",
-        "X-VCA-Model": settings.MODEL_ID
+        "X-VCA-Model": model_id or settings.MODEL_ID
     }
 
 def generate_deterministic_filename(params: dict, ext: str) -> str:
@@ -64,6 +74,29 @@ def generate_deterministic_filename(params: dict, ext: str) -> str:
     file_hash = hashlib.md5(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
     return f"{file_hash}.{ext}"
 
+def cached_file_response(path: str, start_time: float, text: str, media_type: str,
+                         model_id: Optional[str] = None) -> FileResponse:
+    """Cache hit: dosya Python belleğine alınmadan FileResponse (sendfile) ile gönderilir."""
+    sample_rate = tts_engine.model_sampling_rate(model_id or settings.MODEL_ID, path)
+    metrics = calculate_vca_metrics(
+        start_time, text, None, sample_rate, audio_len=os.path.getsize(path), model_id=model_id
+    )
+    metrics["X-Cache"] = "HIT"
+    return FileResponse(path, media_type=media_type, headers=metrics)
+
+async def require_api_key(
+    x_api_key: Optional[str] = Header(None),
+    authorization: Optional[str] = Header(None),
+):
+    """Admin endpoint'leri için API_KEY kontrolü. API_KEY tanımlı değilse admin endpoint'leri kapalıdır."""
+    if not settings.API_KEY:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (API key not configured)")
+    token = x_api_key
+    if not token and authorization and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token or not hmac.compare_digest(token, settings.API_KEY):
+        raise HTTPException(status_code=401, detail="Invalid API key")
+
 # --- SYSTEM ENDPOINTS ---
 
 @router.get("/favicon.ico", include_in_schema=False)
@@ -83,7 +116,7 @@ async def health_check():
 
 @router.get("/api/config")
 async def get_public_config():
-    langs = [{"code": "tr", "name": "Turkish"}]
+    langs = [{"code": code} for code in settings.SUPPORTED_LANGUAGES] or [{"code": "tr", "name": "Turkish"}]
     return {
         "app_name": settings.APP_NAME, "version": settings.APP_VERSION,
         "defaults": {
@@ -94,7 +127,8 @@ async def get_public_config():
         "limits": {
             "max_text_len": 5000, 
             "supported_formats": ["wav", "pcm"], 
-            "supported_languages": langs 
+            "supported_languages": langs,
+            "language_auto_detect": settings.LANGUAGE_AUTO_DETECT
         },
         "system": {"streaming_enabled": settings.ENABLE_STREAMING, "device": settings.DEVICE}
     }
@@ -121,26 +155,50 @@ async def openai_speech_endpoint(request: OpenAISpeechRequest):
     output_fmt = "wav" 
     
     logger.info(f"OpenAI TTS: '{request.input[:15]}...' -> ({lang_code})")
+    set_request_labels("http", "unary")
+
+    media_type = "audio/wav"
+    if request.response_format == "mp3":
+        media_type = "audio/mpeg" # MP3 istenirse header'ı ayarla (içerik wav kalsa bile client genelde çalar)
 
     try:
-        audio_bytes = await asyncio.to_thread(
-            tts_engine.synthesize, 
-            request.input, 
-            request.speed
-        )
-        
-        media_type = "audio/wav"
-        if request.response_format == "mp3":
-            media_type = "audio/mpeg" # MP3 istenirse header'ı ayarla (içerik wav kalsa bile client genelde çalar)
+        start_time = time.perf_counter()
+        lang_code, model_id = await asyncio.to_thread(tts_engine.registry.resolve, lang_code, request.input)
+        cached_path = await tts_engine.lookup_cached_async(request.input, request.speed, lang_code)
+        if cached_path:
+            return cached_file_response(cached_path, start_time, request.input, media_type, model_id)
+
+        audio_bytes = await tts_engine.synthesize_async(request.input, request.speed, lookup=False, language=lang_code)
              
-        return Response(content=audio_bytes, media_type=media_type)
+        metrics = calculate_vca_metrics(
+            start_time, request.input, audio_bytes, tts_engine.model_sampling_rate(model_id), model_id=model_id
+        )
+        metrics["X-Cache"] = "MISS"
+        return Response(content=audio_bytes, media_type=media_type, headers=metrics)
         
+    except UnsupportedLanguageError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logger.error(f"OpenAI TTS Endpoint Failed: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
 # --- INTERNAL API ENDPOINTS ---
 
+@router.get("/api/cache/stats")
+async def get_cache_stats(top: int = 10):
+    """Katman hit oranları + indeks: model/sürüm başına girdi ve byte, en çok kullanılan anahtarlar."""
+    return await asyncio.to_thread(tts_cache.stats, max(0, min(top, 100)))
+
+@router.get("/api/models")
+async def get_loaded_models():
+    """Bellekte yüklü modeller (en son kullanılan önce)."""
+    return {
+        "default_model": settings.MODEL_ID,
+        "max_loaded": settings.MODEL_MAX_LOADED,
+        "memory_budget_mb": settings.MODEL_MEMORY_BUDGET_MB,
+        "loaded": tts_engine.registry.loaded()
+    }
+
 @router.get("/api/speakers")
 async def get_speakers():
     return {"speakers": {"default": ["neutral"]}}
@@ -155,15 +213,22 @@ async def get_history():
 
 @router.get("/api/history/audio/{filename}")
 async def get_history_audio(filename: str):
-    file_path = os.path.join(HISTORY_DIR, os.path.basename(filename))
+    safe_filename = os.path.basename(filename)
+    file_path = os.path.join(HISTORY_DIR, safe_filename)
     if os.path.exists(file_path):
         return FileResponse(file_path)
+    # Unary geçmiş kayıtları cache anahtarıyla tutulur; ses cache dizinindedir
+    if await asyncio.to_thread(tts_cache.index.get, safe_filename):
+        cached_path = await asyncio.to_thread(tts_cache.lookup_path, safe_filename)
+        if cached_path:
+            return FileResponse(cached_path, media_type="audio/wav")
     raise HTTPException(status_code=404, detail="History audio not found")
 
 @router.delete("/api/history/all")
 async def delete_all_history():
     history_manager.clear_all()
-    for f in glob.glob(os.path.join(HISTORY_DIR, "*")):
+    # Sadece ses dosyaları; history.db (ve WAL dosyaları) aynı dizindedir
+    for f in glob.glob(os.path.join(HISTORY_DIR, "*.wav")) + glob.glob(os.path.join(HISTORY_DIR, "*.pcm")):
         if os.path.isfile(f):
             try: os.remove(f)
             except: pass
@@ -184,43 +249,53 @@ async def generate_speech(request: TTSRequest):
     
     params = request.dict(exclude_unset=True)
     start_time = time.perf_counter()
+    set_request_labels("http", "stream" if request.stream else "unary")
+    
+    try:
+        # Dil burada çözülür: desteklenmeyen dil stream başlamadan 422 döner
+        lang, model_id = await asyncio.to_thread(tts_engine.registry.resolve, request.language, request.text)
+    except UnsupportedLanguageError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     
     if request.stream:
+        cached_path = await tts_engine.lookup_cached_async(request.text, request.speed, lang, kind="stream")
+        if cached_path:
+            logger.info("Stream request served from cache.")
+            return StreamingResponse(
+                tts_engine.synthesize_stream_async(request.text, request.speed, cached_path=cached_path, language=lang),
+                media_type="application/octet-stream", headers={"X-Cache": "HIT"}
+            )
+
         logger.info("Stream request received. Starting pseudo-streaming synthesis.")
         
         async def stream_and_save():
             accumulated_bytes = bytearray()
             safe_filename = generate_deterministic_filename(params, "pcm") 
-            filepath = os.path.join(HISTORY_DIR, safe_filename)
+            filepath = os.path.join(HISTORY_DIR, safe_filename.replace(".pcm", ".wav"))
             
             try:
-                # HATA DÜZELTME: 'async for' YERİNE 'for'
-                # tts_engine.synthesize_stream senkron bir jeneratördür.
-                # await kullanmadan doğrudan iterate ediyoruz.
-                # FastAPI StreamingResponse threadpool'da çalışacağı için bloklama minimaldir.
-                for chunk in tts_engine.synthesize_stream(request.text, request.speed):
+                # Sentez thread'de yapılır, event loop bloklanmaz
+                async for chunk in tts_engine.synthesize_stream_async(request.text, request.speed, language=lang):
                     if chunk:
                         accumulated_bytes.extend(chunk)
                         yield chunk
-                        # Diğer tasklara fırsat vermek için küçük bir sleep (opsiyonel)
-                        await asyncio.sleep(0) 
             except Exception as e:
                  logger.error(f"Streaming error: {e}")
             finally:
                 if accumulated_bytes:
                     wav_bytes = audio_processor.numpy_to_wav_bytes(
                         np.frombuffer(bytes(accumulated_bytes), dtype=np.int16),
-                        tts_engine.sampling_rate
+                        tts_engine.model_sampling_rate(model_id)
                     )
                     if wav_bytes:
                         await asyncio.to_thread(open(filepath, "wb").write, wav_bytes)
                         history_manager.add_entry(
                             filename=safe_filename.replace(".pcm", ".wav"), 
-                            text=request.text, language=request.language,
+                            text=request.text, language=lang,
                             speaker=request.speaker_idx, mode="Stream"
                         )
         
-        return StreamingResponse(stream_and_save(), media_type="application/octet-stream")
+        return StreamingResponse(stream_and_save(), media_type="application/octet-stream", headers={"X-Cache": "MISS"})
         
     else: # Unary Request
         # HATA DÜZELTME: Şema güncellendiği için output_format artık mevcut
@@ -229,8 +304,132 @@ async def generate_speech(request: TTSRequest):
         
         safe_filename = generate_deterministic_filename(params, ext)
         
-        # Cache implementasyonu engine içinde var
-        audio_bytes = await asyncio.to_thread(tts_engine.synthesize, request.text, request.speed)
+        try:
+            # Fast path: cache hit diskten sendfile ile
+            cached_path = await tts_engine.lookup_cached_async(request.text, request.speed, lang)
+            if cached_path:
+                return cached_file_response(cached_path, start_time, request.text, media_type, model_id)
+
+            # Cache'e zaten bakıldı, engine tekrar bakmasın
+            audio_bytes = await tts_engine.synthesize_async(request.text, request.speed, lookup=False, language=lang)
+        except UnsupportedLanguageError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except Exception as e:
+            logger.error(f"TTS Endpoint Failed: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
         
-        metrics = calculate_vca_metrics(start_time, request.text, audio_bytes, tts_engine.sampling_rate)
-        return Response(content=audio_bytes, media_type=media_type, headers=metrics)
\ No newline at end of file
+        metrics = calculate_vca_metrics(
+            start_time, request.text, audio_bytes, tts_engine.model_sampling_rate(model_id), model_id=model_id
+        )
+        metrics["X-Cache"] = "MISS"
+        return Response(content=audio_bytes, media_type=media_type, headers=metrics)
+
+@router.post("/api/tts/template")
+async def generate_template_speech(request: TTSTemplateRequest):
+    start_time = time.perf_counter()
+    set_request_labels("http", "unary")
+    try:
+        audio_bytes, stats = await tts_engine.synthesize_template_async(
+            request.template, request.slots, request.speed, request.language
+        )
+    except (TemplateError, UnsupportedLanguageError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        logger.error(f"Template TTS Failed: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+
+    rendered_text = render_text(request.template, request.slots)
+    metrics = calculate_vca_metrics(start_time, rendered_text, audio_bytes, stats["sample_rate"], model_id=stats["model"])
+    if stats["hits"] == stats["segments"]:
+        metrics["X-Cache"] = "HIT"
+    elif stats["hits"] > 0:
+        metrics["X-Cache"] = "PARTIAL"
+    else:
+        metrics["X-Cache"] = "MISS"
+    metrics["X-Cache-Segments"] = f"{stats['hits']}/{stats['segments']}"
+    if request.output_format == "pcm":
+        metrics["X-Sample-Rate"] = str(stats["sample_rate"])
+        return Response(content=audio_processor.wav_to_pcm16(audio_bytes), media_type="application/octet-stream", headers=metrics)
+    return Response(content=audio_bytes, media_type="audio/wav", headers=metrics)
+
+@router.post("/api/tts/batch")
+async def generate_batch_speech(request: TTSBatchRequest):
+    """
+    Toplu sentez. Yanıt NDJSON'dur: her öğe hazır olduğunda bir satır
+    ({index, id, status, cache, model, time_ms, audio_b64}), en sonda {"summary": ...}.
+    """
+    set_request_labels("http", "batch")
+    items = [item.dict() for item in request.items]
+    logger.info(f"Batch request received: {len(items)} items.")
+
+    async def ndjson():
+        counts = {"HIT": 0, "MISS": 0, "DUP": 0, "error": 0}
+        start_time = time.perf_counter()
+        async for result in tts_engine.synthesize_batch_async(items):
+            audio = result.pop("audio")
+            if audio is not None and request.include_audio:
+                result["audio_b64"] = base64.b64encode(audio).decode("ascii")
+            counts["error" if result["error"] else result["cache"]] += 1
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+        counts["items"] = len(items)
+        counts["time_ms"] = round((time.perf_counter() - start_time) * 1000, 1)
+        yield json.dumps({"summary": counts}) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+# --- ADMIN ENDPOINTS ---
+
+@router.post("/api/admin/profile", dependencies=[Depends(require_api_key)])
+async def start_profile(request: ProfileRequest):
+    try:
+        return inference_profiler.start(request.duration_sec, request.max_forwards, tts_engine.device)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post("/api/admin/models/reload", dependencies=[Depends(require_api_key)])
+async def reload_model(request: ModelReloadRequest):
+    """
+    Modeli yeniden başlatmadan yeni sürüme geçirir. Yeni sürüm arka planda yüklenip ısıtılırken
+    mevcut sürüm servis vermeye devam eder. Durum: GET /api/admin/models/reload.
+    """
+    registry = tts_engine.registry
+    model_id = request.model_id or settings.MODEL_ID
+    try:
+        status = registry.start_reload(model_id, request.source, request.revision)
+    except ReloadInProgressError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    args = (model_id, request.source, request.revision)
+    if not request.wait:
+        threading.Thread(target=registry.run_reload, args=args, name="model-reload", daemon=True).start()
+        return JSONResponse(status_code=202, content=status)
+    result = await asyncio.to_thread(registry.run_reload, *args)
+    if result["state"] == "failed":
+        raise HTTPException(status_code=500, detail=result)
+    return result
+
+@router.get("/api/admin/models/reload", dependencies=[Depends(require_api_key)])
+async def get_reload_status():
+    return {"reloads": list(tts_engine.registry.reloads.values())}
+
+@router.delete("/api/admin/cache", dependencies=[Depends(require_api_key)])
+async def invalidate_cache(model: Optional[str] = None, version: Optional[str] = None, all: bool = False):
+    """
+    Cache girdilerini model ve/veya sürüme göre siler (yerel + remote kopyaları).
+    Tüm cache'i silmek için filtre yerine açıkça all=true verilmelidir.
+    """
+    if not (model or version or all):
+        raise HTTPException(status_code=400, detail="Specify model and/or version, or all=true to clear the whole cache")
+    removed = await asyncio.to_thread(tts_cache.invalidate, model, version, None, True)
+    return {"status": "ok", "removed": removed, "model": model, "version": version}
+
+@router.get("/api/admin/profile", dependencies=[Depends(require_api_key)])
+async def get_profile_status():
+    return inference_profiler.status()
+
+@router.get("/api/admin/profile/{capture_id}/download", dependencies=[Depends(require_api_key)])
+async def download_profile(capture_id: str):
+    path = inference_profiler.result_path(capture_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile capture not found or still running")
+    return FileResponse(path, media_type="application/zip", filename=os.path.basename(path))
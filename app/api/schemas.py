@@ -4,7 +4,7 @@ from app.core.config import settings
 
 class TTSRequest(BaseModel):
     text: str = Field(..., min_length=1, max_length=5000, description="Sentezlenecek metin veya SSML")
-    language: Optional[str] = Field(default=settings.DEFAULT_LANGUAGE, description="Dil kodu (ISO 639-1)")
+    language: Optional[str] = Field(default=None, description="Dil kodu (ISO 639-1/639-3, BCP-47) veya 'auto'. Boş: otomatik tespit açıksa tespit, değilse varsayılan dil")
     speed: Optional[float] = Field(default=settings.DEFAULT_SPEED, ge=0.5, le=2.0, description="Konuşma hızı (1.0 varsayılan)")
     stream: Optional[bool] = Field(default=False, description="Parçalı (chunked) yanıt için")
     # EKLENDİ: Eksik olan output_format alanı
@@ -21,10 +21,36 @@ class TTSRequest(BaseModel):
 
     @validator('language')
     def validate_language(cls, value):
-        if value and value.lower() not in ["tur", "tr"]:
-            # Sadece Türkçe destekleniyor uyarısı (loglamak yeterli, hata fırlatmayalım)
-            pass
-        return value.lower() if value else settings.DEFAULT_LANGUAGE
+        # Dil desteği model registry'de çözülür (desteklenmeyen dil -> 422). Boş dil de orada çözülür:
+        # LANGUAGE_AUTO_DETECT açıksa metinden tespit, değilse varsayılan dil (gRPC ile aynı davranış)
+        return value.strip().lower() if value and value.strip() else None
+
+class TTSTemplateRequest(BaseModel):
+    template: str = Field(..., min_length=1, max_length=5000, description="Slot'lu şablon. Örn: 'Sayın {isim}, bakiyeniz {tutar} liradır'")
+    slots: Dict[str, str] = Field(default_factory=dict, description="Slot adı -> değer")
+    language: Optional[str] = Field(default=None, description="Dil kodu (ISO 639-1/639-3, BCP-47) veya 'auto'. Boş: otomatik tespit açıksa tespit, değilse varsayılan dil")
+    speed: Optional[float] = Field(default=settings.DEFAULT_SPEED, ge=0.5, le=2.0, description="Konuşma hızı (1.0 varsayılan)")
+    output_format: Optional[str] = Field(default="wav", description="Çıktı formatı: wav, pcm (header'sız PCM16, örnekleme hızı X-Sample-Rate'te)")
+
+class TTSBatchItem(BaseModel):
+    id: Optional[str] = Field(None, description="İstemci tarafı öğe ID'si (yanıtta aynen döner)")
+    text: str = Field(..., min_length=1, max_length=5000)
+    language: Optional[str] = Field(default=None, description="Dil kodu (ISO 639-1/639-3, BCP-47) veya 'auto'. Boş: otomatik tespit açıksa tespit, değilse varsayılan dil")
+    speed: Optional[float] = Field(default=settings.DEFAULT_SPEED, ge=0.5, le=2.0)
+
+class TTSBatchRequest(BaseModel):
+    items: List[TTSBatchItem] = Field(..., min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+    include_audio: bool = Field(default=True, description="False ise sadece cache'e üretilir (ön ısıtma), ses dönmez")
+
+class ProfileRequest(BaseModel):
+    duration_sec: float = Field(default=30.0, gt=0, le=settings.PROFILE_MAX_DURATION_SEC, description="Maksimum capture süresi")
+    max_forwards: int = Field(default=20, ge=1, le=500, description="Bu kadar model forward'undan sonra capture biter")
+
+class ModelReloadRequest(BaseModel):
+    model_id: Optional[str] = Field(None, description="Yenilenecek model yuvası (boş = varsayılan model)")
+    source: Optional[str] = Field(None, description="Yeni ağırlıkların Hub ID'si veya dizini (boş = yuvanın kendisi)")
+    revision: Optional[str] = Field(None, description="Hub revision (branch, tag veya commit)")
+    wait: bool = Field(False, description="True: geçiş ve boşaltma bitene kadar yanıtı beklet")
 
 class OpenAISpeechRequest(BaseModel):
     model: str = Field("tts-1", description="Model adı (yoksayılır)")
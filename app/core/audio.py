@@ -1,8 +1,10 @@
 import logging
 import io
+import struct
 import torch
 import soundfile as sf
 import numpy as np
+from typing import List, Tuple
 
 logger = logging.getLogger("AUDIO-PROC")
 
@@ -52,4 +54,106 @@ class AudioProcessor:
             logger.error(f"PCM conversion failed: {e}")
             return b""
 
+    @staticmethod
+    def pcm16_to_wav_bytes(pcm_bytes: bytes, sample_rate: int) -> bytes:
+        """Ham PCM16 byte'larını yeniden normalize etmeden WAV'a sarar."""
+        buffer = io.BytesIO()
+        sf.write(buffer, np.frombuffer(pcm_bytes, dtype=np.int16), sample_rate, format='WAV', subtype='PCM_16')
+        return buffer.getvalue()
+
+    @staticmethod
+    def wav_data_offset(f) -> Tuple[int, int]:
+        """
+        RIFF chunk'larını gezerek 'data' chunk'ının dosya içindeki offset'ini ve boyutunu döner.
+        Cache'teki WAV'ları header'sız PCM olarak stream etmek için kullanılır.
+        """
+        f.seek(0)
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+            raise ValueError("Not a RIFF/WAVE file")
+        while True:
+            chunk_header = f.read(8)
+            if len(chunk_header) < 8:
+                raise ValueError("WAV data chunk not found")
+            chunk_id = chunk_header[:4]
+            chunk_size = struct.unpack("<I", chunk_header[4:])[0]
+            if chunk_id == b"data":
+                return f.tell(), chunk_size
+            # Chunk'lar 2 byte hizalıdır
+            f.seek(chunk_size + (chunk_size & 1), io.SEEK_CUR)
+
+    @staticmethod
+    def wav_to_pcm16(wav_bytes: bytes) -> bytes:
+        """PCM16 WAV'ın header'sız ses verisi (stream çıktısıyla aynı format)."""
+        offset, size = AudioProcessor.wav_data_offset(io.BytesIO(wav_bytes))
+        return wav_bytes[offset:offset + size]
+
+    @staticmethod
+    def wav_sample_rate(path: str) -> int:
+        """WAV dosyasının örnekleme hızını başlıktan okur."""
+        return sf.info(path).samplerate
+
+    @staticmethod
+    def wav_bytes_to_numpy(wav_bytes: bytes) -> np.ndarray:
+        """WAV byte'larını float32 NumPy array'e çevirir (cache'ten okunan segmentler için)."""
+        waveform, _ = sf.read(io.BytesIO(wav_bytes), dtype='float32')
+        return waveform
+
+    @staticmethod
+    def silence_bounds(waveform: np.ndarray, sample_rate: int, threshold_db: float = -40.0,
+                       frame_ms: int = 10) -> Tuple[int, int]:
+        """
+        Sesli bölgenin [başlangıç, bitiş) örnek indekslerini döner.
+        Çerçeve RMS'i en yüksek çerçeve RMS'inin threshold_db altındaysa çerçeve sessiz sayılır
+        (tepeye göreli olduğu için ses seviyesinden bağımsızdır). Tamamen sessizse (0, 0).
+        """
+        frame = max(1, int(sample_rate * frame_ms / 1000))
+        n_frames = -(-waveform.size // frame)
+        if n_frames == 0:
+            return 0, 0
+        padded = np.zeros(n_frames * frame, dtype=np.float32)
+        padded[:waveform.size] = waveform
+        rms = np.sqrt(np.mean(np.square(padded.reshape(n_frames, frame)), axis=1))
+        peak = rms.max()
+        if peak <= 0:
+            return 0, 0
+        loud = np.flatnonzero(rms >= peak * 10 ** (threshold_db / 20))
+        return int(loud[0]) * frame, min(int(loud[-1] + 1) * frame, waveform.size)
+
+    @staticmethod
+    def trim_silence(waveform: np.ndarray, sample_rate: int, threshold_db: float = -40.0,
+                     frame_ms: int = 10, keep_ms: int = 30) -> np.ndarray:
+        """Baştaki ve sondaki sessizliği keser; doğal atak/sönüm için iki uçta keep_ms bırakır."""
+        start, end = AudioProcessor.silence_bounds(waveform, sample_rate, threshold_db, frame_ms)
+        if start >= end:
+            return waveform[:0]
+        keep = int(sample_rate * keep_ms / 1000)
+        return waveform[max(0, start - keep):min(waveform.size, end + keep)]
+
+    @staticmethod
+    def silence(duration_ms: int, sample_rate: int) -> np.ndarray:
+        return np.zeros(int(sample_rate * duration_ms / 1000), dtype=np.float32)
+
+    @staticmethod
+    def concat_with_crossfade(segments: List[np.ndarray], sample_rate: int, fade_ms: int = 10) -> np.ndarray:
+        """
+        Segmentleri sınırlarda kısa bir crossfade ile birleştirir.
+        Ayrı sentezlenen parçaların eklem yerlerindeki 'klik' seslerini önler.
+        """
+        segments = [s.astype(np.float32) for s in segments if s.size > 0]
+        if not segments:
+            return np.zeros(0, dtype=np.float32)
+
+        fade_len = int(sample_rate * fade_ms / 1000)
+        result = segments[0]
+        for seg in segments[1:]:
+            n = min(fade_len, result.size, seg.size)
+            if n == 0:
+                result = np.concatenate([result, seg])
+                continue
+            ramp = np.linspace(0.0, 1.0, n, dtype=np.float32)
+            overlap = result[-n:] * (1.0 - ramp) + seg[:n] * ramp
+            result = np.concatenate([result[:-n], overlap, seg[n:]])
+        return result
+
 audio_processor = AudioProcessor()
\ No newline at end of file
@@ -0,0 +1,234 @@
+import time
+import logging
+import resource
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+
+from app.core.config import settings
+from app.core import metrics
+
+logger = logging.getLogger("BUDGET")
+
+# CUDA tepe bellek sayacı (reset_peak_memory_stats / max_memory_allocated) cihaz genelidir, model başına değil.
+# Ölçülen her forward (tüm modellerin forward'ları ve hot reload kalibrasyonu) bu kilitle sıralanır;
+# aksi halde başka modelin forward'u ölçüme karışır. Aynı GPU'da kernel'ler zaten sırayla çalışır.
+_cuda_measure_lock = threading.Lock()
+
+def device_measure_lock(device: str):
+    return _cuda_measure_lock if device == "cuda" else nullcontext()
+
+class InferenceBudget:
+    """
+    Token sayısından forward başına bellek ve süre tahmini.
+
+    Model yüklenirken birkaç sentetik uzunlukta forward çalıştırılır ve
+    bellek(n) = a + b*n, süre(n) = c + d*n doğruları oturtulur. Batch'ler bu tahminle
+    INFER_MEMORY_CEILING_MB ve INFER_MAX_BATCH_SEC altında kalacak şekilde paketlenir.
+
+    CUDA'da tepe bellek allocator'dan (max_memory_allocated) ölçülür. CPU'da allocator
+    istatistiği olmadığından, HiFi-GAN decoder'ının en büyük ara aktivasyonu
+    konfigürasyondan hesaplanarak analitik olarak tahmin edilir.
+    """
+
+    def __init__(self, device: str):
+        self.device = device
+        self.mem_coef: Optional[Tuple[float, float]] = None   # (a, b) byte
+        self.time_coef: Optional[Tuple[float, float]] = None  # (c, d) saniye
+        self.ceiling_bytes = settings.INFER_MEMORY_CEILING_MB * 1024 * 1024
+
+    @property
+    def calibrated(self) -> bool:
+        return self.mem_coef is not None
+
+    # --- KALİBRASYON ---
+
+    def calibrate(self, model, lengths: Sequence[int] = None) -> None:
+        lengths = sorted(lengths or settings.BUDGET_CALIBRATION_LENGTHS)
+        vocab_size = model.config.vocab_size
+        points = []
+        try:
+            with torch.no_grad():
+                # Isınma: lazy init / cuDNN seçimi ölçüme karışmasın
+                model(input_ids=torch.randint(0, vocab_size, (1, lengths[0]), device=self.device))
+                for n in lengths:
+                    input_ids = torch.randint(0, vocab_size, (1, n), device=self.device)
+                    # Diğer modellerin forward'ları bu ölçüm bitene kadar bekler
+                    with device_measure_lock(self.device):
+                        if self.device == "cuda":
+                            torch.cuda.synchronize()
+                            torch.cuda.reset_peak_memory_stats()
+                            base = torch.cuda.memory_allocated()
+                        start = time.perf_counter()
+                        output = model(input_ids=input_ids)
+                        if self.device == "cuda":
+                            torch.cuda.synchronize()
+                            peak = torch.cuda.max_memory_allocated() - base
+                        else:
+                            peak = self._estimate_cpu_peak(model.config, output.waveform.shape[-1])
+                        elapsed = time.perf_counter() - start
+                    points.append((n, peak, elapsed))
+                    del output
+        except Exception as e:
+            logger.warning(f"Budget calibration failed, packing by batch size only: {e}")
+            return
+
+        n = np.array([p[0] for p in points], dtype=np.float64)
+        mem = np.array([p[1] for p in points], dtype=np.float64) * settings.BUDGET_SAFETY_FACTOR
+        sec = np.array([p[2] for p in points], dtype=np.float64)
+        self.mem_coef = self._fit(n, mem)
+        self.time_coef = self._fit(n, sec)
+
+        if not self.ceiling_bytes:
+            self.ceiling_bytes = self._default_ceiling()
+        logger.info(
+            f"📐 Budget calibrated: {self.mem_coef[1] / 1024:.1f} KB/token, {self.time_coef[1] * 1000:.2f} ms/token, "
+            f"ceiling {self.ceiling_bytes / 1024 / 1024:.0f} MB"
+        )
+
+    @staticmethod
+    def _fit(x: np.ndarray, y: np.ndarray) -> Tuple[float, float]:
+        if len(x) < 2:
+            return 0.0, float(y[0] / x[0])
+        slope, intercept = np.polyfit(x, y, 1)
+        # Gürültülü ölçümlerde negatif eğim/kesişim tahmini anlamsızlaştırır
+        return max(float(intercept), 0.0), max(float(slope), 0.0)
+
+    @staticmethod
+    def _estimate_cpu_peak(config, num_samples: int) -> int:
+        # Decoder i. aşamada C/2^(i+1) kanal ve num_samples/prod(rates[i+1:]) uzunlukta aktivasyon üretir.
+        # Resblock'lar aynı boyutta ~3 tensörü aynı anda canlı tutar.
+        rates = list(config.upsample_rates)
+        widest = 0.0
+        for i in range(len(rates)):
+            channels = config.upsample_initial_channel / 2 ** (i + 1)
+            length = num_samples / float(np.prod(rates[i + 1:])) if i + 1 < len(rates) else num_samples
+            widest = max(widest, channels * length)
+        return int(widest * 4 * 3)
+
+    def _default_ceiling(self) -> int:
+        if self.device == "cuda":
+            free, _ = torch.cuda.mem_get_info()
+            return int(free * 0.8)
+        return 2048 * 1024 * 1024
+
+    # --- TAHMİN / PAKETLEME ---
+
+    def predict(self, num_tokens: int, batch_size: int = 1) -> Tuple[int, float]:
+        """Padding'li batch için (byte, saniye) tahmini. Kalibrasyon yoksa (0, 0)."""
+        if not self.calibrated:
+            return 0, 0.0
+        a, b = self.mem_coef
+        c, d = self.time_coef
+        return int(batch_size * (a + b * num_tokens)), batch_size * (c + d * num_tokens)
+
+    def fits(self, num_tokens: int, batch_size: int = 1) -> bool:
+        mem, sec = self.predict(num_tokens, batch_size)
+        if batch_size > 1 and sec > settings.INFER_MAX_BATCH_SEC:
+            return False
+        return not self.ceiling_bytes or mem <= self.ceiling_bytes
+
+    def pack(self, lengths: Sequence[int]) -> List[List[int]]:
+        """
+        İndeksleri batch'lere böler. Uzunluğa göre sıralanır (padding israfı azalır),
+        her batch en uzun elemanına göre tahmin edilen bellek tavanı altında kalır.
+        Tek başına tavanı aşan eleman kendi batch'inde gider.
+        """
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+        batches: List[List[int]] = []
+        current: List[int] = []
+        for i in order:
+            candidate = current + [i]
+            if current and (
+                len(candidate) > settings.INFER_MAX_BATCH_SIZE
+                or not self.fits(lengths[i], len(candidate))
+            ):
+                batches.append(current)
+                candidate = [i]
+            current = candidate
+        if current:
+            batches.append(current)
+        return batches
+
+class AllocatorPolicy:
+    """
+    Her forward sonrası koşulsuz torch.cuda.empty_cache() yerine allocator istatistiklerine
+    göre karar verir: önbellekte tutulan ama kullanılmayan bellek (reserved - allocated)
+    hem oran hem de mutlak eşiği aşarsa boşaltılır. Tepe bellek ve fragmentasyon metriklere yazılır.
+
+    Tepe bellek cihaz geneli ölçülür (o anda cihazda allocate edilmiş her şey: tüm modellerin ağırlıkları
+    dahil); ölçülen forward'lar device_measure_lock ile sıralandığından tek bir forward'un tepesidir.
+    """
+
+    def __init__(self, device: str):
+        self.device = device
+
+    @contextmanager
+    def measure(self, predicted_bytes: int = 0):
+        """Forward'u sarar: CUDA'da cihaz kilidi altında tepe sayacı sıfırlanır, forward sonrası okunur."""
+        with device_measure_lock(self.device):
+            self.before_forward()
+            yield
+            self.after_forward(predicted_bytes)
+
+    def before_forward(self) -> None:
+        if self.device == "cuda":
+            torch.cuda.reset_peak_memory_stats()
+
+    def after_forward(self, predicted_bytes: int = 0) -> None:
+        if self.device != "cuda":
+            # CPU: süreç RSS tepe değeri (ru_maxrss Linux'ta KB)
+            metrics.ALLOCATOR_PEAK_BYTES.set(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024)
+            return
+
+        peak = torch.cuda.max_memory_allocated()
+        allocated = torch.cuda.memory_allocated()
+        reserved = torch.cuda.memory_reserved()
+        idle = reserved - allocated
+        fragmentation = idle / reserved if reserved else 0.0
+
+        metrics.FORWARD_PEAK_MEMORY.observe(peak)
+        metrics.ALLOCATOR_PEAK_BYTES.set(peak)
+        metrics.ALLOCATOR_RESERVED_BYTES.set(reserved)
+        metrics.ALLOCATOR_FRAGMENTATION.set(fragmentation)
+        if predicted_bytes and peak > predicted_bytes:
+            logger.debug(f"Forward peak {peak / 1024 / 1024:.0f} MB exceeded prediction {predicted_bytes / 1024 / 1024:.0f} MB")
+
+        if fragmentation > settings.CUDA_EMPTY_CACHE_FRAGMENTATION and idle > settings.CUDA_EMPTY_CACHE_MIN_IDLE_MB * 1024 * 1024:
+            torch.cuda.empty_cache()
+            metrics.ALLOCATOR_EMPTY_CACHE.inc()
+
+class RtfTracker:
+    """
+    Model başına (bu replika/cihaz üzerinde) çalışan RTF ve karakter başına ses süresi ortalaması (EWMA).
+    Stream segment boyutları bu tahminle seçilir: bir segmentin sentez süresi ≈ karakter * sn/karakter * RTF.
+    Ölçüm gelene kadar muhafazakâr varsayılanlar kullanılır.
+    """
+
+    INITIAL_RTF = 1.0
+    INITIAL_SEC_PER_CHAR = 0.07
+
+    def __init__(self, model_id: str):
+        self.model_id = model_id
+        self.rtf = self.INITIAL_RTF
+        self.sec_per_char = self.INITIAL_SEC_PER_CHAR
+        self.samples = 0
+
+    def observe(self, chars: int, audio_sec: float, process_sec: float) -> None:
+        if chars <= 0 or audio_sec <= 0:
+            return
+        # İlk ölçüm varsayılanın yerine geçer, sonrakiler yumuşatılır
+        alpha = 1.0 if self.samples == 0 else settings.STREAM_RTF_ALPHA
+        self.rtf += alpha * (process_sec / audio_sec - self.rtf)
+        self.sec_per_char += alpha * (audio_sec / chars - self.sec_per_char)
+        self.samples += 1
+        metrics.STREAM_RTF_ESTIMATE.labels(self.model_id).set(self.rtf)
+
+    def audio_sec(self, chars: int) -> float:
+        return chars * self.sec_per_char
+
+    def synth_sec(self, chars: int) -> float:
+        return self.audio_sec(chars) * self.rtf
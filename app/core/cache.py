@@ -1,23 +1,626 @@
 import os
+import time
+import sqlite3
 import hashlib
 import json
 import logging
-from typing import List, Optional, Dict, Any
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Tuple
 from app.core.config import settings
+from app.core import metrics
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
 
 logger = logging.getLogger("CACHE")
 
+# Cache anahtarı formatının sürümü (engine._generate_cache_key). Anahtara giren alanlar değişince artırılır:
+# eski formattaki girdiler bir daha okunmaz ve açılışta yerel diskten temizlenir.
+# 1: metin/dil/hız/model, 2: + tür (stream/segment), 3: + model sürümü
+CACHE_KEY_SCHEMA = "3"
+
+# --- BACKENDS ---
+
+class CacheBackend(ABC):
+    """Cache depolama arayüzü. Backend'ler hata durumunda exception fırlatır, karar TtsEngineCache'te verilir."""
+    name = "base"
+
+    @abstractmethod
+    def load(self, key: str) -> Optional[bytes]: ...
+
+    @abstractmethod
+    def save(self, key: str, audio_bytes: bytes) -> None: ...
+
+    @abstractmethod
+    def exists(self, key: str) -> bool: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+class LocalFileBackend(CacheBackend):
+    """Pod'a ait disk (volume) üzerinde dosya bazlı cache."""
+    name = "local"
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    def load(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self.path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, audio_bytes: bytes) -> None:
+        # Temp dosyaya yaz + rename: okuyucu asla yarım dosya görmez
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio_bytes)
+                self._flush(f)
+            os.replace(tmp_path, self.path(key))
+        except Exception:
+            try: os.remove(tmp_path)
+            except OSError: pass
+            raise
+
+    def _flush(self, f) -> None:
+        pass
+
+    def delete(self, key: str) -> None:
+        try: os.remove(self.path(key))
+        except FileNotFoundError: pass
+
+class SharedFileBackend(LocalFileBackend):
+    """
+    Replikalar arası paylaşılan dosya sistemi (NFS/EFS vb.).
+    Rename'den önce fsync yapılır ki diğer node'lar rename'i gördüğünde veri de diskte olsun.
+    """
+    name = "shared"
+
+    def _flush(self, f) -> None:
+        f.flush()
+        os.fsync(f.fileno())
+
+class RedisBackend(CacheBackend):
+    """
+    Redis protokolü konuşan key-value store (Redis, KeyDB, Dragonfly).
+    url="fakeredis://" süreç içi stand-in'dir (fakeredis paketi): aynı süreçteki tüm
+    backend'ler tek bir sahte sunucuyu paylaşır, replikalar arası davranış sunucusuz test edilir.
+    """
+    name = "redis"
+    STAND_IN_SCHEME = "fakeredis://"
+    _stand_in_server = None
+
+    def __init__(self, url: str, ttl_sec: int, timeout_sec: float, prefix: str = "tts-mms:"):
+        if url.startswith(self.STAND_IN_SCHEME):
+            if fakeredis is None:
+                raise RuntimeError("fakeredis package is not installed")
+            if RedisBackend._stand_in_server is None:
+                RedisBackend._stand_in_server = fakeredis.FakeServer()
+            self.client = fakeredis.FakeRedis(server=RedisBackend._stand_in_server)
+        else:
+            if redis is None:
+                raise RuntimeError("redis package is not installed")
+            self.client = redis.Redis.from_url(
+                url, socket_timeout=timeout_sec, socket_connect_timeout=timeout_sec
+            )
+        self.ttl_sec = ttl_sec
+        self.prefix = prefix
+
+    def _k(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def load(self, key: str) -> Optional[bytes]:
+        return self.client.get(self._k(key))
+
+    def save(self, key: str, audio_bytes: bytes) -> None:
+        self.client.set(self._k(key), audio_bytes, ex=self.ttl_sec or None)
+
+    def exists(self, key: str) -> bool:
+        return bool(self.client.exists(self._k(key)))
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self._k(key))
+
+class MemoryTier:
+    """Byte bütçeli LRU. Sıcak prompt'lar diske/ağa hiç gitmeden servis edilir."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._items[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+
+# --- INDEX ---
+
+class CacheIndex:
+    """
+    Yerel cache girdilerinin SQLite indeksi: hangi model/sürüm üretti, boyut, hit sayısı, son erişim.
+
+    - Hit'ler bellekte biriktirilir ve arka planda toplu yazılır (okuma yolunda disk yazımı yok).
+    - Model/sürüm başına girdi ve byte toplamları trigger'larla güncel tutulur; açılışta
+      tablo taranmaz, toplam byte bu küçük tablodan okunur (milyonlarca girdide de hızlı).
+    - LRU tahliyesi last_access indeksinden en eski girdileri seçer.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            model TEXT NOT NULL DEFAULT '',
+            version TEXT NOT NULL DEFAULT '',
+            language TEXT,
+            kind TEXT,
+            size INTEGER NOT NULL,
+            created REAL NOT NULL,
+            last_access REAL NOT NULL,
+            hits INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_entries_model ON entries(model, version);
+        CREATE INDEX IF NOT EXISTS idx_entries_access ON entries(last_access);
+        CREATE INDEX IF NOT EXISTS idx_entries_hits ON entries(hits DESC);
+        CREATE TABLE IF NOT EXISTS model_totals (
+            model TEXT NOT NULL,
+            version TEXT NOT NULL,
+            entries INTEGER NOT NULL,
+            bytes INTEGER NOT NULL,
+            PRIMARY KEY (model, version)
+        );
+        CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+        CREATE TABLE IF NOT EXISTS slot_versions (model TEXT PRIMARY KEY, version TEXT NOT NULL, updated REAL NOT NULL);
+        CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+            INSERT INTO model_totals (model, version, entries, bytes) VALUES (new.model, new.version, 1, new.size)
+            ON CONFLICT (model, version) DO UPDATE SET entries = entries + 1, bytes = bytes + new.size;
+        END;
+        CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+            UPDATE model_totals SET entries = entries - 1, bytes = bytes - old.size
+            WHERE model = old.model AND version = old.version;
+        END;
+        CREATE TRIGGER IF NOT EXISTS entries_au AFTER UPDATE OF size, model, version ON entries BEGIN
+            UPDATE model_totals SET entries = entries - 1, bytes = bytes - old.size
+            WHERE model = old.model AND version = old.version;
+            INSERT INTO model_totals (model, version, entries, bytes) VALUES (new.model, new.version, 1, new.size)
+            ON CONFLICT (model, version) DO UPDATE SET entries = entries + 1, bytes = bytes + new.size;
+        END;
+    """
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+        self.fresh = not os.path.exists(db_path)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[float]] = {}
+        self._pending_lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL;")
+            self._conn.execute("PRAGMA synchronous=NORMAL;")
+            self._conn.executescript(self.SCHEMA)
+            self._conn.execute("DELETE FROM model_totals WHERE entries <= 0")
+        self.total_bytes = self._read_total_bytes()
+
+    def _read_total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM model_totals").fetchone()[0]
+
+    def record(self, key: str, size: int, meta: Optional[Dict[str, Any]] = None) -> None:
+        meta = meta or {}
+        now = time.time()
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO entries (key, model, version, language, kind, size, created, last_access, hits)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
+                ON CONFLICT (key) DO UPDATE SET
+                    model = CASE WHEN excluded.model != '' THEN excluded.model ELSE model END,
+                    version = CASE WHEN excluded.model != '' THEN excluded.version ELSE version END,
+                    language = COALESCE(excluded.language, language),
+                    kind = COALESCE(excluded.kind, kind), size = excluded.size, created = excluded.created,
+                    last_access = excluded.last_access
+            """, (key, meta.get("model") or "", meta.get("version") or "", meta.get("language"),
+                  meta.get("kind"), size, now, now))
+            # Girdi başka sürüme taşındıysa eski sürümün boşalan toplam satırı kalmasın
+            self._conn.execute("DELETE FROM model_totals WHERE entries <= 0")
+        self.total_bytes = self._read_total_bytes()
+
+    def touch(self, key: str) -> None:
+        """Hit kaydı (bellekte). flush() ile diske yazılır."""
+        with self._pending_lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                self._pending[key] = [1, time.time()]
+            else:
+                pending[0] += 1
+                pending[1] = time.time()
+
+    def flush(self) -> int:
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "UPDATE entries SET hits = hits + ?, last_access = MAX(last_access, ?) WHERE key = ?",
+                [(hits, ts, key) for key, (hits, ts) in pending.items()]
+            )
+            self._conn.execute("COMMIT")
+        return len(pending)
+
+    def remove(self, keys: List[str]) -> None:
+        if not keys:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k in keys])
+            self._conn.execute("DELETE FROM model_totals WHERE entries <= 0")
+            self._conn.execute("COMMIT")
+        self.total_bytes = self._read_total_bytes()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM entries WHERE key = ?", (key,)).fetchone()
+        return dict(row) if row else None
+
+    def oldest(self, limit: int) -> List[Tuple[str, int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access ASC LIMIT ?", (limit,)
+            ).fetchall()
+        return [(r["key"], r["size"]) for r in rows]
+
+    def select_keys(self, model: Optional[str] = None, version: Optional[str] = None,
+                    exclude_version: Optional[str] = None, created_before: Optional[float] = None,
+                    limit: int = 1000) -> List[str]:
+        clauses, params = [], []
+        if model is not None:
+            clauses.append("model = ?"); params.append(model)
+        if version is not None:
+            clauses.append("version = ?"); params.append(version)
+        if exclude_version is not None:
+            clauses.append("version != ?"); params.append(exclude_version)
+        if created_before is not None:
+            clauses.append("created < ?"); params.append(created_before)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(f"SELECT key FROM entries {where} LIMIT ?", (*params, limit)).fetchall()
+        return [r["key"] for r in rows]
+
+    def set_slot_version(self, model: str, version: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO slot_versions (model, version, updated) VALUES (?, ?, ?)",
+                (model, version, time.time())
+            )
+
+    def slot_version(self, model: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT version FROM slot_versions WHERE model = ?", (model,)).fetchone()
+        return row["version"] if row else None
+
+    def key_schema(self) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'key_schema'").fetchone()
+        return row["value"] if row else None
+
+    def set_key_schema(self, schema: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('key_schema', ?)", (schema,))
+
+    def versions(self, model: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT version FROM model_totals WHERE model = ?", (model,)).fetchall()
+        return [r["version"] for r in rows]
+
+    def backfill(self, cache_dir: str, batch_size: int = 1000) -> int:
+        """İndeks yokken oluşmuş dosyaları (eski sürümler) model bilgisi olmadan ekler."""
+        added, batch = 0, []
+        def commit():
+            with self._lock:
+                self._conn.execute("BEGIN")
+                self._conn.executemany("""
+                    INSERT OR IGNORE INTO entries (key, size, created, last_access, hits) VALUES (?, ?, ?, ?, 0)
+                """, batch)
+                self._conn.execute("COMMIT")
+        with os.scandir(cache_dir) as it:
+            for item in it:
+                if item.name.startswith(".") or not item.is_file():
+                    continue
+                st = item.stat()
+                batch.append((item.name, st.st_size, st.st_mtime, st.st_mtime))
+                if len(batch) >= batch_size:
+                    commit(); added += len(batch); batch = []
+        if batch:
+            commit(); added += len(batch)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('backfilled', ?)", (str(time.time()),))
+        self.total_bytes = self._read_total_bytes()
+        return added
+
+    def stats(self, top: int = 10) -> Dict[str, Any]:
+        with self._lock:
+            per_model = [dict(r) for r in self._conn.execute(
+                "SELECT model, version, entries, bytes FROM model_totals ORDER BY bytes DESC"
+            ).fetchall()]
+            top_keys = [dict(r) for r in self._conn.execute(
+                "SELECT key, model, language, kind, size, hits, last_access FROM entries ORDER BY hits DESC LIMIT ?",
+                (top,)
+            ).fetchall()]
+        return {
+            "entries": sum(m["entries"] for m in per_model),
+            "bytes": sum(m["bytes"] for m in per_model),
+            "per_model": per_model,
+            "top_keys": top_keys,
+        }
+
+def create_remote_backend() -> Optional[CacheBackend]:
+    backend = settings.CACHE_BACKEND
+    if backend == "local":
+        return None
+    if backend == "shared":
+        return SharedFileBackend(settings.CACHE_SHARED_DIR)
+    if backend == "redis":
+        return RedisBackend(
+            settings.CACHE_REDIS_URL, settings.CACHE_REDIS_TTL_SEC, settings.CACHE_REMOTE_TIMEOUT_SEC
+        )
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+# --- TIERED CACHE ---
+
 class TtsEngineCache:
+    """
+    Katmanlı cache: memory -> local disk -> remote (shared fs / redis).
+    Remote katman çökerse istekler başarısız olmaz; belirli bir süre local-only çalışılır.
+    """
     _instance = None
-    
+    # Remote katmanda girdinin yanında tutulan indeks bilgisi (model, sürüm, dil, tür)
+    META_SUFFIX = ".meta"
+
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(TtsEngineCache, cls).__new__(cls)
-            cls._instance.cache_dir = "/app/cache"
-            cls._instance.cache_file_ext = "wav" # Varsayılan olarak WAV
-            os.makedirs(cls._instance.cache_dir, exist_ok=True)
+            cls._instance._setup()
         return cls._instance
 
+    def _setup(self):
+        self.cache_dir = settings.CACHE_DIR
+        self.cache_file_ext = "wav" # Varsayılan olarak WAV
+        self.memory = MemoryTier(settings.CACHE_MEMORY_MAX_MB * 1024 * 1024)
+        self.local = LocalFileBackend(self.cache_dir)
+        self.remote_down_until = 0.0
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, float] = {
+            "memory_hits": 0, "local_hits": 0, "remote_hits": 0, "misses": 0,
+            "remote_errors": 0, "remote_ops": 0, "remote_time_ms": 0.0,
+            "local_ops": 0, "local_time_ms": 0.0,
+        }
+        try:
+            self.remote = create_remote_backend()
+        except Exception as e:
+            logger.error(f"Remote cache backend '{settings.CACHE_BACKEND}' unavailable, running local-only: {e}")
+            self.remote = None
+        self.index = CacheIndex(os.path.join(self.cache_dir, ".index.db"))
+        # Anahtar formatı değiştiyse bu andan önce yazılmış girdiler eski formattadır (arka planda silinir)
+        self._schema_cutoff = time.time() if self.index.key_schema() != CACHE_KEY_SCHEMA else None
+        logger.info(
+            f"Cache initialized | Backend: {self.remote.name if self.remote else 'local'} | Dir: {self.cache_dir} "
+            f"| Indexed: {self.index.total_bytes / 1024 / 1024:.1f} MB"
+        )
+        self._maintenance = threading.Thread(target=self._maintenance_loop, name="cache-index", daemon=True)
+        self._maintenance.start()
+
+    def _maintenance_loop(self) -> None:
+        # İndeks sonradan eklendiyse mevcut dosyalar bir kez (istek yolunun dışında) taranır
+        if self.index.fresh:
+            try:
+                added = self.index.backfill(self.cache_dir)
+                if added:
+                    logger.info(f"🗂️ Cache index backfilled with {added} existing entries")
+            except Exception as e:
+                logger.warning(f"Cache index backfill failed: {e}")
+        try:
+            self.purge_old_schema()
+        except Exception as e:
+            logger.warning(f"Cache key schema purge failed: {e}")
+        while True:
+            time.sleep(settings.CACHE_INDEX_FLUSH_SEC)
+            try:
+                self.index.flush()
+                self.enforce_disk_limit()
+            except Exception as e:
+                logger.warning(f"Cache index maintenance failed: {e}")
+
+    def enforce_disk_limit(self) -> int:
+        """Yerel disk bütçesi aşıldıysa en eski erişilen girdileri siler. Silinen girdi sayısını döner."""
+        limit = settings.CACHE_DISK_MAX_MB * 1024 * 1024
+        if not limit or self.index.total_bytes <= limit:
+            return 0
+        # Sürekli sınırda salınmamak için %90'a kadar boşaltılır
+        target = int(limit * 0.9)
+        removed = 0
+        while self.index.total_bytes > target:
+            candidates = self.index.oldest(500)
+            if not candidates:
+                break
+            excess = self.index.total_bytes - target
+            victims = []
+            for key, size in candidates:
+                victims.append(key)
+                excess -= size
+                if excess <= 0:
+                    break
+            self._drop_local(victims)
+            removed += len(victims)
+        if removed:
+            logger.info(f"🧹 Cache disk limit: evicted {removed} entries")
+        return removed
+
+    def _drop_local(self, keys: List[str]) -> None:
+        for key in keys:
+            self.memory.delete(key)
+            try: self.local.delete(key)
+            except OSError as e: logger.warning(f"Failed to delete cache entry {key}: {e}")
+        self.index.remove(keys)
+
+    def _drop_remote(self, keys: List[str]) -> None:
+        for key in keys:
+            self._remote_call("delete", key)
+            self._remote_call("delete", key + self.META_SUFFIX)
+
+    def invalidate(self, model: Optional[str] = None, version: Optional[str] = None,
+                   exclude_version: Optional[str] = None, remote: bool = False,
+                   created_before: Optional[float] = None) -> int:
+        """
+        Model/sürüme göre yerel (memory + disk) girdileri siler. remote=True ise (elle silme)
+        indeksteki anahtarların remote kopyaları da silinir; aksi halde bir sonraki remote hit
+        girdiyi geri getirir. Otomatik sürüm temizliğinde remote'a dokunulmaz: anahtarlar
+        sürümü içerdiğinden yeni sürüm eski girdileri zaten istemez.
+        """
+        removed = 0
+        while True:
+            keys = self.index.select_keys(model, version, exclude_version, created_before)
+            if not keys:
+                break
+            if remote:
+                self._drop_remote(keys)
+            self._drop_local(keys)
+            removed += len(keys)
+        if removed:
+            logger.info(f"🗑️ Cache invalidated: {removed} entries (model={model}, version={version}, exclude_version={exclude_version})")
+        return removed
+
+    def purge_old_schema(self) -> int:
+        """
+        Anahtar formatı değiştiyse (veya indeks yeni oluşturulup mevcut dosyalar model bilgisi
+        olmadan eklendiyse) eski girdiler hiçbir istekle eşleşmez; disk limiti kapalıyken sonsuza
+        kadar kalmasınlar diye silinir. Açılıştan sonra yeni formatla yazılanlara dokunulmaz.
+        Remote kopyalar listelenemez; TTL/paylaşımlı dizin politikasıyla düşer.
+        """
+        if self._schema_cutoff is None:
+            return 0
+        removed = self.invalidate(created_before=self._schema_cutoff)
+        self.index.set_key_schema(CACHE_KEY_SCHEMA)
+        self._schema_cutoff = None
+        if removed:
+            logger.info(f"🧹 Cache key schema changed to v{CACHE_KEY_SCHEMA}: purged {removed} unreachable entries")
+        return removed
+
+    def remember_version(self, model: str, version: str) -> None:
+        """Yuvanın son yüklenen sürümü: yeniden başlatma sonrası model yüklenmeden cache anahtarı üretilebilsin."""
+        self._index_call("set_slot_version", model, version)
+
+    def known_version(self, model: str) -> Optional[str]:
+        return self._index_call("slot_version", model)
+
+    def invalidate_stale_versions(self, model: str, version: str) -> int:
+        """Model yüklendiğinde: aynı modelin başka sürümlerine ait girdileri siler."""
+        if not settings.CACHE_INVALIDATE_ON_MODEL_CHANGE or not version:
+            return 0
+        # Sürümü bilinmeyen (indeks öncesi) girdiler "" ile kayıtlıdır; onlar purge_old_schema ile temizlenir
+        stale = [v for v in self.index.versions(model) if v and v != version]
+        return sum(self.invalidate(model, v) for v in stale)
+
+    def _count(self, field: str, value: float = 1) -> None:
+        with self._stats_lock:
+            self._stats[field] += value
+
+    def _local_call(self, op: str, *args):
+        start = time.perf_counter()
+        try:
+            return getattr(self.local, op)(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._count("local_ops")
+            self._count("local_time_ms", elapsed * 1000)
+            metrics.observe_stage("cache_io", elapsed)
+
+    def _remote_call(self, op: str, *args):
+        """Remote backend çağrısı. Hata olursa backend'i geçici olarak devre dışı bırakır ve None döner."""
+        if self.remote is None or time.monotonic() < self.remote_down_until:
+            return None
+        start = time.perf_counter()
+        try:
+            return getattr(self.remote, op)(*args)
+        except Exception as e:
+            self.remote_down_until = time.monotonic() + settings.CACHE_REMOTE_RETRY_SEC
+            self._count("remote_errors")
+            logger.warning(
+                f"Remote cache '{self.remote.name}' {op} failed, degrading to local-only "
+                f"for {settings.CACHE_REMOTE_RETRY_SEC}s: {e}"
+            )
+            return None
+        finally:
+            elapsed = time.perf_counter() - start
+            self._count("remote_ops")
+            self._count("remote_time_ms", elapsed * 1000)
+            metrics.observe_stage("cache_io", elapsed)
+
+    def _remote_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        """Remote girdinin yanında saklanan indeks bilgisi (başka replikanın save() meta'sı)."""
+        raw = self._remote_call("load", key + self.META_SUFFIX)
+        if not raw:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    def _promote(self, key: str, data: bytes) -> None:
+        """Remote'tan gelen girdiyi yerel diske alır ve üreten model/sürümle indeksler."""
+        self._local_call("save", key, data)
+        self._index_call("record", key, len(data), self._remote_meta(key))
+
+    def _index_call(self, op: str, *args):
+        """İndeks hatası cache'i bozmamalı: loglanır ve yutulur."""
+        try:
+            return getattr(self.index, op)(*args)
+        except Exception as e:
+            logger.warning(f"Cache index {op} failed: {e}")
+            return None
+
     def _generate_cache_key(self, text: str, language: str, speed: float) -> str:
         """Cache için benzersiz ve deterministik bir anahtar üretir."""
         key_data = {
@@ -31,31 +634,117 @@ class TtsEngineCache:
         return f"{cache_key}.{self.cache_file_ext}"
 
     def get_cache_path(self, key: str) -> str:
-        return os.path.join(self.cache_dir, key)
+        return self.local.path(key)
 
     def exists(self, key: str) -> bool:
-        return os.path.exists(self.get_cache_path(key))
+        if self.memory.get(key) is not None or self.local.exists(key):
+            return True
+        return bool(self._remote_call("exists", key))
 
-    def save(self, key: str, audio_bytes: bytes) -> None:
-        """Sentezlenen sesi cache'e kaydeder."""
+    def save(self, key: str, audio_bytes: bytes, meta: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Sentezlenen sesi tüm katmanlara yazar (write-through).
+        meta: indekse yazılacak {model, version, language, kind} bilgisi.
+        """
+        self.memory.put(key, audio_bytes)
         try:
-            with open(self.get_cache_path(key), "wb") as f:
-                f.write(audio_bytes)
+            self._local_call("save", key, audio_bytes)
+            self._index_call("record", key, len(audio_bytes), meta)
             logger.debug(f"Saved cache for key: {key}")
         except Exception as e:
             logger.warning(f"Failed to save cache for key {key}: {e}")
+        self._remote_call("save", key, audio_bytes)
+        if meta and self.remote is not None:
+            # Diğer replikalar girdiyi yerel diske alırken model/sürüm bilgisini kaybetmesin
+            self._remote_call("save", key + self.META_SUFFIX, json.dumps(meta).encode())
 
     def load(self, key: str) -> Optional[bytes]:
-        """Cache'den sesi yükler."""
+        """Cache'den sesi yükler. Alt katmandan gelen veri üst katmanlara taşınır."""
+        data = self.memory.get(key)
+        if data is not None:
+            self._count("memory_hits")
+            metrics.record_cache("memory", "hit")
+            self.index.touch(key)
+            logger.debug(f"Cache HIT (memory) for key: {key}")
+            return data
+
+        metrics.record_cache("memory", "miss")
         try:
-            if self.exists(key):
-                with open(self.get_cache_path(key), "rb") as f:
-                    logger.debug(f"Cache HIT for key: {key}")
-                    return f.read()
-            logger.debug(f"Cache MISS for key: {key}")
-            return None
+            data = self._local_call("load", key)
         except Exception as e:
             logger.warning(f"Failed to load cache for key {key}: {e}")
-            return None
+            data = None
+        if data:
+            self._count("local_hits")
+            metrics.record_cache("local", "hit")
+            self.memory.put(key, data)
+            self.index.touch(key)
+            logger.debug(f"Cache HIT (local) for key: {key}")
+            return data
+
+        metrics.record_cache("local", "miss")
+        data = self._remote_call("load", key)
+        if data:
+            # Başka bir replikanın ürettiği ses: yerel katmanlara al
+            self._count("remote_hits")
+            metrics.record_cache("remote", "hit")
+            self.memory.put(key, data)
+            try: self._promote(key, data)
+            except Exception as e: logger.warning(f"Failed to promote remote entry {key}: {e}")
+            logger.debug(f"Cache HIT (remote) for key: {key}")
+            return data
+
+        if self.remote is not None:
+            metrics.record_cache("remote", "miss")
+        self._count("misses")
+        logger.debug(f"Cache MISS for key: {key}")
+        return None
+
+    def lookup_path(self, key: str) -> Optional[str]:
+        """
+        Zero-copy servis için: girdi yerel diskte varsa yolunu döner.
+        Remote'taki girdi önce yerel diske alınır. Byte'lar bellekte tutulmaz.
+        """
+        if self.local.exists(key):
+            self._count("local_hits")
+            metrics.record_cache("local", "hit")
+            self.index.touch(key)
+            return self.local.path(key)
+
+        metrics.record_cache("local", "miss")
+        data = self._remote_call("load", key)
+        if data:
+            try:
+                self._promote(key, data)
+                self._count("remote_hits")
+                metrics.record_cache("remote", "hit")
+                return self.local.path(key)
+            except Exception as e:
+                logger.warning(f"Failed to promote remote entry {key}: {e}")
+                return None
+
+        if self.remote is not None:
+            metrics.record_cache("remote", "miss")
+        self._count("misses")
+        return None
+
+    def stats(self, top: int = 10) -> Dict[str, Any]:
+        with self._stats_lock:
+            s = dict(self._stats)
+        lookups = s["memory_hits"] + s["local_hits"] + s["remote_hits"] + s["misses"]
+        hits = lookups - s["misses"]
+        return {
+            "backend": self.remote.name if self.remote else "local",
+            "remote_available": self.remote is not None and time.monotonic() >= self.remote_down_until,
+            "lookups": lookups,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            # Local katmanda olmayıp remote'tan gelenler: diğer replikaların ürettiği sesler
+            "cross_node_hit_rate": s["remote_hits"] / lookups if lookups else 0.0,
+            "memory_bytes": self.memory.size,
+            "avg_local_ms": s["local_time_ms"] / s["local_ops"] if s["local_ops"] else 0.0,
+            "avg_remote_ms": s["remote_time_ms"] / s["remote_ops"] if s["remote_ops"] else 0.0,
+            **{k: s[k] for k in ("memory_hits", "local_hits", "remote_hits", "misses", "remote_errors")},
+            "index": self._index_call("stats", top),
+        }
 
-tts_cache = TtsEngineCache() # Singleton instance
\ No newline at end of file
+tts_cache = TtsEngineCache() # Singleton instance
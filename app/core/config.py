@@ -17,6 +17,13 @@ class Settings(BaseSettings):
     CORS_ORIGINS: List[str] = os.getenv("TTS_MMS_SERVICE_CORS_ORIGINS", "*").split(",")
     API_KEY: Optional[str] = os.getenv("TTS_MMS_SERVICE_API_KEY", None)
 
+    # --- gRPC SERVER ---
+    # 0 = limitsiz. Limit aşılınca yeni RPC'ler RESOURCE_EXHAUSTED ile reddedilir.
+    GRPC_MAX_CONCURRENT_RPCS: int = int(os.getenv("TTS_MMS_SERVICE_GRPC_MAX_CONCURRENT_RPCS", "64"))
+    GRPC_KEEPALIVE_TIME_MS: int = int(os.getenv("TTS_MMS_SERVICE_GRPC_KEEPALIVE_TIME_MS", "30000"))
+    GRPC_KEEPALIVE_TIMEOUT_MS: int = int(os.getenv("TTS_MMS_SERVICE_GRPC_KEEPALIVE_TIMEOUT_MS", "10000"))
+    GRPC_MAX_MESSAGE_MB: int = int(os.getenv("TTS_MMS_SERVICE_GRPC_MAX_MESSAGE_MB", "32"))
+
     # --- TLS / mTLS CONFIG ---
     GRPC_TLS_CA_PATH: str = os.getenv("GRPC_TLS_CA_PATH", "/sentiric-certificates/certs/ca.crt")
     TTS_MMS_SERVICE_CERT_PATH: str = os.getenv("TTS_MMS_SERVICE_CERT_PATH", "/sentiric-certificates/certs/tts-mms-service.crt")
@@ -25,12 +32,98 @@ class Settings(BaseSettings):
     # --- MODEL & SYSTEM ---
     MODEL_ID: str = os.getenv("TTS_MMS_SERVICE_MODEL_ID", "facebook/mms-tts-tur")
     DEVICE: str = os.getenv("TTS_MMS_SERVICE_DEVICE", "cuda").strip().lower()
+    # Varsayılan dil dışındaki diller için model ID şablonu ({lang} = ISO 639-3)
+    MODEL_ID_TEMPLATE: str = os.getenv("TTS_MMS_SERVICE_MODEL_ID_TEMPLATE", "facebook/mms-tts-{lang}")
+    # Boş = her dil. Örn: "tur,eng,deu"
+    SUPPORTED_LANGUAGES: List[str] = [l.strip() for l in os.getenv("TTS_MMS_SERVICE_SUPPORTED_LANGUAGES", "").split(",") if l.strip()]
+    LANGUAGE_AUTO_DETECT: bool = os.getenv("TTS_MMS_SERVICE_LANGUAGE_AUTO_DETECT", "false").lower() == "true"
+    # Aynı anda bellekte tutulacak model sayısı ve toplam ağırlık bütçesi (0 = limitsiz)
+    MODEL_MAX_LOADED: int = int(os.getenv("TTS_MMS_SERVICE_MODEL_MAX_LOADED", "3"))
+    MODEL_MEMORY_BUDGET_MB: int = int(os.getenv("TTS_MMS_SERVICE_MODEL_MEMORY_BUDGET_MB", "0"))
+    # Hot reload: yeni sürüm bu metinle ısıtılır; eski sürümün devam eden işleri en fazla bu kadar beklenir
+    MODEL_WARMUP_TEXT: str = os.getenv("TTS_MMS_SERVICE_MODEL_WARMUP_TEXT", "Merhaba, sistem hazır. Size nasıl yardımcı olabilirim?")
+    MODEL_DRAIN_TIMEOUT_SEC: float = float(os.getenv("TTS_MMS_SERVICE_MODEL_DRAIN_TIMEOUT_SEC", "120"))
+    # Yüklenemeyen dil modelleri (Hub'da yok, erişilemiyor) bu süre boyunca tekrar denenmez
+    MODEL_LOAD_RETRY_SEC: float = float(os.getenv("TTS_MMS_SERVICE_MODEL_LOAD_RETRY_SEC", "600"))
     
+    # --- INFERENCE BUDGET ---
+    # Batch'ler tahmini tepe bellek bu tavanın altında kalacak şekilde paketlenir (0 = otomatik)
+    INFER_MEMORY_CEILING_MB: int = int(os.getenv("TTS_MMS_SERVICE_INFER_MEMORY_CEILING_MB", "0"))
+    INFER_MAX_BATCH_SIZE: int = int(os.getenv("TTS_MMS_SERVICE_INFER_MAX_BATCH_SIZE", "8"))
+    # Sentez (unary, stream parçaları, batch, şablon) için ayrılmış thread havuzu. Model kilidini bekleyen
+    # istekler de bir thread tutar; bu sayı aynı anda sentezde olabilecek istek sayısının üst sınırıdır.
+    # Cache okumaları varsayılan asyncio havuzunda kalır, sentez kuyruğunun arkasına düşmez.
+    INFER_THREADS: int = int(os.getenv("TTS_MMS_SERVICE_INFER_THREADS", "8"))
+    INFER_MAX_BATCH_SEC: float = float(os.getenv("TTS_MMS_SERVICE_INFER_MAX_BATCH_SEC", "2.0"))
+    # Batch API (/api/tts/batch) istek başına öğe limiti
+    BATCH_MAX_ITEMS: int = int(os.getenv("TTS_MMS_SERVICE_BATCH_MAX_ITEMS", "1000"))
+    BUDGET_CALIBRATE: bool = os.getenv("TTS_MMS_SERVICE_BUDGET_CALIBRATE", "true").lower() == "true"
+    BUDGET_CALIBRATION_LENGTHS: List[int] = [int(n) for n in os.getenv("TTS_MMS_SERVICE_BUDGET_CALIBRATION_LENGTHS", "16,64,192").split(",")]
+    BUDGET_SAFETY_FACTOR: float = float(os.getenv("TTS_MMS_SERVICE_BUDGET_SAFETY_FACTOR", "1.5"))
+    # empty_cache sadece boşta tutulan bellek oranı VE miktarı bu eşikleri aşınca çağrılır
+    CUDA_EMPTY_CACHE_FRAGMENTATION: float = float(os.getenv("TTS_MMS_SERVICE_CUDA_EMPTY_CACHE_FRAGMENTATION", "0.5"))
+    CUDA_EMPTY_CACHE_MIN_IDLE_MB: int = int(os.getenv("TTS_MMS_SERVICE_CUDA_EMPTY_CACHE_MIN_IDLE_MB", "512"))
+
     # --- INFERENCE DEFAULTS ---
     DEFAULT_LANGUAGE: str = "tur"
     DEFAULT_SPEED: float = float(os.getenv("TTS_MMS_SERVICE_DEFAULT_SPEED", "1.0"))
     DEFAULT_SAMPLE_RATE: int = int(os.getenv("TTS_MMS_SERVICE_DEFAULT_SAMPLE_RATE", "16000")) 
 
+    # --- AUDIO POSTPROCESS ---
+    # Cümle başı/sonundaki sessizlik kırpılır; eşik en yüksek çerçeve RMS'ine göredir (dB)
+    TRIM_SILENCE: bool = os.getenv("TTS_MMS_SERVICE_TRIM_SILENCE", "true").lower() == "true"
+    TRIM_THRESHOLD_DB: float = float(os.getenv("TTS_MMS_SERVICE_TRIM_THRESHOLD_DB", "-40"))
+    TRIM_FRAME_MS: int = int(os.getenv("TTS_MMS_SERVICE_TRIM_FRAME_MS", "10"))
+    TRIM_KEEP_MS: int = int(os.getenv("TTS_MMS_SERVICE_TRIM_KEEP_MS", "30"))
+    # Cümleler arasına eklenen sessizlik (stream ve bölünerek sentezlenen uzun metinler). 0 = kapalı
+    SENTENCE_PAUSE_MS: int = int(os.getenv("TTS_MMS_SERVICE_SENTENCE_PAUSE_MS", "200"))
+
+    # --- STORAGE ---
+    HISTORY_DIR: str = os.getenv("TTS_MMS_SERVICE_HISTORY_DIR", "/app/history")
+    UPLOAD_DIR: str = os.getenv("TTS_MMS_SERVICE_UPLOAD_DIR", "/app/uploads")
+
+    # --- CACHE ---
+    CACHE_DIR: str = os.getenv("TTS_MMS_SERVICE_CACHE_DIR", "/app/cache")
+    # local | shared | redis
+    CACHE_BACKEND: str = os.getenv("TTS_MMS_SERVICE_CACHE_BACKEND", "local").strip().lower()
+    CACHE_SHARED_DIR: str = os.getenv("TTS_MMS_SERVICE_CACHE_SHARED_DIR", "/mnt/tts-cache")
+    CACHE_REDIS_URL: str = os.getenv("TTS_MMS_SERVICE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_REDIS_TTL_SEC: int = int(os.getenv("TTS_MMS_SERVICE_CACHE_REDIS_TTL_SEC", "604800"))
+    CACHE_REMOTE_TIMEOUT_SEC: float = float(os.getenv("TTS_MMS_SERVICE_CACHE_REMOTE_TIMEOUT_SEC", "0.5"))
+    CACHE_REMOTE_RETRY_SEC: int = int(os.getenv("TTS_MMS_SERVICE_CACHE_REMOTE_RETRY_SEC", "30"))
+    CACHE_MEMORY_MAX_MB: int = int(os.getenv("TTS_MMS_SERVICE_CACHE_MEMORY_MAX_MB", "256"))
+    # Yerel disk cache üst sınırı (0 = sınırsız); aşılınca en eski erişilen girdiler silinir
+    CACHE_DISK_MAX_MB: int = int(os.getenv("TTS_MMS_SERVICE_CACHE_DISK_MAX_MB", "0"))
+    # Cache indeksine hit/son erişim yazma ve tahliye kontrolü aralığı
+    CACHE_INDEX_FLUSH_SEC: float = float(os.getenv("TTS_MMS_SERVICE_CACHE_INDEX_FLUSH_SEC", "5"))
+    # Model farklı bir sürümle yüklendiğinde eski sürümün yerel girdilerini sil
+    CACHE_INVALIDATE_ON_MODEL_CHANGE: bool = os.getenv("TTS_MMS_SERVICE_CACHE_INVALIDATE_ON_MODEL_CHANGE", "true").lower() == "true"
+    # Cache'ten stream edilen sesin parça boyutu (16kHz PCM16'da 16384 byte ~ 0.5 sn)
+    STREAM_CHUNK_BYTES: int = int(os.getenv("TTS_MMS_SERVICE_STREAM_CHUNK_BYTES", "16384"))
+
+    # --- ADAPTIVE STREAMING ---
+    # İlk segment kısa tutulur (uzun ilk cümle virgüllerden bölünür); sonraki segmentler ölçülen RTF'e
+    # göre istemcide tamponlanmış ses süresini aşmayacak kadar büyütülür/küçültülür.
+    STREAM_ADAPTIVE: bool = os.getenv("TTS_MMS_SERVICE_STREAM_ADAPTIVE", "true").lower() == "true"
+    STREAM_FIRST_SEGMENT_CHARS: int = int(os.getenv("TTS_MMS_SERVICE_STREAM_FIRST_SEGMENT_CHARS", "40"))
+    STREAM_SAFETY_SEC: float = float(os.getenv("TTS_MMS_SERVICE_STREAM_SAFETY_SEC", "0.3"))
+    STREAM_RTF_ALPHA: float = float(os.getenv("TTS_MMS_SERVICE_STREAM_RTF_ALPHA", "0.2"))
+
+    # --- TEXT NORMALIZATION ---
+    NORMALIZER_CACHE_SIZE: int = int(os.getenv("TTS_MMS_SERVICE_NORMALIZER_CACHE_SIZE", "10000"))
+    # Model başına token ID LRU'su (0 = kapalı)
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TTS_MMS_SERVICE_TOKEN_CACHE_SIZE", "20000"))
+
+    # --- TRACING ---
+    # Boş bırakılırsa export kapalıdır. Dosya: OTLP/JSON satırları, endpoint: OTLP HTTP (/v1/traces)
+    TRACE_EXPORT_PATH: str = os.getenv("TTS_MMS_SERVICE_TRACE_EXPORT_PATH", "")
+    TRACE_OTLP_ENDPOINT: str = os.getenv("TTS_MMS_SERVICE_TRACE_OTLP_ENDPOINT", "")
+
+    # --- PROFILING (admin) ---
+    PROFILE_DIR: str = os.getenv("TTS_MMS_SERVICE_PROFILE_DIR", "/tmp/tts-profiles")
+    PROFILE_MAX_DURATION_SEC: int = int(os.getenv("TTS_MMS_SERVICE_PROFILE_MAX_DURATION_SEC", "300"))
+    PROFILE_SAMPLE_INTERVAL_MS: int = int(os.getenv("TTS_MMS_SERVICE_PROFILE_SAMPLE_INTERVAL_MS", "10"))
+
     # --- LOGGING ---
     DEBUG: bool = os.getenv("TTS_MMS_SERVICE_DEBUG", "false").lower() == "true"
 
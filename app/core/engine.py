@@ -1,54 +1,107 @@
 import torch
 import numpy as np
+import asyncio
+import contextvars
+import functools
 import logging
-import threading
 import re
 import time
 import hashlib
 import json
-from typing import Generator, Optional, Dict, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncGenerator, Generator, Iterator, NamedTuple, Optional, Dict, List, Tuple
 
-from transformers import VitsModel, AutoTokenizer
 from app.core.config import settings
 from app.core.audio import audio_processor
 from app.core.history import history_manager
 from app.core.cache import tts_cache
+from app.core.template import render_segments, PAUSE_MARKS
+from app.core.normalizer import normalize_text
+from app.core import metrics
+from app.core.profiler import inference_profiler
+from app.core.registry import ModelRegistry, LoadedModel
+from app.core.budget import AllocatorPolicy
+from app.core.tokenization import BatchBuilder
 
 logger = logging.getLogger("MMS-ENGINE")
 
+class BatchPlan(NamedTuple):
+    """Batch'teki tekil (cache anahtarı başına) bir sentez işi."""
+    text: str       # normalize edilmiş metin
+    model_id: str
+    language: str
+    speed: float
+
 class MmsEngine:
     _instance = None
-    _lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(MmsEngine, cls).__new__(cls)
-            cls._instance.model = None
-            cls._instance.tokenizer = None
             cls._instance.device = settings.DEVICE
-            cls._instance.sampling_rate = settings.DEFAULT_SAMPLE_RATE
             cls._instance.model_config = None
             cls._instance.cache_file_ext = "wav"
+            # Dil -> model. Varsayılan model hep yüklü kalır; diğerleri ilk kullanımda yüklenir.
+            cls._instance.registry = ModelRegistry(settings.DEVICE)
+            cls._instance.allocator = AllocatorPolicy(settings.DEVICE)
+            cls._instance.batch_builder = BatchBuilder(settings.DEVICE)
+            # Bloklayıcı sentez bu havuzda çalışır; HTTP/gRPC'nin paylaştığı varsayılan havuzu doldurmaz
+            cls._instance.executor = ThreadPoolExecutor(max_workers=settings.INFER_THREADS, thread_name_prefix="inference")
         return cls._instance
 
+    # Geriye uyumluluk: model/tokenizer/sampling_rate varsayılan modelin güncel sürümünü gösterir.
+    # Referans tutulmaz ki hot reload sonrası eski sürüm serbest kalabilsin.
+    @property
+    def model(self):
+        entry = self.registry.peek(settings.MODEL_ID)
+        return entry.model if entry else None
+
+    @property
+    def tokenizer(self):
+        entry = self.registry.peek(settings.MODEL_ID)
+        return entry.tokenizer if entry else None
+
+    @property
+    def sampling_rate(self) -> int:
+        entry = self.registry.peek(settings.MODEL_ID)
+        return entry.sampling_rate if entry else settings.DEFAULT_SAMPLE_RATE
+
+    def model_sampling_rate(self, model_id: str, cached_path: Optional[str] = None) -> int:
+        """
+        Sesi üreten modelin örnekleme hızı (diller arasında farklı olabilir). Model yüklü değilse
+        (cache hit) cache'teki WAV başlığından okunur.
+        """
+        entry = self.registry.peek(model_id)
+        if entry is not None:
+            return entry.sampling_rate
+        if cached_path:
+            try:
+                return audio_processor.wav_sample_rate(cached_path)
+            except Exception as e:
+                logger.warning(f"Could not read sample rate from {cached_path}: {e}")
+        return self.sampling_rate
+
     def initialize(self):
         if not self.model:
             logger.info(f"🚀 Initializing MMS Engine... Device: {self.device}")
             try:
-                self.tokenizer = AutoTokenizer.from_pretrained(settings.MODEL_ID)
-                self.model = VitsModel.from_pretrained(settings.MODEL_ID).to(self.device)
-                self.model.eval()
-                
-                self.sampling_rate = getattr(self.model.config, 'sampling_rate', 16000)
+                self.registry.get(settings.MODEL_ID)
                 logger.info(f"✅ MMS Model Loaded: {settings.MODEL_ID} | SR: {self.sampling_rate}Hz")
             except Exception as e:
                 logger.critical(f"🔥 Model init failed: {e}", exc_info=True)
                 raise e
 
-    def _clean_text(self, text: str) -> str:
-        # Metin temizliği
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text.lower()
+    def _resolve(self, text: str, language: Optional[str]) -> Tuple[str, str]:
+        """(dil, model_id). Model yüklenmez; cache bakışı için yeterlidir."""
+        return self.registry.resolve(language, text)
+
+    def _clean_text(self, text: str, language: str = settings.DEFAULT_LANGUAGE) -> str:
+        # Türkçe kanonik normalizasyon (sayılar, para birimi, tarih, kısaltma, casing).
+        # Cache anahtarı ve sentez bu formdan üretilir. Diğer dillerde sadece boşluklar sadeleşir.
+        if language == "tur":
+            return normalize_text(text)
+        return " ".join(text.split())
 
     def _split_sentences(self, text: str) -> List[str]:
         # [FIX] Daha sağlam bölme
@@ -60,104 +113,526 @@ class MmsEngine:
             s = s.strip()
             # [CRITICAL FIX] En az bir HARF veya RAKAM içermeli.
             # Sadece noktalama (., !, ?) veya sembol varsa atla.
-            if s and re.search(r'[a-zA-Z0-9çğıöşüÇĞİÖŞÜ]', s):
+            # (Unicode: Kiril/Arap vb. alfabeler de geçerli)
+            if s and re.search(r'[^\W_]', s):
                 valid_sentences.append(s)
             else:
                 logger.debug(f"Skipping non-speech segment: '{s}'")
         
         return valid_sentences
 
-    def _generate_cache_key(self, text: str, language: str, speed: float) -> str:
+    def _generate_cache_key(self, text: str, language: str, speed: float, kind: Optional[str] = None,
+                            model_id: Optional[str] = None, version: Optional[str] = None) -> str:
+        """
+        version verilmezse kayıtlı slot sürümü kullanılır (model yüklenmez).
+        Alanlar değişirse cache.CACHE_KEY_SCHEMA artırılmalı (eski girdiler açılışta temizlenir).
+        """
         key_data = {
             "text": text,
             "lang": language,
             "speed": speed,
-            "model": settings.MODEL_ID 
+            "model": model_id or settings.MODEL_ID,
+            # Hot reload sonrası yeni sürüm eski sürümün seslerini servis etmesin
+            "version": self.registry.version(model_id or settings.MODEL_ID) if version is None else version,
         }
+        # Şablon segmentleri tam metinlerle çakışmasın diye ayrı bir namespace'te tutulur
+        if kind:
+            key_data["kind"] = kind
         cache_key = hashlib.md5(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
         return f"{cache_key}.{self.cache_file_ext}"
 
-    def synthesize(self, text: str, speed: float = 1.0) -> bytes:
+    @staticmethod
+    def _cache_meta(entry: LoadedModel, lang: str, kind: str) -> Dict[str, str]:
+        """Cache indeksine yazılan girdi bilgisi (model sürümüne göre toplu silme için)."""
+        return {"model": entry.model_id, "version": entry.version, "language": lang, "kind": kind}
+
+    def synthesize(self, text: str, speed: float = 1.0, lookup: bool = True, language: Optional[str] = None) -> bytes:
+        """
+        lookup=False: Çağıran taraf cache'e zaten baktıysa (lookup_cached) tekrar bakılmaz.
+        language: ISO 639-1/639-3 kod, "auto" veya None (varsayılan dil).
+        """
         if not text.strip(): return b""
         
-        cleaned_text = self._clean_text(text)
-        cache_key = self._generate_cache_key(cleaned_text, settings.DEFAULT_LANGUAGE, speed)
+        lang, model_id = self._resolve(text, language)
+        cleaned_text = self._clean_text(text, lang)
+        cache_key = self._generate_cache_key(cleaned_text, lang, speed, model_id=model_id)
 
         # Cache kontrolü
-        cached_audio = tts_cache.load(cache_key)
-        if cached_audio:
-            logger.info(f"Cache HIT for key: {cache_key[:8]}...")
-            return cached_audio
+        if lookup:
+            cached_audio = tts_cache.load(cache_key)
+            if cached_audio:
+                logger.info(f"Cache HIT for key: {cache_key[:8]}...")
+                return cached_audio
             
         logger.info(f"Cache MISS for key: {cache_key[:8]}...")
         
-        with self._lock:
-            try:
-                # [FIX] return_tensors='pt' PyTorch tensörü döndürür.
-                inputs = self.tokenizer(cleaned_text, return_tensors="pt").to(self.device)
-                
-                # [FIX] MMS VITS modeli input_ids'i LongTensor bekler. CPU'da bazen Float gelebilir, garantiye alalım.
-                # Ancak tokenizer zaten LongTensor döner. Sorun muhtemelen stream kısmındaydı.
-                # Yine de burada da kontrol etmekte fayda var.
-                
-                with torch.no_grad():
-                    output = self.model(**inputs).waveform
-                
-                waveform_np = output.cpu().numpy().squeeze()
-                audio_bytes = audio_processor.numpy_to_wav_bytes(waveform_np, self.sampling_rate)
-                
-                tts_cache.save(cache_key, audio_bytes)
-                history_manager.add_entry(
-                    filename=cache_key, text=text, language=settings.DEFAULT_LANGUAGE,
-                    speaker=None, mode="Standard"
-                )
-                
-                if self.device == "cuda": torch.cuda.empty_cache()
-                return audio_bytes
-                
-            except Exception as e:
-                logger.error(f"Synthesis failed for text '{text[:30]}...': {e}", exc_info=True)
-                raise e
+        try:
+            start = time.perf_counter()
+            with self.registry.use(model_id) as entry:
+                waveform_np = self._infer(cleaned_text, entry)
+                with metrics.stage_timer("postprocess"):
+                    waveform_np = self._trim(waveform_np, entry.sampling_rate)
+                    audio_bytes = audio_processor.numpy_to_wav_bytes(waveform_np, entry.sampling_rate)
+                metrics.observe_rtf(time.perf_counter() - start, waveform_np.size / entry.sampling_rate)
+                entry.rtf.observe(len(cleaned_text), waveform_np.size / entry.sampling_rate, time.perf_counter() - start)
+                meta = self._cache_meta(entry, lang, "unary")
+                # Slot ilk kez yükleniyorsa arama anahtarı sürümsüzdü; kayıt gerçek sürümle yapılır
+                cache_key = self._generate_cache_key(cleaned_text, lang, speed, model_id=model_id, version=entry.version)
+            
+            tts_cache.save(cache_key, audio_bytes, meta)
+            history_manager.add_entry(
+                filename=cache_key, text=text, language=lang,
+                speaker=None, mode="Standard"
+            )
+            return audio_bytes
+            
+        except Exception as e:
+            logger.error(f"Synthesis failed for text '{text[:30]}...': {e}", exc_info=True)
+            raise e
+
+    def _tokenize(self, text: str, entry: LoadedModel) -> Tuple[int, ...]:
+        return self._tokenize_many([text], entry)[0]
+
+    def _tokenize_many(self, texts: List[str], entry: LoadedModel) -> List[Tuple[int, ...]]:
+        """Model kilidi dışında; tekrar eden metinler LRU'dan, kalanlar tek tokenizer çağrısıyla."""
+        with metrics.stage_timer("tokenize"):
+            return entry.tokens.encode_many(texts)
+
+    def _infer(self, text: str, entry: Optional[LoadedModel] = None, bulk: bool = False) -> np.ndarray:
+        """
+        Tek bir metin için ham float waveform döner. Tahmini bellek tavanı aşan uzun
+        metinler cümlelere bölünüp paketlenmiş batch'ler halinde sentezlenir.
+        """
+        entry = entry or self.registry.get(settings.MODEL_ID)
+        ids = self._tokenize(text, entry)
+        # [Safety] Input size kontrolü
+        if not ids:
+            raise ValueError(f"Empty token sequence for: '{text}'")
+
+        if not entry.budget.fits(len(ids)):
+            sentences = self._split_sentences(text)
+            if len(sentences) > 1:
+                logger.info(f"Input of {len(ids)} tokens exceeds memory budget, splitting into {len(sentences)} sentences.")
+                return self._join_sentences(self._infer_many(sentences, entry, bulk), entry.sampling_rate)
+            logger.warning(f"Input of {len(ids)} tokens exceeds memory budget and cannot be split further.")
+        return self._forward([ids], entry, bulk)[0]
 
-    def synthesize_stream(self, text: str, speed: float = 1.0) -> Generator[bytes, None, None]:
+    def _trim(self, waveform_np: np.ndarray, sample_rate: int) -> np.ndarray:
+        """MMS çıktısının uçlarındaki dolgu sessizliğini keser (TRIM_SILENCE kapalıysa aynen döner)."""
+        if not settings.TRIM_SILENCE:
+            return waveform_np
+        return audio_processor.trim_silence(
+            waveform_np, sample_rate, settings.TRIM_THRESHOLD_DB, settings.TRIM_FRAME_MS, settings.TRIM_KEEP_MS
+        )
+
+    def _sentence_pause(self, sample_rate: int) -> np.ndarray:
+        return audio_processor.silence(settings.SENTENCE_PAUSE_MS, sample_rate)
+
+    def _join_sentences(self, waveforms: List[np.ndarray], sample_rate: int) -> np.ndarray:
+        """Ayrı sentezlenen cümleleri kırpar ve aralarına SENTENCE_PAUSE_MS sessizlik koyarak birleştirir."""
+        parts = []
+        for waveform_np in waveforms:
+            waveform_np = self._trim(waveform_np, sample_rate)
+            if waveform_np.size == 0:
+                continue
+            if parts:
+                parts.append(self._sentence_pause(sample_rate))
+            parts.append(waveform_np.astype(np.float32))
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+    def _infer_many(self, texts: List[str], entry: LoadedModel, bulk: bool = False) -> List[np.ndarray]:
+        """Metinleri token uzunluğuna göre bellek bütçesi altında batch'lere paketler. Sıra korunur."""
+        token_ids = self._tokenize_many(texts, entry)
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        for empty in (i for i, ids in enumerate(token_ids) if not ids):
+            results[empty] = np.zeros(0, dtype=np.float32)
+
+        valid = [i for i, ids in enumerate(token_ids) if ids]
+        for batch in entry.budget.pack([len(token_ids[i]) for i in valid]):
+            indices = [valid[b] for b in batch]
+            for i, waveform in zip(indices, self._forward([token_ids[i] for i in indices], entry, bulk)):
+                results[i] = waveform
+        return results
+
+    def _forward(self, batch: List[Tuple[int, ...]], entry: LoadedModel, bulk: bool = False) -> List[np.ndarray]:
+        """
+        Padding'li tek forward. Her eleman kendi sequence_lengths'ine göre kırpılır.
+        Tensörler (ve CUDA'da H2D kopyası) kilit alınmadan hazırlanır.
+        bulk=True: Kilit, bekleyen etkileşimli istek kalmayınca alınır.
+        """
+        input_ids, attention_mask = self.batch_builder.build(batch)
+        predicted_bytes, _ = entry.budget.predict(input_ids.size(1), len(batch))
+
+        wait_start = time.perf_counter()
+        with (entry.lock.bulk() if bulk else entry.lock):
+            metrics.observe_stage("queue_wait", time.perf_counter() - wait_start)
+            metrics.observe_batch_size(len(batch))
+            with self.allocator.measure(predicted_bytes):
+                self.batch_builder.wait(input_ids, attention_mask)
+                with metrics.stage_timer("model_forward"), inference_profiler.forward_context(), torch.no_grad():
+                    output = entry.model(input_ids=input_ids, attention_mask=attention_mask)
+                    waveforms = output.waveform.cpu().numpy()
+                    lengths = output.sequence_lengths.cpu().tolist()
+                del output
+
+        return [waveforms[row, :lengths[row]] for row in range(len(batch))]
+
+    def _synthesize_segment(self, text: str, speed: float, lang: str, entry: LoadedModel) -> Tuple[np.ndarray, bool]:
+        """
+        Şablon segmentini sentezler. Segmentler (statik parçalar ve sık kullanılan
+        slot değerleri) kendi cache namespace'lerinde tutulur.
+        Dönüş: (waveform, cache_hit)
+        """
+        cleaned_text = self._clean_text(text, lang)
+        cache_key = self._generate_cache_key(cleaned_text, lang, speed, kind="segment", model_id=entry.model_id,
+                                             version=entry.version)
+
+        cached_audio = tts_cache.load(cache_key)
+        if cached_audio:
+            return audio_processor.wav_bytes_to_numpy(cached_audio), True
+
+        waveform_np = self._trim(self._infer(cleaned_text, entry), entry.sampling_rate)
+        tts_cache.save(
+            cache_key, audio_processor.numpy_to_wav_bytes(waveform_np, entry.sampling_rate),
+            self._cache_meta(entry, lang, "segment")
+        )
+        return audio_processor.process_waveform(waveform_np), False
+
+    def synthesize_template(self, template: str, slots: Dict[str, str], speed: float = 1.0,
+                            language: Optional[str] = None) -> Tuple[bytes, Dict[str, int]]:
+        """
+        "Sayın {isim}, bakiyeniz {tutar} liradır" gibi şablonları sentezler.
+        Statik parçalar bir kez sentezlenip cache'lenir, sadece slot değerleri
+        (onlar da cache'li) yeniden üretilir. Parçalar crossfade ile birleştirilir.
+        Dönüş: (wav_bytes, {"segments": N, "hits": M, "sample_rate": SR, "model": model_id})
+        """
+        segments = render_segments(template, slots)
+        # Dil doldurulmuş metinden belirlenir ({slot} yer tutucuları tespite karışmaz); tüm segmentler aynı modelle üretilir
+        lang, model_id = self._resolve(" ".join(text for _, text, _ in segments), language)
+        
+        waveforms = []
+        hits = 0
+        # Duraklama, crossfade ve WAV başlığı segmentleri üreten modelin örnekleme hızıyla
+        with self.registry.use(model_id) as entry:
+            sr = entry.sampling_rate
+            for _, text, pause_ms in segments:
+                if pause_ms:
+                    waveforms.append(audio_processor.silence(pause_ms, sr))
+                waveform_np, hit = self._synthesize_segment(text, speed, lang, entry)
+                hits += int(hit)
+                waveforms.append(waveform_np)
+
+        logger.info(f"Template synthesized: {hits}/{len(segments)} segments from cache.")
+        
+        combined = audio_processor.concat_with_crossfade(waveforms, sr)
+        audio_bytes = audio_processor.numpy_to_wav_bytes(combined, sr)
+        return audio_bytes, {"segments": len(segments), "hits": hits, "sample_rate": sr, "model": model_id}
+
+    def synthesize_stream(self, text: str, speed: float = 1.0, language: Optional[str] = None) -> Generator[bytes, None, None]:
+        lang, model_id = self._resolve(text, language)
+        cleaned_text = self._clean_text(text, lang)
         # [FIX] Metni temizle (Gereksiz sembolleri at)
         # Örn: "!Merhaba" -> "Merhaba"
-        clean_text = re.sub(r'^[\W_]+', '', text) 
+        clean_text = re.sub(r'^[\W_]+', '', cleaned_text) 
         
         sentences = self._split_sentences(clean_text)
         if not sentences: return
-        
-        for i, sentence in enumerate(sentences):
-            if not sentence.strip(): continue
-            
-            with self._lock:
-                try:
-                    inputs = self.tokenizer(sentence, return_tensors="pt").to(self.device)
-                    # [Safety] Input size kontrolü (Yine de ekleyelim)
-                    if inputs['input_ids'].size(1) == 0:
-                        logger.warning(f"Skipping empty tensor for: '{sentence}'")
-                        continue
 
-                    with torch.no_grad():
-                        output = self.model(**inputs).waveform
-                    
-                    waveform_np = output.cpu().numpy().squeeze()
-                    pcm_bytes = audio_processor.float32_to_pcm16(waveform_np)
-                    
-                    if len(pcm_bytes) > 0:
-                        yield pcm_bytes
-                        if i == 0:
-                           history_manager.add_entry(
-                                filename=f"stream_{hashlib.md5(text.encode()).hexdigest()}.pcm",
-                                text=text, language=settings.DEFAULT_LANGUAGE,
-                                speaker=None, mode="Stream"
-                           )
-                        
+        # Stream boyunca aynı sürüm kullanılır; hot reload bu stream bitene kadar eski sürümü bırakmaz
+        with self.registry.use(model_id) as entry:
+            # Stream sesi parça parça kırpılıp duraklamalarla birleştirildiğinden unary sesinden farklıdır
+            cache_key = self._generate_cache_key(cleaned_text, lang, speed, kind="stream", model_id=model_id,
+                                                 version=entry.version)
+            sr = entry.sampling_rate
+            tracker = entry.rtf
+
+            # (metin, sonrasındaki duraklama ms). İlk cümle uzunsa virgüllerden bölünür: ilk ses erken gelsin
+            units = deque((sentence, settings.SENTENCE_PAUSE_MS) for sentence in sentences)
+            if settings.STREAM_ADAPTIVE and len(sentences[0]) > settings.STREAM_FIRST_SEGMENT_CHARS:
+                self._split_unit(units)
+
+            # Tüm cümleler tek tokenizer çağrısında; sonraki forward'lar LRU'dan okur
+            self._tokenize_many([unit_text for unit_text, _ in units], entry)
+
+            pcm_chunks = []
+            complete = True
+            start = time.perf_counter()
+            # İstemci tarafı oynatma modeli: ilk parça geldiğinde çalmaya başlar, tampon biterse bekler
+            playback_start = None
+            sent_audio_sec = 0.0
+
+            while units:
+                group = [units.popleft()]
+                if settings.STREAM_ADAPTIVE and playback_start is not None:
+                    # Sonraki segmentin sentezi için istemcide kalan tampon kadar süre var
+                    budget_sec = sent_audio_sec - (time.perf_counter() - playback_start) - settings.STREAM_SAFETY_SEC
+                    chars = len(group[0][0])
+                    while (units and len(group) < settings.INFER_MAX_BATCH_SIZE
+                           and tracker.synth_sec(chars + len(units[0][0])) <= budget_sec):
+                        # Hızlı node: tampon yeterliyse birden fazla cümle tek batch forward'da üretilir
+                        chars += len(units[0][0])
+                        group.append(units.popleft())
+                    if len(group) == 1 and tracker.synth_sec(chars) > budget_sec:
+                        # Yavaş node: cümle tampona sığmayacaksa daha küçük parçalara bölünür
+                        units.appendleft(group[0])
+                        self._split_unit(units)
+                        group = [units.popleft()]
+
+                texts = [unit_text for unit_text, _ in group]
+                forward_start = time.perf_counter()
+                try:
+                    waveforms = self._infer_many(texts, entry) if len(texts) > 1 else [self._infer(texts[0], entry)]
                 except Exception as e:
                     # Hata olsa bile stream'i koparma, logla ve devam et
-                    logger.error(f"Stream synthesis error for sentence '{sentence}': {e}", exc_info=False)
+                    logger.error(f"Stream synthesis error for segment '{texts[0][:30]}': {e}", exc_info=False)
+                    complete = False
                     continue
-                finally:
-                    if self.device == "cuda": torch.cuda.empty_cache()
+                produced_sec = sum(w.size for w in waveforms) / sr
+                tracker.observe(sum(len(t) for t in texts), produced_sec, time.perf_counter() - forward_start)
+
+                for n, ((_, pause_ms), waveform_np) in enumerate(zip(group, waveforms)):
+                    with metrics.stage_timer("postprocess"):
+                        # Baştaki sessizlik kırpılınca her parçanın duyulur başlangıcı öne gelir
+                        waveform_np = self._trim(waveform_np, sr)
+                        is_last = not units and n == len(group) - 1
+                        if waveform_np.size and pause_ms and not is_last:
+                            # Duraklama parçanın sonuna eklenir: istemci oynatırken sonraki parça için tampon olur
+                            waveform_np = np.concatenate([waveform_np, audio_processor.silence(pause_ms, sr)])
+                        pcm_bytes = audio_processor.float32_to_pcm16(waveform_np)
+                    if len(pcm_bytes) == 0:
+                        complete = False
+                        continue
+
+                    now = time.perf_counter()
+                    if playback_start is None:
+                        playback_start = now
+                        history_manager.add_entry(
+                            filename=f"stream_{hashlib.md5(text.encode()).hexdigest()}.pcm",
+                            text=text, language=lang,
+                            speaker=None, mode="Stream"
+                        )
+                    else:
+                        gap = (now - playback_start) - sent_audio_sec
+                        if gap > 0:
+                            # Önceki ses bitmeden bu parça hazır olamadı: istemcide sessiz boşluk
+                            metrics.observe_underrun(gap)
+                            playback_start += gap
+                    sent_audio_sec += len(pcm_bytes) / 2 / sr
+
+                    # Lock dışında yield: tüketici yavaş olsa bile model kilitli kalmaz
+                    pcm_chunks.append(pcm_bytes)
+                    yield pcm_bytes
+
+            if pcm_chunks:
+                # PCM16: örnek başına 2 byte
+                audio_sec = sum(len(c) for c in pcm_chunks) / 2 / sr
+                metrics.observe_rtf(time.perf_counter() - start, audio_sec)
+
+            # Tüm cümleler başarıyla üretildiyse sonraki istekler cache'ten servis edilsin
+            if complete and pcm_chunks:
+                tts_cache.save(
+                    cache_key, audio_processor.pcm16_to_wav_bytes(b"".join(pcm_chunks), sr),
+                    self._cache_meta(entry, lang, "stream")
+                )
+
+    def _split_unit(self, units: deque) -> None:
+        """Kuyruğun başındaki cümleyi virgül/noktalı virgül/iki noktadan yan cümlelere böler (yerinde)."""
+        sentence, pause_ms = units.popleft()
+        clauses = [c.strip() for c in re.split(r'(?<=[,;:])\s+', sentence) if re.search(r'[^\W_]', c)]
+        if len(clauses) <= 1:
+            units.appendleft((sentence, pause_ms))
+            return
+        # Yan cümle araları şablonlardaki noktalama duraklamalarını kullanır; son parça cümlenin duraklamasını alır
+        parts = [(c, PAUSE_MARKS.get(c[-1], 0)) for c in clauses[:-1]] + [(clauses[-1], pause_ms)]
+        units.extendleft(reversed(parts))
+
+    def synthesize_batch(self, items: List[Dict[str, Any]]) -> Generator[Dict[str, Any], None, None]:
+        """
+        Toplu sentez (bildirim kampanyaları vb.). Sonuçlar hazır oldukça döner; sıra girişten farklı olabilir.
+        1. Aynı cache anahtarına düşen öğeler tek sefer sentezlenir (cache="DUP")
+        2. Cache'te olanlar hemen döner (cache="HIT")
+        3. Kalanlar model başına token uzunluğuna göre paketlenip bulk öncelikte sentezlenir (cache="MISS")
+        Tekil isteklerin aksine öğe başına history kaydı yazılmaz.
+        """
+        start = time.perf_counter()
+        groups: Dict[str, List[int]] = {}
+        plans: Dict[str, BatchPlan] = {}
+
+        for index, item in enumerate(items):
+            try:
+                lang, model_id = self._resolve(item["text"], item.get("language"))
+                cleaned_text = self._clean_text(item["text"], lang)
+                speed = item.get("speed") or settings.DEFAULT_SPEED
+                cache_key = self._generate_cache_key(cleaned_text, lang, speed, model_id=model_id)
+            except Exception as e:
+                yield self._batch_result(index, item, start, error=str(e))
+                continue
+            groups.setdefault(cache_key, []).append(index)
+            plans[cache_key] = BatchPlan(cleaned_text, model_id, lang, speed)
+
+        def emit(cache_key: str, audio: Optional[bytes], status: str, error: Optional[str] = None):
+            for n, index in enumerate(groups[cache_key]):
+                yield self._batch_result(
+                    index, items[index], start, audio=audio, model_id=plans[cache_key].model_id,
+                    cache=status if n == 0 or error else "DUP", error=error
+                )
+
+        misses: Dict[str, List[str]] = {}
+        for cache_key in groups:
+            cached_audio = tts_cache.load(cache_key)
+            if cached_audio:
+                yield from emit(cache_key, cached_audio, "HIT")
+            else:
+                misses.setdefault(plans[cache_key].model_id, []).append(cache_key)
+
+        for model_id, keys in misses.items():
+            try:
+                entry = self.registry.get(model_id)
+            except Exception as e:
+                for cache_key in keys:
+                    yield from emit(cache_key, None, "MISS", error=f"Model load failed: {e}")
+                continue
+            # Hot reload sırasında bu grup başladığı sürümle biter
+            with entry.lease():
+                token_ids = dict(zip(keys, self._tokenize_many([plans[k].text for k in keys], entry)))
+                for cache_key in [k for k in keys if not token_ids[k]]:
+                    yield from emit(cache_key, None, "MISS", error="Empty token sequence")
+                keys = [k for k in keys if token_ids[k]]
+
+                for batch in entry.budget.pack([len(token_ids[k]) for k in keys]):
+                    batch_keys = [keys[i] for i in batch]
+                    try:
+                        if len(batch_keys) == 1:
+                            # Tek başına bütçeyi aşan öğe cümlelere bölünerek sentezlenir
+                            waveforms = [self._infer(plans[batch_keys[0]].text, entry, bulk=True)]
+                        else:
+                            waveforms = self._forward([token_ids[k] for k in batch_keys], entry, bulk=True)
+                    except Exception as e:
+                        logger.error(f"Batch forward failed for {len(batch_keys)} items: {e}")
+                        for cache_key in batch_keys:
+                            yield from emit(cache_key, None, "MISS", error=str(e))
+                        continue
+
+                    for cache_key, waveform_np in zip(batch_keys, waveforms):
+                        with metrics.stage_timer("postprocess"):
+                            waveform_np = self._trim(waveform_np, entry.sampling_rate)
+                            audio_bytes = audio_processor.numpy_to_wav_bytes(waveform_np, entry.sampling_rate)
+                        plan = plans[cache_key]
+                        # Model bu batch'te ilk kez yüklendiyse anahtar gerçek sürümle yeniden üretilir
+                        save_key = self._generate_cache_key(plan.text, plan.language, plan.speed,
+                                                            model_id=plan.model_id, version=entry.version)
+                        tts_cache.save(save_key, audio_bytes, self._cache_meta(entry, plan.language, "batch"))
+                        yield from emit(cache_key, audio_bytes, "MISS")
+
+        logger.info(f"Batch of {len(items)} items ({len(groups)} unique) finished in {time.perf_counter() - start:.2f}s")
+
+    @staticmethod
+    def _batch_result(index: int, item: Dict[str, Any], start: float, audio: Optional[bytes] = None,
+                      model_id: Optional[str] = None, cache: Optional[str] = None,
+                      error: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "index": index,
+            "id": item.get("id"),
+            "status": "error" if error else "ok",
+            "cache": cache,
+            "model": model_id,
+            "time_ms": round((time.perf_counter() - start) * 1000, 1),
+            "audio": audio,
+            "error": error,
+        }
+
+    def lookup_cached(self, text: str, speed: float = 1.0, language: Optional[str] = None,
+                      kind: Optional[str] = None) -> Optional[str]:
+        """
+        Cache hit durumunda sesin yerel disk yolunu döner (sendfile / chunked okuma için).
+        Byte'lar Python belleğine alınmaz. Model yüklemez.
+        kind="stream": stream çıktısının namespace'i (unary sesiyle karışmaz).
+        """
+        if not text.strip(): return None
+        lang, model_id = self._resolve(text, language)
+        cache_key = self._generate_cache_key(self._clean_text(text, lang), lang, speed, kind=kind, model_id=model_id)
+        return tts_cache.lookup_path(cache_key)
+
+    def iter_cached_pcm(self, path: str, chunk_size: int = None) -> Generator[bytes, None, None]:
+        """Cache'teki WAV dosyasını header'sız PCM olarak sabit boyutlu parçalarla okur."""
+        chunk_size = chunk_size or settings.STREAM_CHUNK_BYTES
+        with open(path, "rb") as f:
+            offset, remaining = audio_processor.wav_data_offset(f)
+            f.seek(offset)
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk: break
+                remaining -= len(chunk)
+                yield chunk
+
+    # --- ASYNC API (gRPC aio servicer ve HTTP endpoint'leri için) ---
+    # Model forward'u bloklayıcıdır; event loop'u tutmamak için inference havuzuna devredilir.
+    # Cache okumaları (lookup, cache'ten stream) varsayılan havuzda kalır.
+
+    async def synthesize_async(self, text: str, speed: float = 1.0, lookup: bool = True,
+                               language: Optional[str] = None) -> bytes:
+        return await _run_in(self.executor, self.synthesize, text, speed, lookup, language)
+
+    async def synthesize_template_async(self, template: str, slots: Dict[str, str], speed: float = 1.0,
+                                        language: Optional[str] = None) -> Tuple[bytes, Dict[str, int]]:
+        return await _run_in(self.executor, self.synthesize_template, template, slots, speed, language)
+
+    async def lookup_cached_async(self, text: str, speed: float = 1.0, language: Optional[str] = None,
+                                  kind: Optional[str] = None) -> Optional[str]:
+        return await asyncio.to_thread(self.lookup_cached, text, speed, language, kind)
+
+    async def synthesize_stream_async(
+        self, text: str, speed: float = 1.0, cached_path: Optional[str] = None, language: Optional[str] = None
+    ) -> AsyncGenerator[bytes, None]:
+        """
+        cached_path verilirse ses cache'ten okunur, aksi halde cümle cümle sentezlenir.
+        Her parça ayrı bir thread çağrısında üretilir; tüketici (client) yavaşsa
+        bir sonraki cümle üretilmez (backpressure).
+        """
+        if cached_path:
+            iterator, executor = self.iter_cached_pcm(cached_path), None
+        else:
+            iterator, executor = self.synthesize_stream(text, speed, language), self.executor
+        start = time.perf_counter()
+        first = True
+        async for chunk in self._iterate_in_thread(iterator, executor):
+            if first:
+                metrics.observe_ttfc(time.perf_counter() - start)
+                first = False
+            yield chunk
+
+    async def synthesize_batch_async(self, items: List[Dict[str, Any]]) -> AsyncGenerator[Dict[str, Any], None]:
+        async for result in self._iterate_in_thread(self.synthesize_batch(items), self.executor):
+            yield result
+
+    @staticmethod
+    async def _iterate_in_thread(iterator: Iterator[Any], executor: Optional[ThreadPoolExecutor] = None) -> AsyncGenerator[Any, None]:
+        """Her next() verilen havuzda (None: varsayılan asyncio havuzu) çalışır."""
+        sentinel = object()
+        pending = None
+        try:
+            while True:
+                # shield: iptal edilsek de thread'deki next() sürer; future'ı finally'de bekleyebilmek için tutulur
+                pending = asyncio.ensure_future(_run_in(executor, next, iterator, sentinel))
+                chunk = await asyncio.shield(pending)
+                pending = None
+                if chunk is sentinel:
+                    break
+                yield chunk
+        finally:
+            if pending is not None:
+                # Worker thread'de çalışan generator kapatılamaz ("generator already executing"); önce bitsin
+                try:
+                    await pending
+                except Exception:
+                    pass
+            # Client koparsa generator'ı kapat (finally blokları çalışsın: lease, kilit)
+            iterator.close()
+
+async def _run_in(executor: Optional[ThreadPoolExecutor], func, *args):
+    """asyncio.to_thread gibi (contextvars taşınır: trace ID, metrik etiketleri) ama verilen havuzda."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(executor, functools.partial(ctx.run, func, *args))
 
-tts_engine = MmsEngine()
\ No newline at end of file
+tts_engine = MmsEngine()
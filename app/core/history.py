@@ -4,8 +4,12 @@ import os
 import uuid
 import time
 import glob
+import logging
 from datetime import datetime
 from typing import List, Dict, Optional
+from app.core.config import settings
+
+logger = logging.getLogger("HISTORY")
 
 class HistoryManager:
     def __init__(self, db_path: str = "/app/history/history.db"):
@@ -98,4 +102,4 @@ class HistoryManager:
         finally:
             conn.close()
 
-history_manager = HistoryManager()
\ No newline at end of file
+history_manager = HistoryManager(os.path.join(settings.HISTORY_DIR, "history.db"))
\ No newline at end of file
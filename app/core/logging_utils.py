@@ -4,6 +4,7 @@ import uvicorn.logging
 from datetime import datetime
 from pythonjsonlogger import jsonlogger
 from app.core.config import settings
+from app.core.tracing import current_trace_id
 
 # Yakalanacak loglar
 LOGGERS = ("uvicorn.asgi", "uvicorn.access", "uvicorn")
@@ -13,6 +14,12 @@ class EndpointFilter(logging.Filter):
         # [FIX] Daha geniş kapsamlı filtreleme
         return record.getMessage().find("GET /health") == -1
         
+class TraceIdFilter(logging.Filter):
+    """Log kayıtlarına aktif isteğin trace_id'sini ekler (engine/cache/API loglarını ilişkilendirmek için)."""
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = current_trace_id() or "-"
+        return True
+
 class CustomJsonFormatter(jsonlogger.JsonFormatter):
     """Production için JSON Formatter"""
     def add_fields(self, log_record, record, message_dict):
@@ -25,6 +32,9 @@ class CustomJsonFormatter(jsonlogger.JsonFormatter):
         else:
             log_record['level'] = record.levelname
         log_record['service'] = "tts-mms-service"
+        trace_id = getattr(record, "trace_id", "-")
+        if trace_id != "-":
+            log_record['trace_id'] = trace_id
         log_record['env'] = settings.ENV
 
 class RustStyleFormatter(logging.Formatter):
@@ -37,8 +47,8 @@ class RustStyleFormatter(logging.Formatter):
     bold_red = "\x1b[31;1m"
     reset = "\x1b[0m"
     
-    # [Zaman] [LEVEL] [Logger] Mesaj
-    FORMAT = "%(asctime)s %(levelname)-8s %(name)s: %(message)s"
+    # [Zaman] [LEVEL] [Logger] [TraceID] Mesaj
+    FORMAT = "%(asctime)s %(levelname)-8s %(name)s [%(trace_id)s]: %(message)s"
 
     FORMATS = {
         logging.DEBUG: grey + FORMAT + reset,
@@ -58,6 +68,7 @@ def setup_logging():
     logging.getLogger().handlers = []
 
     handler = logging.StreamHandler(sys.stdout)
+    handler.addFilter(TraceIdFilter())
 
     if settings.ENV == "development":
         handler.setFormatter(RustStyleFormatter())
@@ -0,0 +1,117 @@
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Tuple
+
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+from app.core.config import settings
+from app.core.tracing import record_span
+
+logger = logging.getLogger("METRICS")
+
+# İsteğin geldiği kanal ve modu. asyncio.to_thread context'i kopyaladığı için
+# engine/cache thread'lerinde de okunabilir.
+_request_labels: ContextVar[Tuple[str, str]] = ContextVar("tts_request_labels", default=("internal", "unary"))
+
+LABELS = ["transport", "mode"]
+
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# queue_wait | tokenize | model_forward | postprocess | cache_io
+STAGE_DURATION = Histogram(
+    "tts_stage_duration_seconds", "Inference pipeline stage durations",
+    ["stage"] + LABELS, buckets=STAGE_BUCKETS
+)
+TIME_TO_FIRST_CHUNK = Histogram(
+    "tts_time_to_first_chunk_seconds", "Time from stream start to first audio chunk",
+    LABELS, buckets=STAGE_BUCKETS
+)
+REAL_TIME_FACTOR = Histogram(
+    "tts_real_time_factor", "Processing time / audio duration for synthesized (non-cached) audio",
+    LABELS, buckets=(0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+)
+BATCH_SIZE = Histogram(
+    "tts_batch_size", "Number of items per model forward",
+    LABELS, buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+CACHE_REQUESTS = Counter(
+    "tts_cache_requests_total", "Cache lookups by tier and result",
+    ["tier", "result"] + LABELS
+)
+MODEL_EVENTS = Counter(
+    "tts_model_events_total", "Model registry events (load | load_failed | evict)",
+    ["event", "model"]
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "tts_model_load_seconds", "Time to load a model into memory",
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+)
+MODELS_RESIDENT = Gauge("tts_models_resident", "Number of models currently loaded")
+MODELS_RESIDENT_BYTES = Gauge("tts_models_resident_bytes", "Approximate weight bytes of loaded models")
+FORWARD_PEAK_MEMORY = Histogram(
+    "tts_forward_peak_memory_bytes", "Device-wide peak allocated GPU memory during a model forward (includes resident weights of all models)",
+    buckets=tuple(2 ** i * 1024 * 1024 for i in range(4, 15))
+)
+ALLOCATOR_PEAK_BYTES = Gauge("tts_allocator_peak_bytes", "Device-wide peak allocated memory during the last forward (CUDA, all models on the device) or process max RSS (CPU)")
+ALLOCATOR_RESERVED_BYTES = Gauge("tts_allocator_reserved_bytes", "CUDA caching allocator reserved bytes")
+ALLOCATOR_FRAGMENTATION = Gauge("tts_allocator_fragmentation_ratio", "(reserved - allocated) / reserved after the last forward")
+ALLOCATOR_EMPTY_CACHE = Counter("tts_allocator_empty_cache_total", "torch.cuda.empty_cache() calls made by the allocator policy")
+STREAM_UNDERRUNS = Counter(
+    "tts_stream_underruns_total", "Stream chunks that became ready after the previously sent audio finished playing",
+    LABELS
+)
+STREAM_UNDERRUN_SECONDS = Histogram(
+    "tts_stream_underrun_seconds", "Playback gap caused by a stream underrun",
+    LABELS, buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+STREAM_RTF_ESTIMATE = Gauge("tts_stream_rtf_estimate", "Running RTF estimate used for stream segment sizing", ["model"])
+TOKEN_CACHE_REQUESTS = Counter("tts_token_cache_requests_total", "Token ID LRU lookups", ["result"])
+
+def set_request_labels(transport: str, mode: str) -> None:
+    """HTTP/gRPC handler'larının başında çağrılır: transport=http|grpc, mode=unary|stream|batch"""
+    _request_labels.set((transport, mode))
+
+def current_labels() -> Tuple[str, str]:
+    return _request_labels.get()
+
+@contextmanager
+def stage_timer(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """Histogram'a yazar ve aktif isteğin izine span olarak ekler."""
+    STAGE_DURATION.labels(stage, *current_labels()).observe(seconds)
+    record_span(stage, seconds)
+
+def observe_ttfc(seconds: float) -> None:
+    TIME_TO_FIRST_CHUNK.labels(*current_labels()).observe(seconds)
+    record_span("first_chunk", seconds)
+
+def observe_rtf(process_sec: float, audio_sec: float) -> None:
+    if audio_sec > 0:
+        REAL_TIME_FACTOR.labels(*current_labels()).observe(process_sec / audio_sec)
+
+def observe_batch_size(size: int) -> None:
+    BATCH_SIZE.labels(*current_labels()).observe(size)
+
+def observe_underrun(gap_sec: float) -> None:
+    STREAM_UNDERRUNS.labels(*current_labels()).inc()
+    STREAM_UNDERRUN_SECONDS.labels(*current_labels()).observe(gap_sec)
+    record_span("underrun", gap_sec)
+
+def record_cache(tier: str, result: str) -> None:
+    CACHE_REQUESTS.labels(tier, result, *current_labels()).inc()
+
+def start_metrics_server() -> None:
+    """Prometheus scrape endpoint'ini ayrı portta (METRICS_PORT) başlatır."""
+    try:
+        start_http_server(settings.METRICS_PORT, addr=settings.HOST)
+        logger.info(f"📈 Metrics server listening on {settings.HOST}:{settings.METRICS_PORT}")
+    except OSError as e:
+        logger.warning(f"Metrics server could not start on port {settings.METRICS_PORT}: {e}")
@@ -0,0 +1,236 @@
+import re
+import logging
+from functools import lru_cache
+
+from app.core.config import settings
+
+logger = logging.getLogger("NORMALIZER")
+
+# --- SAYI SÖZLÜKLERİ ---
+ONES = ["", "bir", "iki", "üç", "dört", "beş", "altı", "yedi", "sekiz", "dokuz"]
+TENS = ["", "on", "yirmi", "otuz", "kırk", "elli", "altmış", "yetmiş", "seksen", "doksan"]
+SCALES = ["", "bin", "milyon", "milyar", "trilyon"]
+
+MONTHS = [
+    "ocak", "şubat", "mart", "nisan", "mayıs", "haziran",
+    "temmuz", "ağustos", "eylül", "ekim", "kasım", "aralık"
+]
+
+CURRENCIES = {
+    "tl": ("lira", "kuruş"), "try": ("lira", "kuruş"), "₺": ("lira", "kuruş"),
+    "lira": ("lira", "kuruş"), "$": ("dolar", "sent"), "usd": ("dolar", "sent"),
+    "dolar": ("dolar", "sent"), "€": ("avro", "sent"), "eur": ("avro", "sent"),
+    "euro": ("avro", "sent"), "avro": ("avro", "sent"),
+}
+
+# Küçük harfe çevrildikten sonra eşleştirilir
+ABBREVIATIONS = {
+    "sn.": "sayın", "dr.": "doktor", "prof.": "profesör", "doç.": "doçent",
+    "av.": "avukat", "vb.": "ve benzeri", "vs.": "vesaire", "örn.": "örneğin",
+    "tel.": "telefon", "no.": "numara", "apt.": "apartman", "cad.": "caddesi",
+    "sok.": "sokak", "mah.": "mahallesi", "bkz.": "bakınız",
+}
+
+# Sayıdan sonra gelince birim kısaltmasıdır: "5 sn. bekleyin" -> "beş saniye bekleyin" ("sn." = "sayın" değil)
+UNIT_ABBREVIATIONS = {"sn": "saniye", "dk": "dakika", "sa": "saat"}
+
+# Sıra sayısı ekinin ünlüsü (büyük ünlü uyumu): birinci, üçüncü, altıncı, dokuzuncu
+ORDINAL_VOWELS = {"a": "ı", "ı": "ı", "e": "i", "i": "i", "o": "u", "u": "u", "ö": "ü", "ü": "ü"}
+
+# Tipografik işaretlerin sade karşılıkları
+PUNCT_MAP = str.maketrans({
+    "“": "", "”": "", "„": "", "«": "", "»": "", "\"": "",
+    "‘": "'", "’": "'", "`": "'",
+    "–": ",", "—": ",", "…": ".",
+})
+
+# Nokta: 3 haneli gruplarda binlik (1.250), 1-2 haneyle ondalık (3.5, 9.99). Virgül ondalıktır.
+NUMBER_RE = r"\d{1,3}(?:\.\d{3})+(?:,\d+)?|(?<![\d.])\d+\.\d{1,2}(?!\.?\d)|\d+(?:,\d+)?"
+# Telefon: "0532 123 45 67", "+90 (532) 123-45-67", "444 0 123". En az 7 hane, 3+ grup.
+PHONE_RE = r"(?<![\w.,])\+?\(?\d{1,4}\)?(?:[ -]\(?\d{1,4}\)?){2,}(?![\w]|[.,]\d)"
+CURRENCY_SYMBOLS = r"tl|try|lira|usd|dolar|eur|euro|avro|₺|\$|€"
+
+def read_digits(digits: str) -> str:
+    """Rakamları tek tek okur. Örn: '0532' -> 'sıfır beş üç iki'"""
+    return " ".join(ONES[int(d)] if d != "0" else "sıfır" for d in digits if d.isdigit())
+
+def number_to_words(n: int) -> str:
+    """Tam sayıyı Türkçe okunuşuna çevirir. Örn: 1250 -> 'bin iki yüz elli'"""
+    if n == 0:
+        return "sıfır"
+    if n < 0:
+        return "eksi " + number_to_words(-n)
+    if n >= 1000 ** len(SCALES):
+        # Trilyonlar ötesinde ölçek adı yok (kart/hesap numarası vb.): rakam rakam
+        return read_digits(str(n))
+
+    words = []
+    scale = 0
+    while n > 0:
+        group = n % 1000
+        if group:
+            hundreds, rest = divmod(group, 100)
+            part = []
+            if hundreds:
+                # "bir yüz" değil "yüz"
+                part.append("yüz" if hundreds == 1 else f"{ONES[hundreds]} yüz")
+            if rest >= 10:
+                part.append(TENS[rest // 10])
+            if rest % 10:
+                part.append(ONES[rest % 10])
+            # "bir bin" değil "bin"
+            if scale == 1 and group == 1:
+                part = []
+            if scale < len(SCALES) and SCALES[scale]:
+                part.append(SCALES[scale])
+            words.insert(0, " ".join(part))
+        n //= 1000
+        scale += 1
+    return " ".join(w for w in words if w)
+
+def ordinal_to_words(n: int) -> str:
+    """Sıra sayısının okunuşu. Örn: 1 -> 'birinci', 24 -> 'yirmi dördüncü'"""
+    words = number_to_words(n)
+    if words.endswith("dört"):
+        # Ünsüz yumuşaması: dört -> dördüncü
+        words = words[:-1] + "d"
+    vowel = ORDINAL_VOWELS[next(ch for ch in reversed(words) if ch in ORDINAL_VOWELS)]
+    if words[-1] in ORDINAL_VOWELS:
+        return f"{words}nc{vowel}"
+    return f"{words}{vowel}nc{vowel}"
+
+def _parse_number(raw: str):
+    """'1.250,50' -> (1250, '50'), '3.5' -> (3, '5'). Nokta binlik (3 haneli gruplar) veya ondalık ayracıdır."""
+    if "," not in raw and re.fullmatch(r"\d+\.\d{1,2}", raw):
+        integer, _, fraction = raw.partition(".")
+        return int(integer), fraction
+    integer, _, fraction = raw.partition(",")
+    return int(integer.replace(".", "")), fraction
+
+def _read_number(raw: str) -> str:
+    if len(raw) > 1 and raw[0] == "0" and raw[1].isdigit():
+        # Baştaki sıfır sayı değil kod olduğunu gösterir (alan kodu, müşteri no): rakam rakam
+        integer, sep, fraction = raw.partition(",")
+        return read_digits(integer) + (f" virgül {read_digits(fraction)}" if sep else "")
+    integer, fraction = _parse_number(raw)
+    text = number_to_words(integer)
+    if fraction:
+        # Baştaki sıfırlar tek tek okunur: 3,05 -> üç virgül sıfır beş
+        leading = len(fraction) - len(fraction.lstrip("0"))
+        tail = fraction.lstrip("0")
+        frac_words = ["sıfır"] * leading + ([number_to_words(int(tail))] if tail else [])
+        text += " virgül " + " ".join(frac_words)
+    return text
+
+def turkish_lower(text: str) -> str:
+    """Python'un lower()'ı 'I' -> 'i' ve 'İ' -> 'i̇' yapar; Türkçe'de doğrusu 'ı' ve 'i'."""
+    return text.replace("I", "ı").replace("İ", "i").lower()
+
+class TurkishTextNormalizer:
+    """
+    Cache anahtarı üretilmeden ve tokenizer'a verilmeden önce metni kanonik
+    hale getirir: "250 TL", "250 tl." ve "iki yüz elli TL" aynı metne dönüşür.
+    """
+
+    def __init__(self):
+        abbr = "|".join(re.escape(a) for a in sorted(ABBREVIATIONS, key=len, reverse=True))
+        self._abbr_re = re.compile(rf"(?<!\w)({abbr})")
+        units = "|".join(UNIT_ABBREVIATIONS)
+        self._unit_abbr_re = re.compile(rf"(\d)\s*({units})\.?(?!\w)")
+        # "1. sırada": sayı + nokta + küçük harfle devam eden kelime sıra sayısıdır (büyük harf: cümle sonu)
+        self._ordinal_re = re.compile(r"(?<![\d.,])([1-9]\d{0,8})\.(?=\s+([^\W\d_]))")
+        self._date_re = re.compile(r"\b(\d{1,2})[./](\d{1,2})[./](\d{4})\b")
+        self._time_re = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)\b")
+        self._currency_after_re = re.compile(rf"({NUMBER_RE})\s*({CURRENCY_SYMBOLS})(?!\w)")
+        self._currency_before_re = re.compile(rf"(₺|\$|€)\s*({NUMBER_RE})")
+        self._percent_re = re.compile(rf"%\s*({NUMBER_RE})")
+        self._number_re = re.compile(NUMBER_RE)
+        self._phone_re = re.compile(PHONE_RE)
+        self._currency_word_re = re.compile(r"\b(tl|try|usd|eur|euro)\b")
+
+    def _canonical_punctuation(self, text: str) -> str:
+        text = text.translate(PUNCT_MAP)
+        text = re.sub(r"\.{2,}", ".", text)
+        # "!!!" -> "!", "?!" -> "?"
+        text = re.sub(r"([!?.])[!?.]+", r"\1", text)
+        return text
+
+    def _expand_ordinals(self, text: str) -> str:
+        # Küçük harfe çevirmeden önce çalışır: sonraki kelimenin büyük harfi cümle sınırını gösterir
+        def repl(m):
+            if not m.group(2).islower():
+                return m.group(0)
+            return ordinal_to_words(int(m.group(1)))
+        return self._ordinal_re.sub(repl, text)
+
+    def _expand_dates(self, text: str) -> str:
+        def repl(m):
+            day, month, year = int(m.group(1)), int(m.group(2)), int(m.group(3))
+            if not (1 <= day <= 31 and 1 <= month <= 12):
+                return m.group(0)
+            return f"{number_to_words(day)} {MONTHS[month - 1]} {number_to_words(year)}"
+        return self._date_re.sub(repl, text)
+
+    def _expand_times(self, text: str) -> str:
+        def repl(m):
+            hour, minute = int(m.group(1)), int(m.group(2))
+            if minute == 0:
+                return number_to_words(hour)
+            if minute < 10:
+                return f"{number_to_words(hour)} sıfır {number_to_words(minute)}"
+            return f"{number_to_words(hour)} {number_to_words(minute)}"
+        return self._time_re.sub(repl, text)
+
+    def _expand_phones(self, text: str) -> str:
+        def repl(m):
+            raw = m.group(0)
+            groups = [g for g in re.split(r"[ ()-]+", raw.lstrip("+")) if g]
+            # ISO tarih (2024-05-12) telefon değildir
+            if sum(len(g) for g in groups) < 7 or re.fullmatch(r"\d{4}-\d{1,2}-\d{1,2}", raw):
+                return raw
+            # Gruplar arası virgül: okurken telefon numarasındaki gibi kısa duraklama
+            spoken = ", ".join(read_digits(g) for g in groups)
+            return f"artı {spoken}" if raw.startswith("+") else spoken
+        return self._phone_re.sub(repl, text)
+
+    def _read_amount(self, raw: str, symbol: str) -> str:
+        unit, sub_unit = CURRENCIES[symbol]
+        integer, fraction = _parse_number(raw)
+        text = f"{number_to_words(integer)} {unit}"
+        if fraction and int(fraction[:2].ljust(2, "0")):
+            text += f" {number_to_words(int(fraction[:2].ljust(2, '0')))} {sub_unit}"
+        return text
+
+    def _expand_currency(self, text: str) -> str:
+        text = self._currency_before_re.sub(lambda m: self._read_amount(m.group(2), m.group(1)), text)
+        text = self._currency_after_re.sub(lambda m: self._read_amount(m.group(1), m.group(2)), text)
+        # "iki yüz elli tl" -> "iki yüz elli lira"
+        return self._currency_word_re.sub(lambda m: CURRENCIES[m.group(1)][0], text)
+
+    def normalize(self, text: str) -> str:
+        text = self._canonical_punctuation(text)
+        text = self._expand_ordinals(text)
+        text = turkish_lower(text)
+        text = self._unit_abbr_re.sub(lambda m: f"{m.group(1)} {UNIT_ABBREVIATIONS[m.group(2)]}", text)
+        text = self._abbr_re.sub(lambda m: ABBREVIATIONS[m.group(1)], text)
+        text = self._expand_dates(text)
+        text = self._expand_times(text)
+        text = self._expand_phones(text)
+        text = self._expand_currency(text)
+        text = self._percent_re.sub(lambda m: f"yüzde {_read_number(m.group(1))}", text)
+        text = self._number_re.sub(lambda m: _read_number(m.group(0)), text)
+
+        # Noktalamadan önceki boşlukları sil, boşlukları tekilleştir
+        text = re.sub(r"\s+([,.!?;:])", r"\1", text)
+        text = re.sub(r"\s+", " ", text).strip()
+        # Cümle sonu nokta prozodiyi değiştirmez; "250 tl." ile "250 tl" aynı anahtarı üretmeli
+        if text.endswith(".") and not text.endswith(".."):
+            text = text[:-1].rstrip()
+        return text
+
+text_normalizer = TurkishTextNormalizer()
+
+@lru_cache(maxsize=settings.NORMALIZER_CACHE_SIZE)
+def normalize_text(text: str) -> str:
+    """Memoize edilmiş normalizasyon. Aynı prompt'lar tekrar tekrar gelir."""
+    return text_normalizer.normalize(text)
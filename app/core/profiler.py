@@ -0,0 +1,180 @@
+import os
+import sys
+import time
+import json
+import uuid
+import pstats
+import cProfile
+import logging
+import zipfile
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Optional, Any
+
+import torch
+
+from app.core.config import settings
+
+logger = logging.getLogger("PROFILER")
+
+# Profil kapalıyken engine'e dönen bağlam: ek maliyet tek bir attribute kontrolü
+_NO_PROFILE = nullcontext()
+
+class ProfilerBusyError(RuntimeError):
+    """Aynı anda yalnızca bir capture çalışabilir."""
+
+class ProfileCapture:
+    def __init__(self, duration_sec: float, max_forwards: int, device: str):
+        self.capture_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        self.out_dir = os.path.join(settings.PROFILE_DIR, self.capture_id)
+        self.started_at = time.time()
+        self.deadline = time.monotonic() + duration_sec
+        self.duration_sec = duration_sec
+        self.max_forwards = max_forwards
+        self.device = device
+        self.forwards = 0
+        self.samples: Counter = Counter()
+        self.python_profile = cProfile.Profile()
+        # Tek cProfile/torch.profiler oturumu aynı anda tek forward'da açık olabilir
+        self.forward_lock = threading.Lock()
+        self.closed = False
+        os.makedirs(self.out_dir, exist_ok=True)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "capture_id": self.capture_id,
+            "started_at": self.started_at,
+            "duration_sec": self.duration_sec,
+            "max_forwards": self.max_forwards,
+            "forwards": self.forwards,
+            "samples": sum(self.samples.values()),
+        }
+
+class InferenceProfiler:
+    """
+    Canlı pod'da inference hot path'ini profil eder:
+      - Her model forward'u için torch.profiler Chrome trace'i (forward_N.json)
+      - Forward'lar boyunca cProfile (python.pstats)
+      - Tüm servis thread'lerinin örneklemeli (sampling) stack profili (samples.folded, flamegraph formatı)
+    Süre dolunca veya max_forwards'a ulaşınca capture kapanır ve zip olarak indirilebilir.
+    """
+
+    def __init__(self):
+        self.active: Optional[ProfileCapture] = None
+        self.last: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def start(self, duration_sec: float, max_forwards: int, device: str) -> Dict[str, Any]:
+        with self._lock:
+            if self.active is not None:
+                raise ProfilerBusyError(f"Capture {self.active.capture_id} is already running")
+            capture = ProfileCapture(duration_sec, max_forwards, device)
+            self.active = capture
+
+        threading.Thread(target=self._sample_loop, args=(capture,), name="profiler-sampler", daemon=True).start()
+        logger.info(f"🔬 Profiling started: {capture.capture_id} ({duration_sec}s / {max_forwards} forwards)")
+        return capture.summary()
+
+    def status(self) -> Dict[str, Any]:
+        capture = self.active
+        return {"active": capture.summary() if capture else None, "last": self.last}
+
+    def result_path(self, capture_id: str) -> Optional[str]:
+        path = os.path.join(settings.PROFILE_DIR, f"{os.path.basename(capture_id)}.zip")
+        return path if os.path.exists(path) else None
+
+    def forward_context(self):
+        """Engine model forward'unu bununla sarar. Capture yoksa no-op."""
+        # Sampler thread'i active'i her an None yapabilir; tek okuma
+        capture = self.active
+        if capture is None or capture.forwards >= capture.max_forwards:
+            return _NO_PROFILE
+        return self._profile_forward(capture)
+
+    @contextmanager
+    def _profile_forward(self, capture: ProfileCapture):
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if capture.device == "cuda":
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+
+        # Farklı modellerin forward'ları paralel çalışabilir; profil oturumları iç içe açılamaz.
+        # Başka bir forward profilleniyorsa bu forward beklemeden profilsiz çalışır.
+        if not capture.forward_lock.acquire(blocking=False):
+            yield
+            return
+        try:
+            if capture.closed or capture.forwards >= capture.max_forwards:
+                yield
+                return
+            index = capture.forwards
+            capture.forwards += 1
+
+            with torch.profiler.profile(activities=activities, record_shapes=True) as prof:
+                capture.python_profile.enable()
+                try:
+                    yield
+                finally:
+                    capture.python_profile.disable()
+
+            try:
+                prof.export_chrome_trace(os.path.join(capture.out_dir, f"forward_{index}.json"))
+            except Exception as e:
+                logger.warning(f"Chrome trace export failed: {e}")
+        finally:
+            capture.forward_lock.release()
+
+        if capture.forwards >= capture.max_forwards:
+            # Dosya yazımı sampler thread'inde yapılır; istek yolu beklemez
+            capture.deadline = 0
+
+    def _sample_loop(self, capture: ProfileCapture) -> None:
+        own_id = threading.get_ident()
+        names = {}
+        while self.active is capture and time.monotonic() < capture.deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                thread_name = names.get(thread_id, str(thread_id))
+                capture.samples[";".join([thread_name] + stack[::-1])] += 1
+            time.sleep(settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+        self._finish(capture)
+
+    def _finish(self, capture: ProfileCapture) -> None:
+        with self._lock:
+            if self.active is not capture:
+                return
+            self.active = None
+        # Süren profilli forward bitsin; sonrakiler kapalı capture'ı profillemez
+        with capture.forward_lock:
+            capture.closed = True
+
+        try:
+            with open(os.path.join(capture.out_dir, "samples.folded"), "w") as f:
+                for stack, count in capture.samples.most_common():
+                    f.write(f"{stack} {count}\n")
+            if capture.forwards:
+                pstats.Stats(capture.python_profile).dump_stats(os.path.join(capture.out_dir, "python.pstats"))
+            summary = capture.summary()
+            summary["finished_at"] = time.time()
+            with open(os.path.join(capture.out_dir, "summary.json"), "w") as f:
+                json.dump(summary, f, indent=2)
+
+            zip_path = f"{capture.out_dir}.zip"
+            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+                for name in sorted(os.listdir(capture.out_dir)):
+                    zf.write(os.path.join(capture.out_dir, name), arcname=name)
+            summary["download"] = f"/api/admin/profile/{capture.capture_id}/download"
+            self.last = summary
+            logger.info(f"🔬 Profiling finished: {capture.capture_id} ({capture.forwards} forwards)")
+        except Exception as e:
+            logger.error(f"Failed to write profile capture {capture.capture_id}: {e}", exc_info=True)
+            self.last = {"capture_id": capture.capture_id, "error": str(e)}
+
+inference_profiler = InferenceProfiler()
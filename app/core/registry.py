@@ -0,0 +1,463 @@
+import gc
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any
+
+import torch
+from transformers import VitsModel, AutoTokenizer
+
+from app.core.config import settings
+from app.core import metrics
+from app.core.budget import InferenceBudget, RtfTracker
+from app.core.tokenization import TokenCache
+from app.core.cache import tts_cache
+
+logger = logging.getLogger("MODEL-REGISTRY")
+
+# langid (ISO 639-1) -> MMS (ISO 639-3)
+ISO_639_1_TO_3 = {
+    "tr": "tur", "en": "eng", "de": "deu", "fr": "fra", "es": "spa", "it": "ita",
+    "pt": "por", "nl": "nld", "ru": "rus", "ar": "ara", "fa": "fas", "az": "azj-script_latin",
+    "uk": "ukr", "pl": "pol", "ro": "ron", "el": "ell", "bg": "bul", "hu": "hun",
+    "sv": "swe", "ka": "kat", "hy": "hye", "ku": "kmr-script_latin",
+}
+
+# MMS yuva kodu: ISO 639-3, bazı dillerde yazı sistemi ekiyle ("azj-script_latin")
+MMS_LANGUAGE_RE = re.compile(r"[a-z]{3}(?:-script_[a-z]+)?")
+
+class UnsupportedLanguageError(ValueError):
+    """İstenen dil izin listesinde değil veya çözümlenemedi."""
+
+class PriorityLock:
+    """
+    Model forward kilidi. Etkileşimli (HTTP/gRPC tekil) istekler bekliyorsa bulk işler
+    (batch API) kilidi alamaz; bulk batch'ler INFER_MAX_BATCH_SEC ile sınırlı olduğundan
+    etkileşimli bir istek en fazla bir bulk batch bekler.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._held = False
+        self._interactive_waiting = 0
+
+    def acquire(self, bulk: bool = False) -> None:
+        with self._cond:
+            if not bulk:
+                self._interactive_waiting += 1
+            try:
+                while self._held or (bulk and self._interactive_waiting):
+                    self._cond.wait()
+            finally:
+                if not bulk:
+                    self._interactive_waiting -= 1
+            self._held = True
+
+    def release(self) -> None:
+        with self._cond:
+            self._held = False
+            self._cond.notify_all()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    @contextmanager
+    def bulk(self):
+        self.acquire(bulk=True)
+        try:
+            yield self
+        finally:
+            self.release()
+
+class ReloadInProgressError(RuntimeError):
+    """Aynı model için zaten bir hot reload sürüyor."""
+
+def model_version(model_id: str, model) -> str:
+    """
+    Yüklenen ağırlıkların sürümü: Hub'dan geldiyse commit hash'i, yerel dizinse
+    ağırlık dosyalarının ad/boyut/mtime özeti. Cache girdileri bu sürümle etiketlenir.
+    """
+    commit = getattr(model.config, "_commit_hash", None)
+    if commit:
+        return commit[:12]
+    if os.path.isdir(model_id):
+        digest = hashlib.md5()
+        for name in sorted(os.listdir(model_id)):
+            if name.endswith((".safetensors", ".bin", ".json")):
+                st = os.stat(os.path.join(model_id, name))
+                digest.update(f"{name}:{st.st_size}:{st.st_mtime_ns}".encode())
+        return digest.hexdigest()[:12]
+    return "unknown"
+
+class LoadedModel:
+    """
+    Bellekte yüklü bir MMS modeli. Her modelin kendi kilidi vardır; farklı diller birbirini beklemez.
+    model_id registry'deki yuvadır (cache anahtarı ve dil eşlemesi), source ağırlıkların
+    gerçekte yüklendiği Hub ID'si veya dizindir; hot reload ile yuvanın kaynağı değişebilir.
+    """
+
+    def __init__(self, model_id: str, model, tokenizer, device: str, source: Optional[str] = None):
+        self.model_id = model_id
+        self.source = source or model_id
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.version = model_version(self.source, model)
+        self.sampling_rate = getattr(model.config, "sampling_rate", settings.DEFAULT_SAMPLE_RATE)
+        self.lock = PriorityLock()
+        self.budget = InferenceBudget(device)
+        self.rtf = RtfTracker(model_id)
+        self.tokens = TokenCache(tokenizer)
+        self.loaded_at = time.time()
+        self.last_used = time.time()
+        self.size_bytes = sum(t.numel() * t.element_size() for t in list(model.parameters()) + list(model.buffers()))
+        # Bu modeli kullanan istek sayısı (stream'ler dahil); hot reload'da eski sürüm bununla boşaltılır
+        self._active = 0
+        self._idle = threading.Condition()
+
+    @contextmanager
+    def lease(self):
+        with self._idle:
+            self._active += 1
+        self.last_used = time.time()
+        try:
+            yield self
+        finally:
+            with self._idle:
+                self._active -= 1
+                if not self._active:
+                    self._idle.notify_all()
+
+    def drain(self, timeout: float) -> bool:
+        """Devam eden tüm istekler bitene kadar bekler. Zaman aşımında False."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._active == 0, timeout)
+
+    def warmup(self, text: str) -> float:
+        """Isınma forward'ı (lazy init, allocator, cuDNN seçimi). Ölçülen RTF tracker'ı besler."""
+        ids = self.tokens.encode(text) or tuple(range(1, 33))
+        start = time.perf_counter()
+        with torch.no_grad():
+            output = self.model(input_ids=torch.tensor([ids], device=self.device))
+            audio_sec = output.waveform.shape[-1] / self.sampling_rate
+        elapsed = time.perf_counter() - start
+        self.rtf.observe(len(text), audio_sec, elapsed)
+        return elapsed
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "model_id": self.model_id,
+            "source": self.source,
+            "version": self.version,
+            "active_requests": self._active,
+            "size_mb": round(self.size_bytes / 1024 / 1024, 1),
+            "sampling_rate": self.sampling_rate,
+            "rtf_estimate": round(self.rtf.rtf, 4),
+            "token_cache_entries": len(self.tokens),
+            "budget": {
+                "calibrated": self.budget.calibrated,
+                "ceiling_mb": round(self.budget.ceiling_bytes / 1024 / 1024),
+                "bytes_per_token": round(self.budget.mem_coef[1]) if self.budget.calibrated else None,
+                "ms_per_token": round(self.budget.time_coef[1] * 1000, 3) if self.budget.calibrated else None,
+            },
+            "loaded_at": self.loaded_at,
+            "last_used": self.last_used,
+        }
+
+class ModelRegistry:
+    """
+    Dil/model ID'sine göre MMS modellerini ilk kullanımda yükler ve LRU ile sınırlı sayıda
+    (ve bellek bütçesinde) tutar. Varsayılan model (settings.MODEL_ID) asla tahliye edilmez.
+    """
+
+    def __init__(self, device: str):
+        self.device = device
+        self._models: "OrderedDict[str, LoadedModel]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Event] = {}
+        # Hot reload ile değişen yuva kaynakları (tahliye sonrası tekrar yüklemede de kullanılır)
+        self._sources: Dict[str, "tuple[str, Optional[str]]"] = {}
+        self._versions: Dict[str, str] = {}
+        # Her hot reload geçişinde artar; tembel yükleme sürerken gelen reload'u fark etmek için
+        self._generations: Dict[str, int] = {}
+        # Yüklenemeyen dil modelleri -> hata zamanı (MODEL_LOAD_RETRY_SEC boyunca Hub'a tekrar gidilmez)
+        self._failed: Dict[str, float] = {}
+        self.reloads: Dict[str, Dict[str, Any]] = {}
+        # langid'in modül geneli tanımlayıcısı (set_languages) thread-safe değil; izinli dillerle
+        # sınırlanmış ayrı bir tanımlayıcı bir kez kurulur. Kurulum ~3 sn: tespit kapalıysa ilk "auto"da.
+        self._identifier = None
+        self._identifier_lock = threading.Lock()
+        if settings.LANGUAGE_AUTO_DETECT:
+            self._language_identifier()
+
+    # --- DİL ÇÖZÜMLEME ---
+
+    def normalize_language(self, language: Optional[str]) -> str:
+        if not language:
+            return settings.DEFAULT_LANGUAGE
+        language = language.strip().lower()
+        if MMS_LANGUAGE_RE.fullmatch(language):
+            return language
+        # BCP-47 etiketi ana alt etikete indirgenir: "tr-TR" -> "tr", "en_US" -> "en"
+        primary = re.split(r"[-_]", language, maxsplit=1)[0]
+        if primary in ISO_639_1_TO_3:
+            return ISO_639_1_TO_3[primary]
+        if re.fullmatch(r"[a-z]{3}", primary):
+            return primary
+        raise UnsupportedLanguageError(f"Unknown language code '{language}'")
+
+    def _language_identifier(self):
+        with self._identifier_lock:
+            if self._identifier is None:
+                from langid.langid import LanguageIdentifier, model
+                identifier = LanguageIdentifier.from_modelstring(model, norm_probs=False)
+                allowed = [k for k, v in ISO_639_1_TO_3.items() if not settings.SUPPORTED_LANGUAGES or v in settings.SUPPORTED_LANGUAGES]
+                if allowed:
+                    identifier.set_languages(allowed)
+                self._identifier = identifier
+            return self._identifier
+
+    def detect_language(self, text: str) -> str:
+        code, _ = self._language_identifier().classify(text)
+        return ISO_639_1_TO_3.get(code, settings.DEFAULT_LANGUAGE)
+
+    def resolve(self, language: Optional[str], text: str = "") -> "tuple[str, str]":
+        """(dil, model_id) döner. language='auto' veya LANGUAGE_AUTO_DETECT açıksa metinden tespit edilir."""
+        if language == "auto" or (settings.LANGUAGE_AUTO_DETECT and not language and text):
+            lang = self.detect_language(text)
+        else:
+            lang = self.normalize_language(language)
+
+        if lang == settings.DEFAULT_LANGUAGE:
+            return lang, settings.MODEL_ID
+        if settings.SUPPORTED_LANGUAGES and lang not in settings.SUPPORTED_LANGUAGES:
+            raise UnsupportedLanguageError(f"Language '{lang}' is not enabled on this node")
+        model_id = settings.MODEL_ID_TEMPLATE.format(lang=lang)
+        self._check_failed(model_id)
+        return lang, model_id
+
+    def _is_language_model(self, model_id: str) -> bool:
+        """Dil şablonundan türetilen yuva (varsayılan model ve hot reload ile yönetilen yuvalar hariç)."""
+        return model_id != settings.MODEL_ID and model_id not in self._sources
+
+    def _check_failed(self, model_id: str) -> None:
+        failed_at = self._failed.get(model_id)
+        if failed_at is not None and time.time() - failed_at < settings.MODEL_LOAD_RETRY_SEC:
+            raise UnsupportedLanguageError(f"Model {model_id} is not available (load failed, retry after cooldown)")
+
+    # --- YÜKLEME / TAHLİYE ---
+
+    @contextmanager
+    def use(self, model_id: str):
+        """İstek boyunca modeli kiralar: hot reload eski sürümü bu kiralar bitince serbest bırakır."""
+        entry = self.get(model_id)
+        with entry.lease():
+            yield entry
+
+    def peek(self, model_id: str) -> Optional[LoadedModel]:
+        """Yüklüyse modeli döner; yüklemez ve LRU sırasını değiştirmez."""
+        with self._lock:
+            return self._models.get(model_id)
+
+    def version(self, model_id: str) -> str:
+        """
+        Yuvanın güncel ağırlık sürümü (cache anahtarı için). Asla model yüklemez: yüklü değilse
+        cache indeksinde saklanan son sürüm, hiç görülmemişse "" döner (o zaman zaten cache'te girdi yoktur).
+        """
+        version = self._versions.get(model_id)
+        if version is None:
+            version = tts_cache.known_version(model_id)
+            if version is None:
+                return ""
+            self._versions.setdefault(model_id, version)
+        return version
+
+    def get(self, model_id: str) -> LoadedModel:
+        while True:
+            with self._lock:
+                entry = self._models.get(model_id)
+                if entry is not None:
+                    self._models.move_to_end(model_id)
+                    entry.last_used = time.time()
+                    return entry
+                if self._is_language_model(model_id):
+                    # Aynı yüklemeyi bekleyenler hata sonrası tekrar denemesin
+                    self._check_failed(model_id)
+                event = self._loading.get(model_id)
+                if event is None:
+                    # Bu thread yükleyecek; aynı model için gelen diğer istekler bekler
+                    event = threading.Event()
+                    self._loading[model_id] = event
+                    generation = self._generations.get(model_id, 0)
+                    source, revision = self._sources.get(model_id, (model_id, None))
+                    break
+            event.wait()
+
+        try:
+            try:
+                entry = self._load(model_id, source, revision)
+            except Exception as e:
+                if not self._is_language_model(model_id):
+                    raise
+                self._failed[model_id] = time.time()
+                # Hub'da olmayan dil modeli istemci hatasıdır (422), 500 değil
+                raise UnsupportedLanguageError(f"Model {model_id} could not be loaded: {e}") from e
+            self._failed.pop(model_id, None)
+            with self._lock:
+                stale = self._generations.get(model_id, 0) != generation
+                if not stale:
+                    self._models[model_id] = entry
+                    self._versions[model_id] = entry.version
+                    self._evict_locked()
+                    self._update_gauges_locked()
+            if not stale:
+                self._invalidate_stale(entry)
+                return entry
+        finally:
+            with self._lock:
+                self._loading.pop(model_id, None)
+            event.set()
+        # Yükleme sürerken hot reload yuvayı değiştirdi; eski kaynaktan yüklenen kopya kurulmaz
+        logger.info(f"Discarding lazily loaded {model_id}: slot was hot-reloaded meanwhile")
+        del entry
+        return self.get(model_id)
+
+    def _load(self, model_id: str, source: Optional[str] = None, revision: Optional[str] = None) -> LoadedModel:
+        source = source or model_id
+        logger.info(f"📦 Loading model {source}{f'@{revision}' if revision else ''} on {self.device}...")
+        start = time.perf_counter()
+        try:
+            tokenizer = AutoTokenizer.from_pretrained(source, revision=revision)
+            model = VitsModel.from_pretrained(source, revision=revision).to(self.device)
+            model.eval()
+        except Exception as e:
+            metrics.MODEL_EVENTS.labels("load_failed", model_id).inc()
+            logger.error(f"Model load failed for {source}: {e}")
+            raise
+        entry = LoadedModel(model_id, model, tokenizer, self.device, source=source)
+        if settings.BUDGET_CALIBRATE:
+            entry.budget.calibrate(model)
+        elapsed = time.perf_counter() - start
+        metrics.MODEL_EVENTS.labels("load", model_id).inc()
+        metrics.MODEL_LOAD_SECONDS.observe(elapsed)
+        logger.info(f"✅ Model loaded: {model_id}@{entry.version} | {entry.size_bytes / 1024 / 1024:.1f} MB | {elapsed:.2f}s")
+        return entry
+
+    @staticmethod
+    def _invalidate_stale(entry: LoadedModel) -> None:
+        tts_cache.remember_version(entry.model_id, entry.version)
+        # Önceki sürümün cache girdileri artık üretilmeyecek; silme arka planda yapılır
+        threading.Thread(
+            target=tts_cache.invalidate_stale_versions, args=(entry.model_id, entry.version),
+            name="cache-invalidate", daemon=True
+        ).start()
+
+    # --- HOT RELOAD ---
+
+    def reload(self, model_id: str, source: Optional[str] = None, revision: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Yuvaya yeni sürümü sıfır kesintiyle alır: yeni model eski sürüm servis vermeye devam
+        ederken yüklenir ve ısıtılır, yuva tek adımda yeni sürüme çevrilir (yeni istekler ve
+        cache anahtarları yeni sürümü kullanır), eski sürümün devam eden istekleri (stream'ler
+        dahil) bitince belleği serbest bırakılır. Bloklayan çağrıdır.
+        """
+        self.start_reload(model_id, source, revision)
+        return self.run_reload(model_id, source, revision)
+
+    def start_reload(self, model_id: str, source: Optional[str] = None, revision: Optional[str] = None) -> Dict[str, Any]:
+        """Reload kaydını açar (hızlı). Aynı yuvada süren bir reload varsa ReloadInProgressError."""
+        with self._lock:
+            status = self.reloads.get(model_id)
+            if status and status["state"] not in ("done", "failed"):
+                raise ReloadInProgressError(f"Reload already in progress for {model_id}")
+            status = {
+                "model_id": model_id, "source": source or self._sources.get(model_id, (model_id, None))[0],
+                "revision": revision,
+                "state": "loading", "previous_version": self._versions.get(model_id),
+                "version": None, "started_at": time.time(), "finished_at": None, "error": None,
+            }
+            self.reloads[model_id] = status
+            return dict(status)
+
+    def run_reload(self, model_id: str, source: Optional[str] = None, revision: Optional[str] = None) -> Dict[str, Any]:
+        """start_reload ile açılmış reload'u yürütür: yükle, ısıt, geçiş yap, boşalt."""
+        status = self.reloads[model_id]
+        start = time.perf_counter()
+        # Kaynak verilmezse yuvanın mevcut kaynağı yeniden yüklenir (önceki reload'un kaynağı korunur)
+        source = source or status["source"]
+        try:
+            entry = self._load(model_id, source, revision)
+            status["state"] = "warming"
+            warmup_sec = entry.warmup(settings.MODEL_WARMUP_TEXT)
+            status["version"] = entry.version
+            status["warmup_ms"] = round(warmup_sec * 1000, 1)
+        except Exception as e:
+            status.update(state="failed", error=str(e), finished_at=time.time())
+            metrics.MODEL_EVENTS.labels("reload_failed", model_id).inc()
+            logger.error(f"🔥 Hot reload failed for {model_id}, keeping current version: {e}")
+            return dict(status)
+
+        with self._lock:
+            # Tek adımda geçiş: bundan sonra get() yeni sürümü döner
+            old = self._models.get(model_id)
+            self._models[model_id] = entry
+            self._models.move_to_end(model_id)
+            self._sources[model_id] = (entry.source, revision)
+            self._versions[model_id] = entry.version
+            self._generations[model_id] = self._generations.get(model_id, 0) + 1
+            self._evict_locked()
+            self._update_gauges_locked()
+        metrics.MODEL_EVENTS.labels("reload", model_id).inc()
+        logger.info(f"🔁 Model swapped: {model_id} {status['previous_version']} -> {entry.version}")
+
+        if old is not None and old is not entry:
+            status["state"] = "draining"
+            drained = old.drain(settings.MODEL_DRAIN_TIMEOUT_SEC)
+            status["drained"] = drained
+            if not drained:
+                logger.warning(f"Old version of {model_id} still has {old._active} active requests after drain timeout; memory is freed when they finish")
+            del old
+            gc.collect()
+            if self.device == "cuda":
+                torch.cuda.empty_cache()
+
+        self._invalidate_stale(entry)
+        status.update(state="done", finished_at=time.time(), total_ms=round((time.perf_counter() - start) * 1000, 1))
+        return dict(status)
+
+    def _evict_locked(self) -> None:
+        budget = settings.MODEL_MEMORY_BUDGET_MB * 1024 * 1024
+        evicted = False
+        while True:
+            total = sum(m.size_bytes for m in self._models.values())
+            over_count = len(self._models) > max(1, settings.MODEL_MAX_LOADED)
+            over_budget = budget > 0 and total > budget
+            if not (over_count or over_budget):
+                break
+            victim = next((mid for mid in self._models if mid != settings.MODEL_ID), None)
+            if victim is None:
+                break
+            # Devam eden forward'lar kendi referanslarını tuttuğu için güvenle biter; sonra GC serbest bırakır
+            entry = self._models.pop(victim)
+            metrics.MODEL_EVENTS.labels("evict", victim).inc()
+            logger.info(f"♻️ Evicted model {victim} (idle {time.time() - entry.last_used:.0f}s, {entry.size_bytes / 1024 / 1024:.1f} MB)")
+            evicted = True
+        if evicted and self.device == "cuda":
+            torch.cuda.empty_cache()
+
+    def _update_gauges_locked(self) -> None:
+        metrics.MODELS_RESIDENT.set(len(self._models))
+        metrics.MODELS_RESIDENT_BYTES.set(sum(m.size_bytes for m in self._models.values()))
+
+    def loaded(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [m.info() for m in reversed(self._models.values())]
@@ -0,0 +1,69 @@
+import re
+from typing import Dict, List, Tuple
+
+# "{isim}" biçimindeki slot'ları yakalar
+SLOT_PATTERN = re.compile(r"\{(\w+)\}")
+
+# Segment başındaki noktalama -> segmentler arası duraklama (ms)
+PAUSE_MARKS = {",": 150, ";": 200, ":": 200, ".": 300, "!": 300, "?": 300}
+
+STATIC = "static"
+SLOT = "slot"
+
+class TemplateError(ValueError):
+    """Şablon veya slot değerleri geçersiz olduğunda fırlatılır."""
+
+def parse_template(template: str) -> List[Tuple[str, str]]:
+    """
+    Şablonu (tür, değer) parçalarına ayırır.
+    Örn: "Sayın {isim}, bakiye" -> [("static", "Sayın "), ("slot", "isim"), ("static", ", bakiye")]
+    """
+    parts = []
+    cursor = 0
+    for match in SLOT_PATTERN.finditer(template):
+        if match.start() > cursor:
+            parts.append((STATIC, template[cursor:match.start()]))
+        parts.append((SLOT, match.group(1)))
+        cursor = match.end()
+    if cursor < len(template):
+        parts.append((STATIC, template[cursor:]))
+    return parts
+
+def render_text(template: str, slots: Dict[str, str]) -> str:
+    """Şablonun düz metin halini döner (loglama ve metrikler için)."""
+    return SLOT_PATTERN.sub(lambda m: str(slots.get(m.group(1), "")), template)
+
+def render_segments(template: str, slots: Dict[str, str]) -> List[Tuple[str, str, int]]:
+    """
+    Şablonu slot değerleriyle doldurup sentezlenecek segmentleri döner.
+    Her eleman: (tür, metin, öncesine eklenecek duraklama ms).
+    Sadece noktalama/boşluk içeren parçalar sentezlenmez, duraklamaya çevrilir.
+    """
+    segments = []
+    pending_pause = 0
+    for kind, value in parse_template(template):
+        if kind == SLOT:
+            if value not in slots:
+                raise TemplateError(f"Missing value for slot '{value}'")
+            text = str(slots[value])
+        else:
+            text = value
+
+        text = text.strip()
+        # Baştaki noktalamayı duraklamaya çevir
+        lead = re.match(r"^[\W_]+", text)
+        if lead:
+            for ch in lead.group(0):
+                pending_pause = max(pending_pause, PAUSE_MARKS.get(ch, 0))
+            text = text[lead.end():].strip()
+
+        # Herhangi bir alfabedeki harf/rakam (engine._split_sentences ile aynı ölçüt)
+        if not re.search(r"[^\W_]", text):
+            continue
+
+        segments.append((kind, text, pending_pause))
+        pending_pause = 0
+
+    if not segments:
+        raise TemplateError("Template renders to empty text")
+    return segments
@@ -0,0 +1,103 @@
+import threading
+import logging
+from collections import OrderedDict
+from typing import List, Sequence, Tuple
+
+import numpy as np
+import torch
+
+from app.core.config import settings
+from app.core import metrics
+
+logger = logging.getLogger("TOKENIZER")
+
+class TokenCache:
+    """
+    Model başına token ID önbelleği (LRU). Sabit anonslar, şablon segmentleri ve tekrar eden
+    cümleler tokenizer'a tekrar gitmez. Cache miss'ler tek bir tokenizer çağrısında toplanır.
+    """
+
+    def __init__(self, tokenizer, max_size: int = None):
+        self.tokenizer = tokenizer
+        self.max_size = max_size if max_size is not None else settings.TOKEN_CACHE_SIZE
+        self._entries: "OrderedDict[str, Tuple[int, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encode(self, text: str) -> Tuple[int, ...]:
+        return self.encode_many([text])[0]
+
+    def encode_many(self, texts: Sequence[str]) -> List[Tuple[int, ...]]:
+        results: List[Tuple[int, ...]] = [None] * len(texts)
+        missing: "OrderedDict[str, List[int]]" = OrderedDict()
+        with self._lock:
+            for i, text in enumerate(texts):
+                ids = self._entries.get(text)
+                if ids is None:
+                    missing.setdefault(text, []).append(i)
+                else:
+                    self._entries.move_to_end(text)
+                    results[i] = ids
+        # Aynı çağrıdaki tekrarlar da tokenizer'a bir kez gider
+        hits = len(texts) - len(missing)
+        if hits:
+            metrics.TOKEN_CACHE_REQUESTS.labels("hit").inc(hits)
+        if not missing:
+            return results
+
+        metrics.TOKEN_CACHE_REQUESTS.labels("miss").inc(len(missing))
+        encoded = self.tokenizer(list(missing))["input_ids"]
+        with self._lock:
+            for (text, indices), ids in zip(missing.items(), encoded):
+                ids = tuple(ids)
+                for i in indices:
+                    results[i] = ids
+                if self.max_size > 0:
+                    self._entries[text] = ids
+                    self._entries.move_to_end(text)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return results
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class BatchBuilder:
+    """
+    Padding'li input_ids/attention_mask tensörlerini kilit dışında hazırlar.
+    CUDA'da tensörler pinned memory'de kurulur ve ayrı bir copy stream'inde non_blocking
+    kopyalanır; böylece bir isteğin H2D kopyası, kilidi tutan diğer isteğin forward'u ile örtüşür.
+    Kilidi aldıktan sonra wait() çağrılarak compute stream'i kopyayı bekler.
+    """
+
+    def __init__(self, device: str):
+        self.device = device
+        self._copy_stream = torch.cuda.Stream() if device == "cuda" and torch.cuda.is_available() else None
+
+    def build(self, batch: Sequence[Sequence[int]]) -> Tuple[torch.Tensor, torch.Tensor]:
+        max_len = max(len(ids) for ids in batch)
+        # Padding pozisyonları attention_mask ile maskelenir; 0 her vocab'da geçerli bir ID'dir
+        input_ids = np.zeros((len(batch), max_len), dtype=np.int64)
+        attention_mask = np.zeros((len(batch), max_len), dtype=np.int64)
+        for row, ids in enumerate(batch):
+            input_ids[row, :len(ids)] = ids
+            attention_mask[row, :len(ids)] = 1
+
+        input_ids = torch.from_numpy(input_ids)
+        attention_mask = torch.from_numpy(attention_mask)
+        if self._copy_stream is None:
+            return input_ids.to(self.device), attention_mask.to(self.device)
+
+        with torch.cuda.stream(self._copy_stream):
+            input_ids = input_ids.pin_memory().to(self.device, non_blocking=True)
+            attention_mask = attention_mask.pin_memory().to(self.device, non_blocking=True)
+        return input_ids, attention_mask
+
+    def wait(self, *tensors: torch.Tensor) -> None:
+        """Compute stream'ini kopyanın bitmesine bağlar (kilit içinde, forward'dan hemen önce)."""
+        if self._copy_stream is None:
+            return
+        current = torch.cuda.current_stream()
+        current.wait_stream(self._copy_stream)
+        for tensor in tensors:
+            # Copy stream'inde ayrılan bellek compute stream'i işini bitirmeden geri verilmesin
+            tensor.record_stream(current)
@@ -0,0 +1,169 @@
+import os
+import re
+import json
+import time
+import uuid
+import queue
+import hashlib
+import logging
+import threading
+import urllib.request
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger("TRACING")
+
+# Aktif istek izi. asyncio.to_thread context'i kopyalar; Trace nesnesi paylaşıldığı için
+# engine/cache thread'lerinde eklenen span'ler isteğin izine düşer.
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("tts_trace", default=None)
+
+TRACE_ID_PATTERN = re.compile(r"^[A-Za-z0-9\-_.]{1,128}$")
+
+class Span:
+    __slots__ = ("name", "span_id", "start_ns", "end_ns")
+
+    def __init__(self, name: str, start_ns: int, end_ns: int):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+class Trace:
+    def __init__(self, name: str, trace_id: Optional[str] = None):
+        self.name = name
+        self.trace_id = trace_id if trace_id and TRACE_ID_PATTERN.match(trace_id) else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.start_ns = time.time_ns()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._finished = False
+
+    def add_span(self, name: str, start_ns: int, end_ns: int) -> None:
+        with self._lock:
+            self.spans.append(Span(name, start_ns, end_ns))
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Aynı isimli span'lerin (ör. cümle başına model_forward) toplam süresi, ms."""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for span in self.spans:
+                totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        return totals
+
+    def server_timing(self) -> str:
+        """Server-Timing header değeri. Örn: 'tokenize;dur=0.41, model_forward;dur=182.30'"""
+        parts = [f"{name};dur={ms:.2f}" for name, ms in self.stage_totals().items()]
+        parts.append(f"total;dur={(time.time_ns() - self.start_ns) / 1e6:.2f}")
+        return ", ".join(parts)
+
+    def finish(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        self.end_ns = time.time_ns()
+        trace_exporter.submit(self)
+
+    def to_otlp(self) -> Dict:
+        """OTLP/JSON (ExportTraceServiceRequest) formatı."""
+        otlp_trace_id = _otlp_trace_id(self.trace_id)
+
+        def span_json(span_id, parent_id, name, start_ns, end_ns, kind):
+            data = {
+                "traceId": otlp_trace_id, "spanId": span_id, "name": name, "kind": kind,
+                "startTimeUnixNano": str(start_ns), "endTimeUnixNano": str(end_ns),
+                "attributes": [{"key": "tts.trace_id", "value": {"stringValue": self.trace_id}}],
+            }
+            if parent_id:
+                data["parentSpanId"] = parent_id
+            return data
+
+        with self._lock:
+            spans = [span_json(self.span_id, None, self.name, self.start_ns, self.end_ns, 2)]
+            spans += [span_json(s.span_id, self.span_id, s.name, s.start_ns, s.end_ns, 1) for s in self.spans]
+
+        return {"resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": "tts-mms-service"}},
+                {"key": "deployment.environment", "value": {"stringValue": settings.ENV}},
+            ]},
+            "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": spans}],
+        }]}
+
+def _otlp_trace_id(trace_id: str) -> str:
+    # OTLP 16 byte (32 hex) ister; gelen ID uymuyorsa deterministik olarak türetilir
+    compact = trace_id.replace("-", "").lower()
+    if re.fullmatch(r"[0-9a-f]{32}", compact):
+        return compact
+    return hashlib.md5(trace_id.encode()).hexdigest()
+
+class TraceExporter:
+    """
+    Tamamlanan izleri arka planda OTLP/JSON olarak dosyaya (JSON lines) ve/veya
+    OTLP HTTP collector'a gönderir. İstek yolunda asla beklenmez; kuyruk doluysa iz düşülür.
+    """
+
+    def __init__(self):
+        self.file_path = settings.TRACE_EXPORT_PATH
+        self.endpoint = settings.TRACE_OTLP_ENDPOINT
+        self.enabled = bool(self.file_path or self.endpoint)
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=1000)
+        self._worker = None
+
+    def submit(self, trace: Trace) -> None:
+        if not self.enabled:
+            return
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+            self._worker.start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            logger.debug(f"Trace export queue full, dropping trace {trace.trace_id}")
+
+    def _run(self) -> None:
+        while True:
+            trace = self._queue.get()
+            payload = json.dumps(trace.to_otlp())
+            if self.file_path:
+                try:
+                    os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+                    with open(self.file_path, "a") as f:
+                        f.write(payload + "\n")
+                except Exception as e:
+                    logger.warning(f"Trace file export failed: {e}")
+            if self.endpoint:
+                try:
+                    req = urllib.request.Request(
+                        self.endpoint, data=payload.encode(), headers={"Content-Type": "application/json"}
+                    )
+                    urllib.request.urlopen(req, timeout=2).close()
+                except Exception as e:
+                    logger.warning(f"OTLP export to {self.endpoint} failed: {e}")
+
+trace_exporter = TraceExporter()
+
+def start_trace(name: str, trace_id: Optional[str] = None) -> Trace:
+    """İstek başında çağrılır. trace_id gelmezse (veya geçersizse) yeni bir tane üretilir."""
+    trace = Trace(name, trace_id)
+    _current_trace.set(trace)
+    return trace
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+def record_span(name: str, duration_sec: float, end_ns: Optional[int] = None) -> None:
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    end_ns = end_ns or time.time_ns()
+    trace.add_span(name, end_ns - int(duration_sec * 1e9), end_ns)
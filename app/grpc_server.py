@@ -2,7 +2,8 @@ import logging
 import grpc
 import time
 import os
-from concurrent import futures
+import json
+import base64
 import asyncio
 
 try:
@@ -14,43 +15,128 @@ except ImportError:
     mms_pb2_grpc = None
 
 from app.core.engine import tts_engine
+from app.core.registry import UnsupportedLanguageError
 from app.core.config import settings
+from app.core import metrics
+from app.core.tracing import start_trace, Trace
 
 logger = logging.getLogger("GRPC-SERVER")
 
+def start_rpc_trace(context, name: str) -> Trace:
+    """Client'ın x-trace-id metadata'sını devralır, yoksa yenisini üretir."""
+    incoming = dict(context.invocation_metadata() or ())
+    return start_trace(name, incoming.get("x-trace-id"))
+
+def finish_rpc_trace(context, trace: Trace) -> None:
+    """Aşama süreleri trailing metadata olarak döner (HTTP'deki Server-Timing karşılığı)."""
+    context.set_trailing_metadata((
+        ("x-trace-id", trace.trace_id),
+        ("server-timing", trace.server_timing()),
+    ))
+    trace.finish()
+
 class TtsMmsServicer(mms_pb2_grpc.TtsMmsServiceServicer if mms_pb2_grpc else object):
+    """
+    Native asyncio servicer. Bloklayıcı sentez engine'in async API'si ile thread'e
+    devredilir; event loop ve RPC slotları inference boyunca tutulmaz.
+    """
     
-    def MmsSynthesize(self, request, context):
-        if not mms_pb2: context.abort(grpc.StatusCode.UNIMPLEMENTED, "Contracts missing")
+    async def MmsSynthesize(self, request, context):
+        if not mms_pb2: await context.abort(grpc.StatusCode.UNIMPLEMENTED, "Contracts missing")
         
         start = time.perf_counter()
+        metrics.set_request_labels("grpc", "unary")
+        trace = start_rpc_trace(context, "MmsSynthesize")
         try:
-            audio_bytes = tts_engine.synthesize(request.text, speed=request.speed or 1.0)
+            language, model_id = await asyncio.to_thread(tts_engine.registry.resolve, request.language_code or None, request.text)
+            audio_bytes = await tts_engine.synthesize_async(request.text, speed=request.speed or 1.0, language=language)
             
             logger.info(f"gRPC Unary handled in {time.perf_counter()-start:.3f}s")
             
+            finish_rpc_trace(context, trace)
             return mms_pb2.MmsSynthesizeResponse(
                 audio_content=audio_bytes,
-                sample_rate=tts_engine.sampling_rate
+                sample_rate=tts_engine.model_sampling_rate(model_id)
             )
+        except UnsupportedLanguageError as e:
+            finish_rpc_trace(context, trace)
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
         except Exception as e:
             logger.error(f"gRPC Unary Error: {e}", exc_info=True)
-            context.abort(grpc.StatusCode.INTERNAL, str(e))
+            finish_rpc_trace(context, trace)
+            await context.abort(grpc.StatusCode.INTERNAL, str(e))
 
-    def MmsSynthesizeStream(self, request, context):
-        if not mms_pb2: context.abort(grpc.StatusCode.UNIMPLEMENTED, "Contracts missing")
+    async def MmsSynthesizeStream(self, request, context):
+        if not mms_pb2: await context.abort(grpc.StatusCode.UNIMPLEMENTED, "Contracts missing")
         
+        metrics.set_request_labels("grpc", "stream")
+        trace = start_rpc_trace(context, "MmsSynthesizeStream")
         try:
-            for chunk in tts_engine.synthesize_stream(request.text, speed=request.speed or 1.0):
-                yield mms_pb2.MmsSynthesizeStreamResponse(
+            speed = request.speed or 1.0
+            language = request.language_code or None
+            # Cache hit: ses diskten sabit boyutlu parçalar halinde okunur
+            cached_path = await tts_engine.lookup_cached_async(request.text, speed, language, kind="stream")
+
+            async for chunk in tts_engine.synthesize_stream_async(
+                request.text, speed, cached_path=cached_path, language=language
+            ):
+                # write() client okuyana kadar bekler (HTTP/2 flow control)
+                await context.write(mms_pb2.MmsSynthesizeStreamResponse(
                     audio_chunk=chunk,
                     is_final=False
-                )
-            yield mms_pb2.MmsSynthesizeStreamResponse(audio_chunk=b"", is_final=True)
+                ))
+            await context.write(mms_pb2.MmsSynthesizeStreamResponse(audio_chunk=b"", is_final=True))
+            finish_rpc_trace(context, trace)
             
+        except UnsupportedLanguageError as e:
+            finish_rpc_trace(context, trace)
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
         except Exception as e:
             logger.error(f"gRPC Stream Error: {e}", exc_info=True)
-            context.abort(grpc.StatusCode.INTERNAL, str(e))
+            finish_rpc_trace(context, trace)
+            await context.abort(grpc.StatusCode.INTERNAL, str(e))
+
+# --- BATCH (JSON over gRPC) ---
+# mms.proto'da batch mesajı yok; contracts değişene kadar ayrı bir servis adı altında
+# JSON serileştirilmiş generic handler ile sunulur. İstek: {"items": [{"id", "text", "language", "speed"}]}
+# Yanıt akışı: HTTP /api/tts/batch'teki NDJSON satırlarıyla aynı nesneler (audio_b64 dahil).
+BATCH_SERVICE_NAME = "sentiric.tts.v1.TtsMmsBatchService"
+
+def _json_deserialize(data: bytes) -> dict:
+    return json.loads(data.decode("utf-8"))
+
+def _json_serialize(obj: dict) -> bytes:
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+async def synthesize_batch_rpc(request: dict, context):
+    metrics.set_request_labels("grpc", "batch")
+    trace = start_rpc_trace(context, "SynthesizeBatch")
+    items = request.get("items") or []
+    if not items or len(items) > settings.BATCH_MAX_ITEMS:
+        finish_rpc_trace(context, trace)
+        await context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"items must contain 1..{settings.BATCH_MAX_ITEMS} entries")
+    if any(not isinstance(item, dict) or not str(item.get("text") or "").strip() for item in items):
+        finish_rpc_trace(context, trace)
+        await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "every item needs a non-empty 'text'")
+
+    include_audio = request.get("include_audio", True)
+    try:
+        async for result in tts_engine.synthesize_batch_async(items):
+            audio = result.pop("audio")
+            if audio is not None and include_audio:
+                result["audio_b64"] = base64.b64encode(audio).decode("ascii")
+            yield result
+    finally:
+        finish_rpc_trace(context, trace)
+
+def batch_handler() -> grpc.GenericRpcHandler:
+    return grpc.method_handlers_generic_handler(BATCH_SERVICE_NAME, {
+        "SynthesizeBatch": grpc.unary_stream_rpc_method_handler(
+            synthesize_batch_rpc,
+            request_deserializer=_json_deserialize,
+            response_serializer=_json_serialize,
+        ),
+    })
 
 def load_tls_credentials():
     try:
@@ -76,8 +162,20 @@ async def serve_grpc():
         logger.info("ℹ️ gRPC Server skipped (No contracts or proto definition found).")
         return
     
-    server = grpc.aio.server(futures.ThreadPoolExecutor(max_workers=4))
+    mb = 1024 * 1024
+    server = grpc.aio.server(
+        maximum_concurrent_rpcs=settings.GRPC_MAX_CONCURRENT_RPCS or None,
+        options=[
+            ("grpc.keepalive_time_ms", settings.GRPC_KEEPALIVE_TIME_MS),
+            ("grpc.keepalive_timeout_ms", settings.GRPC_KEEPALIVE_TIMEOUT_MS),
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.min_ping_interval_without_data_ms", settings.GRPC_KEEPALIVE_TIME_MS),
+            ("grpc.max_send_message_length", settings.GRPC_MAX_MESSAGE_MB * mb),
+            ("grpc.max_receive_message_length", settings.GRPC_MAX_MESSAGE_MB * mb),
+        ],
+    )
     mms_pb2_grpc.add_TtsMmsServiceServicer_to_server(TtsMmsServicer(), server)
+    server.add_generic_rpc_handlers((batch_handler(),))
     
     listen_addr = f"[::]:{settings.GRPC_PORT}"
     
@@ -2,7 +2,7 @@ import logging
 import shutil
 import os
 import asyncio
-from fastapi import FastAPI, Response, status
+from fastapi import FastAPI, Request, Response, status
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
@@ -13,13 +13,15 @@ from app.api.endpoints import router as api_router
 from app.core.logging_utils import setup_logging
 from app.core.config import settings
 from app.grpc_server import serve_grpc
+from app.core.metrics import start_metrics_server
+from app.core.tracing import start_trace
 
 setup_logging()
 logger = logging.getLogger("APP")
 
-UPLOAD_DIR = "/app/uploads"
-HISTORY_DIR = "/app/history"
-CACHE_DIR = "/app/cache"
+UPLOAD_DIR = settings.UPLOAD_DIR
+HISTORY_DIR = settings.HISTORY_DIR
+CACHE_DIR = settings.CACHE_DIR
 
 # Dizinlerin varlığından emin ol
 for d in [UPLOAD_DIR, HISTORY_DIR, CACHE_DIR]:
@@ -43,13 +45,17 @@ async def lifespan(app: FastAPI):
         # FastAPI bu hatayı yakalayıp uygulamayı durduracak
         raise RuntimeError("Engine initialization failed") from e
 
-    # 2. gRPC Sunucusunu Arka Planda Başlat
+    # 2. Prometheus metrik sunucusu (METRICS_PORT)
+    start_metrics_server()
+
+    # 3. gRPC Sunucusunu Arka Planda Başlat
     grpc_task = asyncio.create_task(serve_grpc())
     
     yield
     
     logger.info("🛑 Shutting down...")
     grpc_task.cancel()
+    tts_engine.executor.shutdown(wait=False, cancel_futures=True)
     
     # Cleanup (opsiyonel, container kapatılırken yapılabilir)
     # shutil.rmtree(UPLOAD_DIR, ignore_errors=True)
@@ -71,9 +77,39 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
     # Coqui uyumluluğu için bu header'ları expose et
-    expose_headers=["X-VCA-Chars", "X-VCA-Time", "X-VCA-RTF", "X-Model", "X-Cache", "X-Trace-ID"] 
+    expose_headers=["X-VCA-Chars", "X-VCA-Time", "X-VCA-RTF", "X-Model", "X-Cache", "X-Trace-ID", "Server-Timing"] 
 )
 
+# --- TRACING ---
+# Health check'ler izlenmez (export dosyasını şişirmesin)
+UNTRACED_PATHS = ("/health", "/favicon.ico")
+
+@app.middleware("http")
+async def trace_middleware(request: Request, call_next):
+    if request.url.path in UNTRACED_PATHS:
+        return await call_next(request)
+
+    trace = start_trace(f"{request.method} {request.url.path}", request.headers.get("x-trace-id"))
+    response = await call_next(request)
+    response.headers["X-Trace-ID"] = trace.trace_id
+    # Header'lar gönderilmeden önce tamamlanan aşamalar (unary'de tamamı)
+    response.headers["Server-Timing"] = trace.server_timing()
+
+    # İz, gövde tamamen gönderildiğinde kapanır (stream aşamaları da dahil olsun)
+    body_iterator = response.body_iterator
+    async def traced_body():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            trace.finish()
+    response.body_iterator = traced_body()
+    return response
+
+# --- METRICS ---
+# HTTP metrikleri default registry'ye yazılır, METRICS_PORT üzerinden servis edilir
+Instrumentator(excluded_handlers=["/health", "/metrics"]).instrument(app)
+
 # --- ROUTING ---
 app.include_router(api_router)
 
@@ -0,0 +1,356 @@
+"""
+Üretim trafiği şekillerini (unary/stream karışımı, metin uzunluğu dağılımı, tekrar oranı,
+ani yük patlamaları) /api/tts ve MmsSynthesizeStream üzerinde yeniden oynatan yük üreticisi.
+
+Trace dosyası (JSON lines), her satır bir istek:
+    {"t": 0.125, "transport": "http", "mode": "stream", "text": "..."}
+    t: trace başından itibaren saniye (open-loop modunda varış zamanı)
+
+Kullanım:
+    # Dağılımlardan trace üret ve kaydet
+    python3 -m benchmarks.loadgen --synthesize 2000 --rate 20 --write-trace trace.jsonl --dry-run
+
+    # Yerel offline instance'a (tiny VITS) open-loop replay
+    python3 -m benchmarks.loadgen --trace trace.jsonl --local --out report.json
+
+    # Çalışan bir node'a sabit eşzamanlılıkla closed-loop
+    python3 -m benchmarks.loadgen --trace trace.jsonl --concurrency 16 \\
+        --http-target http://10.88.40.6:14060 --grpc-target 10.88.40.6:14061
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import http.client
+import urllib.parse
+import urllib.request
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.run import percentile
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)s | %(message)s')
+logger = logging.getLogger("LOADGEN")
+
+WORDS = (
+    "merhaba sayın müşterimiz bakiyeniz lira faturanız ödeme tarihi randevunuz saat "
+    "lütfen bekleyin işleminiz başarıyla tamamlandı hesabınıza kartınız numaralı "
+    "siparişiniz kargoya verildi teşekkür ederiz iyi günler dileriz"
+).split()
+
+# --- TRACE ---
+
+def synthesize_trace(
+    count: int, rate: float, stream_ratio: float, grpc_ratio: float, repeat_ratio: float,
+    mean_chars: int, burst_every: float, burst_factor: float, seed: int,
+) -> List[Dict]:
+    """
+    Dağılımlardan trace üretir:
+      - Varışlar: Poisson (rate req/s); her burst_every saniyede 1 sn boyunca rate*burst_factor
+      - Metin uzunluğu: log-normal (ortalama mean_chars)
+      - Tekrarlar: repeat_ratio olasılıkla popüler havuzdan Zipf benzeri seçim (cache hit oranı)
+    """
+    rng = random.Random(seed)
+    popular: List[str] = []
+    trace = []
+    t = 0.0
+    for _ in range(count):
+        in_burst = burst_every > 0 and (t % burst_every) < 1.0
+        t += rng.expovariate(rate * (burst_factor if in_burst else 1.0))
+
+        if popular and rng.random() < repeat_ratio:
+            text = popular[min(len(popular) - 1, int(rng.paretovariate(1.2)) - 1)]
+        else:
+            target = max(10, int(rng.lognormvariate(0, 0.6) * mean_chars))
+            words = []
+            while sum(len(w) + 1 for w in words) < target:
+                words.append(rng.choice(WORDS))
+            text = " ".join(words).capitalize() + "."
+            if len(popular) < 200:
+                popular.append(text)
+
+        trace.append({
+            "t": round(t, 4),
+            "transport": "grpc" if rng.random() < grpc_ratio else "http",
+            "mode": "stream" if rng.random() < stream_ratio else "unary",
+            "text": text,
+        })
+    return trace
+
+def load_trace(path: str) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        trace = [json.loads(line) for line in f if line.strip()]
+    trace.sort(key=lambda r: r.get("t", 0))
+    return trace
+
+# --- CLIENTS ---
+
+class Outcome:
+    __slots__ = ("transport", "mode", "ok", "shed", "latency", "ttfa", "audio_sec", "error")
+
+    def __init__(self, transport: str, mode: str):
+        self.transport = transport
+        self.mode = mode
+        self.ok = False
+        self.shed = False
+        self.latency = 0.0
+        self.ttfa: Optional[float] = None
+        self.audio_sec = 0.0
+        self.error: Optional[str] = None
+
+class Clients:
+    def __init__(self, http_target: str, grpc_target: Optional[str], timeout: float):
+        parsed = urllib.parse.urlparse(http_target)
+        self.http_host = parsed.hostname
+        self.http_port = parsed.port or 80
+        self.timeout = timeout
+        self.sample_rate = self._fetch_sample_rate(http_target)
+        self.grpc_stub = None
+        self.grpc = None
+        if grpc_target:
+            try:
+                import grpc
+                from sentiric.tts.v1 import mms_pb2, mms_pb2_grpc
+                self.grpc = grpc
+                self.mms_pb2 = mms_pb2
+                self.grpc_stub = mms_pb2_grpc.TtsMmsServiceStub(grpc.insecure_channel(grpc_target))
+            except ImportError:
+                logger.warning("sentiric-contracts not installed; gRPC requests will be sent over HTTP.")
+
+    def _fetch_sample_rate(self, http_target: str) -> int:
+        try:
+            with urllib.request.urlopen(f"{http_target}/health", timeout=5) as resp:
+                return json.loads(resp.read()).get("sample_rate") or 16000
+        except Exception:
+            return 16000
+
+    def send(self, req: Dict) -> Outcome:
+        transport = req.get("transport", "http")
+        if transport == "grpc" and self.grpc_stub is None:
+            transport = "http"
+        outcome = Outcome(transport, req.get("mode", "unary"))
+        start = time.perf_counter()
+        try:
+            if transport == "grpc":
+                self._send_grpc(req, outcome, start)
+            else:
+                self._send_http(req, outcome, start)
+        except Exception as e:
+            outcome.error = str(e)[:200]
+        outcome.latency = time.perf_counter() - start
+        return outcome
+
+    def _send_http(self, req: Dict, outcome: Outcome, start: float) -> None:
+        stream = outcome.mode == "stream"
+        conn = http.client.HTTPConnection(self.http_host, self.http_port, timeout=self.timeout)
+        try:
+            body = json.dumps({"text": req["text"], "stream": stream})
+            conn.request("POST", "/api/tts", body=body, headers={"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            if resp.status in (429, 503):
+                outcome.shed = True
+                resp.read()
+                return
+            first = resp.read(1)
+            outcome.ttfa = time.perf_counter() - start
+            rest = resp.read()
+            if resp.status != 200:
+                outcome.error = f"HTTP {resp.status}"
+                return
+            size = len(first) + len(rest)
+            # Unary: WAV (44 byte header), stream: ham PCM16
+            outcome.audio_sec = (size - (0 if stream else 44)) / 2 / self.sample_rate
+            outcome.ok = True
+        finally:
+            conn.close()
+
+    def _send_grpc(self, req: Dict, outcome: Outcome, start: float) -> None:
+        pb = self.mms_pb2
+        try:
+            if outcome.mode == "stream":
+                total = 0
+                request = pb.MmsSynthesizeStreamRequest(text=req["text"], language_code="tur", speed=1.0)
+                for resp in self.grpc_stub.MmsSynthesizeStream(request, timeout=self.timeout):
+                    if resp.audio_chunk:
+                        if outcome.ttfa is None:
+                            outcome.ttfa = time.perf_counter() - start
+                        total += len(resp.audio_chunk)
+                outcome.audio_sec = total / 2 / self.sample_rate
+            else:
+                request = pb.MmsSynthesizeRequest(text=req["text"], language_code="tur", speed=1.0)
+                resp = self.grpc_stub.MmsSynthesize(request, timeout=self.timeout)
+                outcome.ttfa = time.perf_counter() - start
+                outcome.audio_sec = (len(resp.audio_content) - 44) / 2 / (resp.sample_rate or self.sample_rate)
+            outcome.ok = True
+        except self.grpc.RpcError as e:
+            if e.code() in (self.grpc.StatusCode.RESOURCE_EXHAUSTED, self.grpc.StatusCode.UNAVAILABLE):
+                outcome.shed = True
+            else:
+                outcome.error = f"{e.code().name}: {e.details()}"
+
+# --- DRIVERS ---
+
+def run_open_loop(clients: Clients, trace: List[Dict], speedup: float, max_inflight: int) -> List[Outcome]:
+    """Varış zamanlarına sadık kalır; yanıtlar gecikse de yeni istekler gönderilir."""
+    outcomes: List[Outcome] = []
+    lock = threading.Lock()
+    inflight = threading.Semaphore(max_inflight)
+
+    def task(req):
+        try:
+            result = clients.send(req)
+        finally:
+            inflight.release()
+        with lock:
+            outcomes.append(result)
+
+    with ThreadPoolExecutor(max_workers=max_inflight) as pool:
+        start = time.perf_counter()
+        for req in trace:
+            delay = req.get("t", 0) / speedup - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            if not inflight.acquire(blocking=False):
+                # İstemci tarafında kapasite doldu: istek düşürüldü sayılır
+                shed = Outcome(req.get("transport", "http"), req.get("mode", "unary"))
+                shed.shed = True
+                with lock:
+                    outcomes.append(shed)
+                continue
+            pool.submit(task, req)
+    return outcomes
+
+def run_closed_loop(clients: Clients, trace: List[Dict], concurrency: int) -> List[Outcome]:
+    """concurrency kadar sanal kullanıcı; her biri yanıtı alınca bir sonrakini gönderir."""
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(clients.send, trace))
+
+# --- REPORT ---
+
+def summarize(outcomes: List[Outcome], wall: float) -> Dict:
+    def stats(group: List[Outcome]) -> Dict:
+        ok = [o for o in group if o.ok]
+        latencies = [o.latency for o in ok]
+        ttfas = [o.ttfa for o in ok if o.ttfa is not None]
+        rtfs = [o.latency / o.audio_sec for o in ok if o.audio_sec > 0]
+        result = {
+            "requests": len(group),
+            "ok": len(ok),
+            "error_rate": sum(1 for o in group if o.error) / len(group) if group else 0.0,
+            "shed_rate": sum(1 for o in group if o.shed) / len(group) if group else 0.0,
+        }
+        if latencies:
+            result.update({f"latency_p{p}_ms": percentile(latencies, p) * 1000 for p in (50, 90, 95, 99)})
+        if ttfas:
+            result.update({f"ttfa_p{p}_ms": percentile(ttfas, p) * 1000 for p in (50, 95, 99)})
+        if rtfs:
+            result["rtf_p50"] = percentile(rtfs, 50)
+            result["rtf_p95"] = percentile(rtfs, 95)
+        return result
+
+    groups: Dict[str, List[Outcome]] = {}
+    for o in outcomes:
+        groups.setdefault(f"{o.transport}.{o.mode}", []).append(o)
+
+    errors: Dict[str, int] = {}
+    for o in outcomes:
+        if o.error:
+            errors[o.error] = errors.get(o.error, 0) + 1
+
+    return {
+        "wall_sec": wall,
+        "achieved_rps": len(outcomes) / wall if wall else 0.0,
+        "overall": stats(outcomes),
+        "by_kind": {k: stats(v) for k, v in sorted(groups.items())},
+        "top_errors": dict(sorted(errors.items(), key=lambda kv: -kv[1])[:10]),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentiric MMS TTS trace-replay load generator")
+    parser.add_argument("--trace", help="JSON lines trace dosyası")
+    parser.add_argument("--synthesize", type=int, default=0, help="Trace yerine dağılımlardan N istek üret")
+    parser.add_argument("--write-trace", help="Üretilen trace'i bu dosyaya yaz")
+    parser.add_argument("--dry-run", action="store_true", help="Sadece trace üret, yük gönderme")
+    parser.add_argument("--rate", type=float, default=10.0, help="Sentetik trace ortalama varış hızı (req/s)")
+    parser.add_argument("--stream-ratio", type=float, default=0.3)
+    parser.add_argument("--grpc-ratio", type=float, default=0.5)
+    parser.add_argument("--repeat-ratio", type=float, default=0.4, help="Popüler metin tekrar olasılığı")
+    parser.add_argument("--mean-chars", type=int, default=80)
+    parser.add_argument("--burst-every", type=float, default=30.0, help="Saniye; 0 = burst yok")
+    parser.add_argument("--burst-factor", type=float, default=4.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", type=int, default=0, help=">0 ise closed-loop, aksi halde open-loop")
+    parser.add_argument("--speedup", type=float, default=1.0, help="Open-loop: trace zamanlarını hızlandır")
+    parser.add_argument("--max-inflight", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--http-target", default="http://localhost:14060")
+    parser.add_argument("--grpc-target", default="localhost:14061")
+    parser.add_argument("--local", action="store_true", help="Offline tiny VITS ile yerel instance başlat")
+    parser.add_argument("--workdir", default="/tmp/tts-loadgen")
+    parser.add_argument("--out", default="loadgen_report.json")
+    args = parser.parse_args()
+
+    if args.trace:
+        trace = load_trace(args.trace)
+    elif args.synthesize:
+        trace = synthesize_trace(
+            args.synthesize, args.rate, args.stream_ratio, args.grpc_ratio, args.repeat_ratio,
+            args.mean_chars, args.burst_every, args.burst_factor, args.seed,
+        )
+    else:
+        parser.error("--trace or --synthesize is required")
+
+    if args.write_trace:
+        with open(args.write_trace, "w", encoding="utf-8") as f:
+            for req in trace:
+                f.write(json.dumps(req, ensure_ascii=False) + "\n")
+        logger.info(f"Trace with {len(trace)} requests written to {args.write_trace}")
+    if args.dry_run:
+        return
+
+    server = None
+    http_target, grpc_target = args.http_target, args.grpc_target
+    if args.local:
+        from benchmarks.local_server import configure_offline_env, LocalServer
+        configure_offline_env(args.workdir)
+        server = LocalServer().start()
+        http_target, grpc_target = server.http_url, server.grpc_target
+
+    try:
+        clients = Clients(http_target, grpc_target, args.timeout)
+        mode = f"closed-loop (concurrency={args.concurrency})" if args.concurrency > 0 else f"open-loop (speedup={args.speedup})"
+        logger.info(f"Replaying {len(trace)} requests against {http_target} | {mode}")
+
+        start = time.perf_counter()
+        if args.concurrency > 0:
+            outcomes = run_closed_loop(clients, trace, args.concurrency)
+        else:
+            outcomes = run_open_loop(clients, trace, args.speedup, args.max_inflight)
+        report = summarize(outcomes, time.perf_counter() - start)
+    finally:
+        if server:
+            server.stop()
+
+    report["config"] = {k: v for k, v in vars(args).items() if k not in ("trace",)}
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    overall = report["overall"]
+    logger.info(
+        f"Done: {overall['requests']} req in {report['wall_sec']:.1f}s ({report['achieved_rps']:.1f} rps) | "
+        f"p50={overall.get('latency_p50_ms', 0):.0f}ms p99={overall.get('latency_p99_ms', 0):.0f}ms | "
+        f"TTFA p95={overall.get('ttfa_p95_ms', 0):.0f}ms | errors={overall['error_rate']:.1%} shed={overall['shed_rate']:.1%} | "
+        f"RTF p50={overall.get('rtf_p50', 0):.3f}"
+    )
+    for kind, stats in report["by_kind"].items():
+        logger.info(f"  {kind:<14} {json.dumps({k: round(v, 3) for k, v in stats.items()})}")
+    logger.info(f"Report written to {args.out}")
+
+if __name__ == "__main__":
+    main()
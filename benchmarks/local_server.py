@@ -0,0 +1,90 @@
+"""
+Benchmark ve yük testleri için servisi yerel, offline (tiny VITS, CPU) olarak ayağa kaldırır.
+
+Ortam değişkenleri app modülleri import edilmeden ÖNCE ayarlanmalıdır; bu yüzden
+configure_offline_env() her zaman ilk çağrılır.
+"""
+import os
+import time
+import socket
+import threading
+import urllib.request
+import logging
+
+from benchmarks.tiny_model import ensure_tiny_model
+
+logger = logging.getLogger("LOCAL-SERVER")
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def configure_offline_env(workdir: str) -> None:
+    """Servisi workdir altında, ağsız ve GPU'suz çalışacak şekilde yapılandırır. Mevcut değerler ezilmez."""
+    os.makedirs(workdir, exist_ok=True)
+    defaults = {
+        "TTS_MMS_SERVICE_MODEL_ID": ensure_tiny_model(os.path.join(workdir, "tiny-vits")),
+        "TTS_MMS_SERVICE_DEVICE": "cpu",
+        "TTS_MMS_SERVICE_CACHE_DIR": os.path.join(workdir, "cache"),
+        "TTS_MMS_SERVICE_HISTORY_DIR": os.path.join(workdir, "history"),
+        "TTS_MMS_SERVICE_UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "TTS_MMS_SERVICE_PROFILE_DIR": os.path.join(workdir, "profiles"),
+        "TTS_MMS_SERVICE_CACHE_BACKEND": "local",
+        "TTS_MMS_SERVICE_HTTP_PORT": str(free_port()),
+        "TTS_MMS_SERVICE_GRPC_PORT": str(free_port()),
+        "TTS_MMS_SERVICE_METRICS_PORT": str(free_port()),
+        "HF_HUB_OFFLINE": "1",
+        "ENV": "development",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+class LocalServer:
+    """uvicorn'u (HTTP + lifespan içindeki gRPC) arka plan thread'inde çalıştırır."""
+
+    def __init__(self, host: str = "127.0.0.1"):
+        self.host = host
+        self.http_port = int(os.environ["TTS_MMS_SERVICE_HTTP_PORT"])
+        self.grpc_port = int(os.environ["TTS_MMS_SERVICE_GRPC_PORT"])
+        self.server = None
+        self.thread = None
+
+    @property
+    def http_url(self) -> str:
+        return f"http://{self.host}:{self.http_port}"
+
+    @property
+    def grpc_target(self) -> str:
+        return f"{self.host}:{self.grpc_port}"
+
+    def start(self, timeout: float = 120.0) -> "LocalServer":
+        import uvicorn
+        from app.main import app
+
+        config = uvicorn.Config(app, host=self.host, port=self.http_port, log_level="warning", access_log=False)
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, name="local-uvicorn", daemon=True)
+        self.thread.start()
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with urllib.request.urlopen(f"{self.http_url}/health", timeout=1) as resp:
+                    if resp.status == 200:
+                        logger.info(f"Local server ready at {self.http_url} (gRPC {self.grpc_target})")
+                        return self
+            except Exception:
+                time.sleep(0.2)
+        raise RuntimeError("Local server did not become healthy in time")
+
+    def stop(self) -> None:
+        if self.server:
+            self.server.should_exit = True
+            self.thread.join(timeout=10)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,398 @@
+"""
+Offline, tekrarlanabilir benchmark paketi (GPU ve model indirmesi gerektirmez).
+
+Kullanım:
+    python3 -m benchmarks.run --out results.json
+    python3 -m benchmarks.run --suites micro,engine --out current.json --baseline baseline.json
+
+Suite'ler:
+    micro  : AudioProcessor dönüşümleri, cümle bölme, normalizasyon + cache key, cache backend load/save, history yazımı
+    engine : Unary/stream RTF ve time-to-first-chunk (doğrudan engine üzerinden)
+    http   : /api/tts üzerinden eşzamanlılığa göre throughput ve gecikme
+    grpc   : MmsSynthesize / MmsSynthesizeStream (sentiric-contracts kuruluysa)
+    silence: Referans cümle setinde sessizlik kırpmanın time-to-audible ve cache byte'larına etkisi
+             (tiny model gürültü ürettiği için anlamlı sonuç gerçek MMS modeliyle alınır:
+              TTS_MMS_SERVICE_MODEL_ID=facebook/mms-tts-tur)
+
+--baseline verilirse sonuçlar karşılaştırılır; eşiği aşan gerilemelerde çıkış kodu 1'dir.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import http.client
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.local_server import configure_offline_env, LocalServer
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)s | %(message)s')
+logger = logging.getLogger("BENCHMARK")
+
+SAMPLE_TEXT = (
+    "Sayın müşterimiz, 15.03.2025 tarihli faturanızın tutarı 1.250,75 TL'dir. "
+    "Son ödeme tarihi %18 gecikme faizi uygulanmadan önce ayın sonudur! "
+    "Dr. Ayşe Yılmaz randevunuz saat 14:30'da. Başka bir işlem için lütfen bekleyin?"
+)
+
+# Sessizlik kırpma ölçümü için referans set: kısa/uzun, soru/ünlem, sayı içeren cümleler
+REFERENCE_PHRASES = [
+    "Merhaba, size nasıl yardımcı olabilirim?",
+    "Ödemeniz başarıyla alındı. Teşekkür ederiz.",
+    "Randevunuz yarın saat 14:30'da. Lütfen on dakika önce gelin.",
+    "Hesap bakiyeniz 1.250,75 TL'dir.",
+    "Bağlantı kuruluyor, lütfen bekleyin.",
+    "Evet.",
+    "Bu işlemi onaylıyor musunuz? Onaylamak için bire basın!",
+    "Sayın müşterimiz, kampanya 15.03.2025 tarihinde sona erecektir.",
+]
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+def unique_text(i: int) -> str:
+    # Her istek cache miss olsun diye benzersiz metin
+    return f"Benchmark cümlesi numara {i}. Ölçüm {uuid.uuid4().hex[:6]} için yapılıyor."
+
+class Results:
+    def __init__(self):
+        self.items: Dict[str, Dict] = {}
+
+    def add(self, name: str, value: float, unit: str, better: str = "lower") -> None:
+        self.items[name] = {"value": round(value, 6), "unit": unit, "better": better}
+        logger.info(f"{name:<48} {value:>12.4f} {unit}")
+
+    def timeit(self, name: str, fn: Callable[[], object], repeat: int = 200, warmup: int = 5) -> None:
+        for _ in range(warmup):
+            fn()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+        self.add(f"{name}.median_us", statistics.median(samples) * 1e6, "us")
+        self.add(f"{name}.p95_us", percentile(samples, 95) * 1e6, "us")
+
+# --- SUITES ---
+
+def bench_micro(results: Results, workdir: str, redis_url: str = None) -> None:
+    import numpy as np
+    from app.core.audio import audio_processor
+    from app.core.engine import tts_engine
+    from app.core.normalizer import text_normalizer
+    from app.core.history import HistoryManager
+    from app.core.cache import LocalFileBackend, SharedFileBackend, RedisBackend, MemoryTier, fakeredis
+
+    rng = np.random.default_rng(0)
+    waveform = (rng.standard_normal(16000 * 3) * 0.3).astype(np.float32)  # 3 sn
+    wav_bytes = audio_processor.numpy_to_wav_bytes(waveform, 16000)
+
+    results.timeit("audio.numpy_to_wav_bytes_3s", lambda: audio_processor.numpy_to_wav_bytes(waveform, 16000))
+    results.timeit("audio.float32_to_pcm16_3s", lambda: audio_processor.float32_to_pcm16(waveform))
+    results.timeit("audio.process_waveform_3s", lambda: audio_processor.process_waveform(waveform))
+
+    normalized = text_normalizer.normalize(SAMPLE_TEXT)
+    results.timeit("text.split_sentences", lambda: tts_engine._split_sentences(normalized), repeat=1000)
+    results.timeit("text.normalize_uncached", lambda: text_normalizer.normalize(SAMPLE_TEXT), repeat=500)
+    results.timeit(
+        "cache.generate_key",
+        lambda: tts_engine._generate_cache_key(tts_engine._clean_text(SAMPLE_TEXT), "tur", 1.0),
+        repeat=1000,
+    )
+
+    backends = {
+        "local": LocalFileBackend(os.path.join(workdir, "bench-local")),
+        "shared": SharedFileBackend(os.path.join(workdir, "bench-shared")),
+    }
+    if not redis_url and fakeredis is not None:
+        # Gerçek sunucu verilmediyse süreç içi stand-in: protokol/TTL yolu yine de çalışır
+        redis_url = RedisBackend.STAND_IN_SCHEME
+    if redis_url:
+        try:
+            backends["redis"] = RedisBackend(redis_url, ttl_sec=60, timeout_sec=1.0, prefix="tts-bench:")
+            backends["redis"].exists("probe")
+        except Exception as e:
+            logger.warning(f"Redis backend skipped: {e}")
+            backends.pop("redis", None)
+
+    for name, backend in backends.items():
+        counter = iter(range(10 ** 9))
+        results.timeit(f"cache.{name}.save_96kb", lambda: backend.save(f"k{next(counter)}.wav", wav_bytes), repeat=100)
+        backend.save("hot.wav", wav_bytes)
+        results.timeit(f"cache.{name}.load_96kb", lambda: backend.load("hot.wav"), repeat=200)
+        backend.delete("hot.wav")
+        if backend.exists("hot.wav") or backend.load("hot.wav") is not None:
+            raise RuntimeError(f"Cache backend '{name}' did not delete its entry")
+
+    memory = MemoryTier(64 * 1024 * 1024)
+    memory.put("hot.wav", wav_bytes)
+    results.timeit("cache.memory.load_96kb", lambda: memory.get("hot.wav"), repeat=1000)
+
+    history = HistoryManager(os.path.join(workdir, "bench-history", "history.db"))
+    counter = iter(range(10 ** 9))
+    results.timeit(
+        "history.add_entry",
+        lambda: history.add_entry(f"f{next(counter)}.wav", SAMPLE_TEXT, "tur", None, "Standard"),
+        repeat=100,
+    )
+
+def bench_engine(results: Results, iterations: int) -> None:
+    from app.core.engine import tts_engine
+    if not tts_engine.model:
+        tts_engine.initialize()
+    sr = tts_engine.sampling_rate
+
+    # Isınma
+    tts_engine.synthesize(unique_text(-1), lookup=False)
+
+    rtfs, latencies = [], []
+    for i in range(iterations):
+        start = time.perf_counter()
+        audio = tts_engine.synthesize(unique_text(i), lookup=False)
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed)
+        rtfs.append(elapsed / ((len(audio) - 44) / 2 / sr))
+    results.add("engine.unary.rtf_median", statistics.median(rtfs), "x")
+    results.add("engine.unary.latency_p95_ms", percentile(latencies, 95) * 1000, "ms")
+
+    ttfcs, stream_rtfs = [], []
+    for i in range(iterations):
+        start = time.perf_counter()
+        first, total_bytes = None, 0
+        for chunk in tts_engine.synthesize_stream(unique_text(1000 + i)):
+            if first is None:
+                first = time.perf_counter() - start
+            total_bytes += len(chunk)
+        elapsed = time.perf_counter() - start
+        if first is not None and total_bytes:
+            ttfcs.append(first)
+            stream_rtfs.append(elapsed / (total_bytes / 2 / sr))
+    if ttfcs:
+        results.add("engine.stream.ttfc_median_ms", statistics.median(ttfcs) * 1000, "ms")
+        results.add("engine.stream.rtf_median", statistics.median(stream_rtfs), "x")
+
+    # Cache hit yolu (lookup + disk)
+    text = unique_text(5000)
+    tts_engine.synthesize(text)
+    results.timeit("engine.cache_hit_lookup", lambda: tts_engine.lookup_cached(text), repeat=200)
+
+    # Tokenizer: LRU'dan okunan ve her seferinde tokenize edilen cümle
+    from app.core.config import settings
+    entry = tts_engine.registry.get(settings.MODEL_ID)
+    sentence = tts_engine._clean_text(SAMPLE_TEXT)
+    results.timeit("engine.tokenize_cached", lambda: tts_engine._tokenize(sentence, entry), repeat=1000)
+    results.timeit("engine.tokenize_uncached", lambda: entry.tokenizer(sentence)["input_ids"], repeat=200)
+
+def bench_silence(results: Results) -> None:
+    """
+    Aynı waveform üzerinden ham ve kırpılmış çıktıyı karşılaştırır:
+    time-to-audible = ilk cümlenin sentez süresi (+ kırpma) + ilk duyulur örneğe kadar geçen ses süresi.
+    """
+    from app.core.config import settings
+    from app.core.audio import audio_processor
+    from app.core.engine import tts_engine
+    if not tts_engine.model:
+        tts_engine.initialize()
+    sr = tts_engine.sampling_rate
+    entry = tts_engine.registry.get(settings.MODEL_ID)
+    tts_engine._infer("ısınma", entry)
+
+    def onset_sec(waveform) -> float:
+        start, _ = audio_processor.silence_bounds(waveform, sr, settings.TRIM_THRESHOLD_DB, settings.TRIM_FRAME_MS)
+        return start / sr
+
+    raw_bytes = trimmed_bytes = 0
+    raw_tta, trimmed_tta = [], []
+    for phrase in REFERENCE_PHRASES:
+        sentences = tts_engine._split_sentences(tts_engine._clean_text(phrase))
+        for n, sentence in enumerate(sentences):
+            start = time.perf_counter()
+            waveform = tts_engine._infer(sentence, entry)
+            infer_sec = time.perf_counter() - start
+            start = time.perf_counter()
+            trimmed = audio_processor.trim_silence(
+                waveform, sr, settings.TRIM_THRESHOLD_DB, settings.TRIM_FRAME_MS, settings.TRIM_KEEP_MS
+            )
+            trim_sec = time.perf_counter() - start
+            raw_bytes += waveform.size * 2
+            trimmed_bytes += trimmed.size * 2
+            if n == 0:
+                raw_tta.append(infer_sec + onset_sec(waveform))
+                trimmed_tta.append(infer_sec + trim_sec + onset_sec(trimmed))
+
+    results.add("silence.time_to_audible_raw_median_ms", statistics.median(raw_tta) * 1000, "ms")
+    results.add("silence.time_to_audible_trimmed_median_ms", statistics.median(trimmed_tta) * 1000, "ms")
+    results.add("silence.cached_bytes_raw", raw_bytes, "bytes")
+    results.add("silence.cached_bytes_trimmed", trimmed_bytes, "bytes")
+    results.add("silence.cached_bytes_reduction_pct", (1 - trimmed_bytes / raw_bytes) * 100 if raw_bytes else 0, "%", better="higher")
+
+    waveform = tts_engine._infer(REFERENCE_PHRASES[2], entry)
+    results.timeit("audio.trim_silence", lambda: audio_processor.trim_silence(waveform, sr), repeat=200)
+
+def _http_post(url_host: str, port: int, payload: dict, stream: bool):
+    conn = http.client.HTTPConnection(url_host, port, timeout=120)
+    start = time.perf_counter()
+    conn.request("POST", "/api/tts", body=json.dumps(payload), headers={"Content-Type": "application/json"})
+    resp = conn.getresponse()
+    first = None
+    if stream:
+        resp.read(1)
+        first = time.perf_counter() - start
+    resp.read()
+    conn.close()
+    if resp.status != 200:
+        raise RuntimeError(f"HTTP {resp.status}")
+    return time.perf_counter() - start, first
+
+def bench_http(results: Results, server: LocalServer, levels: List[int], requests_per_level: int) -> None:
+    host, port = server.host, server.http_port
+    counter = iter(range(10 ** 9))
+    for concurrency in levels:
+        for mode in ("unary", "stream"):
+            stream = mode == "stream"
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                outcomes = list(pool.map(
+                    lambda _: _http_post(host, port, {"text": unique_text(next(counter)), "stream": stream}, stream),
+                    range(requests_per_level),
+                ))
+            wall = time.perf_counter() - start
+            latencies = [o[0] for o in outcomes]
+            prefix = f"http.{mode}.c{concurrency}"
+            results.add(f"{prefix}.throughput_rps", requests_per_level / wall, "req/s", better="higher")
+            results.add(f"{prefix}.latency_p50_ms", percentile(latencies, 50) * 1000, "ms")
+            results.add(f"{prefix}.latency_p95_ms", percentile(latencies, 95) * 1000, "ms")
+            if stream:
+                results.add(f"{prefix}.ttfc_p50_ms", percentile([o[1] for o in outcomes], 50) * 1000, "ms")
+
+def bench_grpc(results: Results, server: LocalServer, levels: List[int], requests_per_level: int) -> None:
+    try:
+        import grpc
+        from sentiric.tts.v1 import mms_pb2, mms_pb2_grpc
+    except ImportError:
+        logger.warning("gRPC suite skipped: sentiric-contracts not installed.")
+        return
+
+    channel = grpc.insecure_channel(server.grpc_target)
+    stub = mms_pb2_grpc.TtsMmsServiceStub(channel)
+    counter = iter(range(10 ** 9))
+
+    def unary(_):
+        start = time.perf_counter()
+        stub.MmsSynthesize(mms_pb2.MmsSynthesizeRequest(text=unique_text(next(counter)), language_code="tur", speed=1.0))
+        return time.perf_counter() - start, None
+
+    def stream(_):
+        start = time.perf_counter()
+        first = None
+        req = mms_pb2.MmsSynthesizeStreamRequest(text=unique_text(next(counter)), language_code="tur", speed=1.0)
+        for resp in stub.MmsSynthesizeStream(req):
+            if first is None and resp.audio_chunk:
+                first = time.perf_counter() - start
+        return time.perf_counter() - start, first
+
+    for concurrency in levels:
+        for mode, fn in (("unary", unary), ("stream", stream)):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                outcomes = list(pool.map(fn, range(requests_per_level)))
+            wall = time.perf_counter() - start
+            prefix = f"grpc.{mode}.c{concurrency}"
+            results.add(f"{prefix}.throughput_rps", requests_per_level / wall, "req/s", better="higher")
+            results.add(f"{prefix}.latency_p95_ms", percentile([o[0] for o in outcomes], 95) * 1000, "ms")
+            if mode == "stream":
+                results.add(f"{prefix}.ttfc_p50_ms", percentile([o[1] for o in outcomes if o[1]], 50) * 1000, "ms")
+    channel.close()
+
+# --- COMPARE ---
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Eşikten (oransal) daha kötü olan metrikleri döner."""
+    regressions = []
+    for name, cur in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base["value"]:
+            continue
+        change = (cur["value"] - base["value"]) / base["value"]
+        worse = change > threshold if cur["better"] == "lower" else change < -threshold
+        status = "REGRESSION" if worse else "ok"
+        logger.info(f"{status:<10} {name:<48} {base['value']:>12.4f} -> {cur['value']:>12.4f} ({change:+.1%})")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentiric MMS TTS offline benchmark suite")
+    parser.add_argument("--suites", default="micro,engine,silence,http,grpc")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki sonuç dosyası")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Gerileme eşiği (0.15 = %%15)")
+    parser.add_argument("--workdir", default=None, help="Varsayılan: geçici dizin")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=16, help="Eşzamanlılık seviyesi başına istek")
+    parser.add_argument("--concurrency", default="1,2,4,8")
+    parser.add_argument("--redis-url", default=None, help="Redis backend micro benchmark'ı için (varsayılan: fakeredis kuruluysa süreç içi stand-in)")
+    args = parser.parse_args()
+
+    suites = set(args.suites.split(","))
+    levels = [int(c) for c in args.concurrency.split(",")]
+    workdir = args.workdir or tempfile.mkdtemp(prefix="tts-bench-")
+    configure_offline_env(workdir)
+
+    import torch
+    torch.manual_seed(0)
+    torch.set_num_threads(int(os.getenv("BENCH_TORCH_THREADS", "1")))
+
+    results = Results()
+    if "micro" in suites:
+        bench_micro(results, workdir, args.redis_url)
+    if "engine" in suites:
+        bench_engine(results, args.iterations)
+    if "silence" in suites:
+        bench_silence(results)
+    if suites & {"http", "grpc"}:
+        with LocalServer() as server:
+            if "http" in suites:
+                bench_http(results, server, levels, args.requests)
+            if "grpc" in suites:
+                bench_grpc(results, server, levels, args.requests)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "torch": torch.__version__,
+            "platform": platform.platform(),
+            "torch_threads": torch.get_num_threads(),
+            "suites": sorted(suites),
+        },
+        "results": results.items,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Results written to {args.out}")
+
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            logger.error(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        logger.info("No regressions against baseline.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Offline benchmark fixture: rastgele ilklendirilmiş küçük bir VITS modeli.
+
+Ağırlık indirmeden, GPU olmadan servis ve benchmark'ların uçtan uca çalıştırılabilmesi
+için MMS ile aynı sınıfları (VitsModel + VitsTokenizer) kullanır. Çıkan ses anlamsızdır;
+ölçülen şey pipeline maliyetidir.
+
+Kullanım:
+    python3 -m benchmarks.tiny_model /tmp/tiny-vits
+    TTS_MMS_SERVICE_MODEL_ID=/tmp/tiny-vits TTS_MMS_SERVICE_DEVICE=cpu uvicorn app.main:app
+"""
+import os
+import sys
+import json
+import logging
+
+logger = logging.getLogger("TINY-VITS")
+
+DEFAULT_PATH = "/tmp/sentiric-tiny-vits"
+
+# Türkçe alfabe + rakamlar + temel noktalama
+VOCAB = list(" abcçdefgğhıijklmnoöprsştuüvyzqwx0123456789.,!?'-")
+
+def tiny_config_kwargs(vocab_size: int) -> dict:
+    return dict(
+        vocab_size=vocab_size, hidden_size=32, num_hidden_layers=2, num_attention_heads=2, ffn_dim=64,
+        flow_size=32, spectrogram_bins=33, upsample_initial_channel=32,
+        upsample_rates=[8, 8, 4], upsample_kernel_sizes=[16, 16, 8],
+        resblock_kernel_sizes=[3], resblock_dilation_sizes=[[1, 3]],
+        prior_encoder_num_flows=2, prior_encoder_num_wavenet_layers=2,
+        posterior_encoder_num_wavenet_layers=2, duration_predictor_num_flows=2,
+        duration_predictor_filter_channels=32, depth_separable_num_layers=2,
+        sampling_rate=16000,
+    )
+
+def ensure_tiny_model(path: str = DEFAULT_PATH, seed: int = 0) -> str:
+    """Modeli path'e (yoksa) üretir ve path'i döner. Aynı seed aynı ağırlıkları verir."""
+    if os.path.exists(os.path.join(path, "config.json")):
+        return path
+
+    import torch
+    from transformers import VitsConfig, VitsModel, VitsTokenizer
+
+    os.makedirs(path, exist_ok=True)
+    vocab_path = os.path.join(path, "vocab.json")
+    with open(vocab_path, "w", encoding="utf-8") as f:
+        json.dump({c: i for i, c in enumerate(VOCAB)}, f, ensure_ascii=False)
+
+    tokenizer = VitsTokenizer(vocab_path, add_blank=True, normalize=True, phonemize=False, language="tur")
+    tokenizer.save_pretrained(path)
+
+    torch.manual_seed(seed)
+    model = VitsModel(VitsConfig(**tiny_config_kwargs(len(VOCAB))))
+    model.save_pretrained(path)
+    logger.info(f"Tiny VITS fixture written to {path}")
+    return path
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)s | %(message)s')
+    print(ensure_tiny_model(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH))
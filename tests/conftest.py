@@ -0,0 +1,14 @@
+"""
+pytest ortamı: servis dizinleri geçici bir klasöre yönlendirilir (app.core.cache ve history
+import edilirken dizin ve singleton oluşturur), repo kökü import yoluna eklenir.
+"""
+import os
+import sys
+import tempfile
+
+_workdir = tempfile.mkdtemp(prefix="tts-mms-tests-")
+for name in ("CACHE_DIR", "HISTORY_DIR", "UPLOAD_DIR", "PROFILE_DIR"):
+    os.environ.setdefault(f"TTS_MMS_SERVICE_{name}", os.path.join(_workdir, name.lower()))
+os.environ.setdefault("TTS_MMS_SERVICE_DEVICE", "cpu")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,57 @@
+"""
+Üretim metinlerinin replay'i ile normalizasyonun cache hit oranına etkisini ölçer.
+
+Kullanım:
+    python3 tests/normalization_replay.py production_texts.txt
+
+Girdi: her satırda bir istek metni (tekrarlar dahil, geliş sırasıyla).
+"""
+import os
+import re
+import sys
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.normalizer import normalize_text
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(levelname)s | %(message)s')
+logger = logging.getLogger("NORMALIZATION-REPLAY")
+
+def legacy_clean(text: str) -> str:
+    # Normalizasyon öncesi anahtar üretimi (whitespace + lower)
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+def replay(texts, key_fn):
+    seen = set()
+    hits = 0
+    for text in texts:
+        key = key_fn(text)
+        if key in seen:
+            hits += 1
+        else:
+            seen.add(key)
+    return hits, len(seen)
+
+def run_replay(path: str):
+    with open(path, encoding="utf-8") as f:
+        texts = [line.rstrip("\n") for line in f if line.strip()]
+
+    if not texts:
+        logger.error("Replay file is empty.")
+        exit(1)
+
+    legacy_hits, legacy_keys = replay(texts, legacy_clean)
+    norm_hits, norm_keys = replay(texts, normalize_text)
+
+    total = len(texts)
+    logger.info(f"Requests: {total}")
+    logger.info(f"Legacy     -> unique keys: {legacy_keys} | hit rate: {legacy_hits / total:.2%}")
+    logger.info(f"Normalized -> unique keys: {norm_keys} | hit rate: {norm_hits / total:.2%}")
+    logger.info(f"Hit-rate gain: {(norm_hits - legacy_hits) / total:+.2%} | Saved inferences: {legacy_keys - norm_keys}")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print(__doc__)
+        exit(1)
+    run_replay(sys.argv[1])
@@ -0,0 +1,38 @@
+import numpy as np
+
+from app.core.audio import audio_processor
+
+SR = 16000
+
+def tone(ms: int, amplitude: float = 0.5) -> np.ndarray:
+    t = np.arange(int(SR * ms / 1000)) / SR
+    return (amplitude * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+def silence(ms: int) -> np.ndarray:
+    return np.zeros(int(SR * ms / 1000), dtype=np.float32)
+
+def test_trim_silence_keeps_margin_around_speech():
+    waveform = np.concatenate([silence(500), tone(200), silence(500)])
+    trimmed = audio_processor.trim_silence(waveform, SR, keep_ms=30)
+    # 200 ms ses + iki uçta 30 ms pay (10 ms çerçeve hassasiyetinde)
+    assert abs(trimmed.size - int(SR * 0.26)) <= SR // 100
+    assert np.abs(trimmed).max() == np.abs(waveform).max()
+
+def test_trim_silence_is_relative_to_peak():
+    quiet = np.concatenate([silence(300), tone(200, amplitude=0.01), silence(300)])
+    assert audio_processor.trim_silence(quiet, SR).size < quiet.size // 2
+
+def test_trim_silence_all_silent_returns_empty():
+    assert audio_processor.trim_silence(silence(300), SR).size == 0
+    assert audio_processor.trim_silence(np.zeros(0, dtype=np.float32), SR).size == 0
+
+def test_trim_silence_without_silence_is_noop():
+    waveform = tone(300)
+    assert audio_processor.trim_silence(waveform, SR).size == waveform.size
+
+def test_wav_roundtrip_and_pcm_payload():
+    waveform = tone(100)
+    wav = audio_processor.numpy_to_wav_bytes(waveform, SR)
+    pcm = audio_processor.wav_to_pcm16(wav)
+    assert len(pcm) == waveform.size * 2
+    assert audio_processor.wav_bytes_to_numpy(wav).size == waveform.size
@@ -0,0 +1,62 @@
+import pytest
+
+from app.core.config import settings
+from app.core.budget import InferenceBudget
+
+@pytest.fixture
+def budget(monkeypatch):
+    monkeypatch.setattr(settings, "INFER_MAX_BATCH_SIZE", 4)
+    monkeypatch.setattr(settings, "INFER_MAX_BATCH_SEC", 2.0)
+    return InferenceBudget("cpu")
+
+def calibrate(budget: InferenceBudget, bytes_per_token: float, sec_per_token: float, ceiling: int) -> None:
+    budget.mem_coef = (0.0, bytes_per_token)
+    budget.time_coef = (0.0, sec_per_token)
+    budget.ceiling_bytes = ceiling
+
+def flatten(batches):
+    return sorted(i for batch in batches for i in batch)
+
+def test_uncalibrated_packs_by_batch_size_only(budget):
+    lengths = [50, 10, 40, 20, 30, 60]
+    batches = budget.pack(lengths)
+    assert [len(b) for b in batches] == [4, 2]
+    assert flatten(batches) == list(range(len(lengths)))
+
+def test_batches_are_sorted_by_length(budget):
+    lengths = [50, 10, 40, 20, 30, 60]
+    batches = budget.pack(lengths)
+    ordered = [lengths[i] for batch in batches for i in batch]
+    assert ordered == sorted(lengths)
+
+def test_memory_ceiling_splits_batches(budget):
+    # Padding'li batch: batch_size * en uzun eleman * byte/token <= tavan
+    calibrate(budget, bytes_per_token=1000, sec_per_token=0.0, ceiling=100_000)
+    lengths = [10, 20, 30, 40]
+    batches = budget.pack(lengths)
+    for batch in batches:
+        longest = max(lengths[i] for i in batch)
+        assert len(batch) == 1 or len(batch) * longest * 1000 <= 100_000
+    assert flatten(batches) == [0, 1, 2, 3]
+    assert len(batches) > 1
+
+def test_oversized_item_gets_its_own_batch(budget):
+    calibrate(budget, bytes_per_token=1000, sec_per_token=0.0, ceiling=50_000)
+    batches = budget.pack([10, 500, 10])
+    assert [1] in batches
+    assert flatten(batches) == [0, 1, 2]
+
+def test_time_limit_caps_batch_duration(budget):
+    calibrate(budget, bytes_per_token=0, sec_per_token=0.01, ceiling=0)
+    # 100 token ~ 1 sn/öğe; INFER_MAX_BATCH_SEC=2 -> en fazla 2 öğe
+    batches = budget.pack([100, 100, 100, 100])
+    assert all(len(b) <= 2 for b in batches)
+
+def test_predict_uncalibrated_is_zero(budget):
+    assert budget.predict(100, 4) == (0, 0.0)
+    assert budget.fits(10_000, 8)
+
+def test_fit_clamps_negative_coefficients():
+    import numpy as np
+    intercept, slope = InferenceBudget._fit(np.array([10.0, 20.0, 30.0]), np.array([30.0, 20.0, 10.0]))
+    assert intercept >= 0 and slope == 0.0
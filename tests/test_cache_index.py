@@ -0,0 +1,116 @@
+import os
+import time
+
+import pytest
+
+from app.core.cache import CACHE_KEY_SCHEMA, CacheIndex, tts_cache
+
+@pytest.fixture
+def index(tmp_path):
+    return CacheIndex(str(tmp_path / ".index.db"))
+
+def totals(index: CacheIndex):
+    return {(m["model"], m["version"]): (m["entries"], m["bytes"]) for m in index.stats()["per_model"]}
+
+def test_record_maintains_totals(index):
+    index.record("a.wav", 100, {"model": "m", "version": "v1", "language": "tur", "kind": "unary"})
+    index.record("b.wav", 50, {"model": "m", "version": "v1"})
+    index.record("c.wav", 10, {"model": "m", "version": "v2"})
+    assert totals(index) == {("m", "v1"): (2, 150), ("m", "v2"): (1, 10)}
+    assert index.total_bytes == 160
+
+def test_rewrite_moves_entry_between_totals(index):
+    index.record("a.wav", 100, {"model": "m", "version": "v1"})
+    index.record("a.wav", 80, {"model": "m", "version": "v2"})
+    assert totals(index) == {("m", "v2"): (1, 80)}
+    assert index.total_bytes == 80
+
+def test_rewrite_without_meta_keeps_model(index):
+    index.record("a.wav", 100, {"model": "m", "version": "v1"})
+    index.record("a.wav", 120)
+    assert index.get("a.wav")["model"] == "m"
+    assert totals(index) == {("m", "v1"): (1, 120)}
+
+def test_remove_updates_totals(index):
+    index.record("a.wav", 100, {"model": "m", "version": "v1"})
+    index.record("b.wav", 50, {"model": "m", "version": "v1"})
+    index.remove(["a.wav", "b.wav"])
+    assert totals(index) == {}
+    assert index.total_bytes == 0
+
+def test_totals_survive_reopen(tmp_path):
+    path = str(tmp_path / ".index.db")
+    CacheIndex(path).record("a.wav", 100, {"model": "m", "version": "v1"})
+    assert CacheIndex(path).total_bytes == 100
+
+def test_select_keys_filters(index):
+    index.record("a.wav", 1, {"model": "m", "version": "v1"})
+    index.record("b.wav", 1, {"model": "m", "version": "v2"})
+    index.record("c.wav", 1, {"model": "x", "version": "v1"})
+    assert sorted(index.select_keys(model="m")) == ["a.wav", "b.wav"]
+    assert index.select_keys(model="m", exclude_version="v2") == ["a.wav"]
+    assert sorted(index.select_keys(version="v1")) == ["a.wav", "c.wav"]
+    assert index.select_keys(created_before=0) == []
+    assert len(index.select_keys(created_before=time.time() + 1)) == 3
+
+def test_flush_applies_pending_hits(index):
+    index.record("a.wav", 1, {"model": "m", "version": "v1"})
+    index.touch("a.wav")
+    index.touch("a.wav")
+    assert index.get("a.wav")["hits"] == 0
+    assert index.flush() == 1
+    assert index.get("a.wav")["hits"] == 2
+
+def test_oldest_orders_by_last_access(index):
+    index.record("a.wav", 1)
+    index.record("b.wav", 2)
+    index.touch("a.wav")
+    index.flush()
+    assert [key for key, _ in index.oldest(2)] == ["b.wav", "a.wav"]
+
+def test_backfill_adds_existing_files_without_model(index, tmp_path):
+    cache_dir = tmp_path / "files"
+    cache_dir.mkdir()
+    (cache_dir / "old.wav").write_bytes(b"x" * 10)
+    (cache_dir / ".hidden").write_bytes(b"x")
+    index.record("old.wav", 10, {"model": "m", "version": "v1"})
+    (cache_dir / "older.wav").write_bytes(b"x" * 5)
+    assert index.backfill(str(cache_dir)) == 2
+    # Var olan kayıt ezilmez; yeni dosya model bilgisi olmadan eklenir
+    assert index.get("old.wav")["model"] == "m"
+    assert index.get("older.wav")["model"] == ""
+    assert index.get(".hidden") is None
+    assert totals(index) == {("m", "v1"): (1, 10), ("", ""): (1, 5)}
+
+def test_key_schema_and_slot_versions(index):
+    assert index.key_schema() is None
+    index.set_key_schema("3")
+    assert index.key_schema() == "3"
+    assert index.slot_version("m") is None
+    index.set_slot_version("m", "abc")
+    assert index.slot_version("m") == "abc"
+
+def wait_for_startup_purge():
+    deadline = time.time() + 10
+    while tts_cache.index.key_schema() != CACHE_KEY_SCHEMA and time.time() < deadline:
+        time.sleep(0.05)
+    assert tts_cache.index.key_schema() == CACHE_KEY_SCHEMA
+
+def test_old_schema_entries_are_purged():
+    wait_for_startup_purge()
+    tts_cache.save("stranded.wav", b"old", None)
+    cutoff = time.time() + 0.001
+    time.sleep(0.01)
+    tts_cache.save("fresh.wav", b"new", {"model": "m", "version": "v1"})
+    tts_cache._schema_cutoff = cutoff
+    assert tts_cache.purge_old_schema() == 1
+    assert tts_cache.index.get("stranded.wav") is None
+    assert not os.path.exists(os.path.join(tts_cache.cache_dir, "stranded.wav"))
+    assert tts_cache.index.get("fresh.wav") is not None
+
+def test_invalidate_stale_versions_keeps_current(monkeypatch):
+    wait_for_startup_purge()
+    tts_cache.save("v1.wav", b"a", {"model": "inv", "version": "v1"})
+    tts_cache.save("v2.wav", b"b", {"model": "inv", "version": "v2"})
+    assert tts_cache.invalidate_stale_versions("inv", "v2") == 1
+    assert tts_cache.index.select_keys(model="inv") == ["v2.wav"]
@@ -0,0 +1,79 @@
+import pytest
+
+from app.core.normalizer import normalize_text, number_to_words, ordinal_to_words, text_normalizer
+
+def normalize(text: str) -> str:
+    # lru_cache'siz: testler birbirinin sonucunu görmesin
+    return text_normalizer.normalize(text)
+
+@pytest.mark.parametrize("n, words", [
+    (0, "sıfır"),
+    (1000, "bin"),
+    (1250, "bin iki yüz elli"),
+    (1_000_000, "bir milyon"),
+    (2024, "iki bin yirmi dört"),
+])
+def test_number_to_words(n, words):
+    assert number_to_words(n) == words
+
+def test_number_beyond_scales_is_read_digit_by_digit():
+    assert number_to_words(10 ** 15) == "bir " + " ".join(["sıfır"] * 15)
+
+@pytest.mark.parametrize("n, words", [
+    (1, "birinci"), (2, "ikinci"), (3, "üçüncü"), (4, "dördüncü"), (6, "altıncı"),
+    (9, "dokuzuncu"), (10, "onuncu"), (24, "yirmi dördüncü"), (40, "kırkıncı"), (100, "yüzüncü"),
+])
+def test_ordinal_to_words(n, words):
+    assert ordinal_to_words(n) == words
+
+@pytest.mark.parametrize("text, expected", [
+    ("0532 123 45 67", "sıfır beş üç iki, bir iki üç, dört beş, altı yedi"),
+    ("+90 (532) 123-45-67", "artı dokuz sıfır, beş üç iki, bir iki üç, dört beş, altı yedi"),
+    ("Müşteri no 0042", "müşteri no sıfır sıfır dört iki"),
+])
+def test_phones_and_leading_zeros(text, expected):
+    assert normalize(text) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    ("3,05 kg", "üç virgül sıfır beş kg"),
+    ("3.5 kilo", "üç virgül beş kilo"),
+    ("1.250 kişi", "bin iki yüz elli kişi"),
+    ("%12,5 indirim", "yüzde on iki virgül beş indirim"),
+])
+def test_decimals_and_thousands(text, expected):
+    assert normalize(text) == expected
+
+@pytest.mark.parametrize("text", ["250 TL", "250 tl.", "₺250", "iki yüz elli TL"])
+def test_currency_variants_share_one_form(text):
+    assert normalize(text) == "iki yüz elli lira"
+
+def test_currency_with_subunit():
+    assert normalize("Toplam 1.250,50 TL") == "toplam bin iki yüz elli lira elli kuruş"
+    assert normalize("$9.99") == "dokuz dolar doksan dokuz sent"
+
+def test_dates_and_times():
+    assert normalize("12.05.2024 tarihinde") == "on iki mayıs iki bin yirmi dört tarihinde"
+    assert normalize("Saat 09:05") == "saat dokuz sıfır beş"
+    # ISO tarih telefon sanılmamalı
+    assert "artı" not in normalize("2024-05-12") and "," not in normalize("2024-05-12")
+
+def test_sn_abbreviation_depends_on_context():
+    assert normalize("Sn. Ahmet Bey") == "sayın ahmet bey"
+    assert normalize("5 sn. bekleyin") == "beş saniye bekleyin"
+    assert normalize("10dk sonra") == "on dakika sonra"
+
+def test_ordinals():
+    assert normalize("1. sırada bekliyorsunuz.") == "birinci sırada bekliyorsunuz"
+    assert normalize("Sıranız 3. sıra") == "sıranız üçüncü sıra"
+    # Büyük harfle devam ediyorsa nokta cümle sonudur, sayı sıra sayısı değildir
+    assert normalize("Saat 5. Sonra geleceğim") == "saat beş. sonra geleceğim"
+
+def test_turkish_casing_and_punctuation():
+    assert normalize("IŞIK İÇİN!!!") == "ışık için!"
+    assert normalize("“Merhaba”   dünya…") == "merhaba dünya"
+
+def test_normalize_text_is_memoized():
+    normalize_text.cache_clear()
+    normalize_text("250 TL")
+    normalize_text("250 TL")
+    assert normalize_text.cache_info().hits == 1
@@ -0,0 +1,41 @@
+import pytest
+
+from app.core.template import SLOT, STATIC, TemplateError, parse_template, render_segments, render_text
+
+def test_parse_template_splits_static_and_slot_parts():
+    assert parse_template("Sayın {isim}, bakiyeniz {tutar} liradır") == [
+        (STATIC, "Sayın "), (SLOT, "isim"), (STATIC, ", bakiyeniz "), (SLOT, "tutar"), (STATIC, " liradır"),
+    ]
+
+def test_parse_template_without_slots():
+    assert parse_template("Merhaba") == [(STATIC, "Merhaba")]
+    assert parse_template("{a}{b}") == [(SLOT, "a"), (SLOT, "b")]
+
+def test_render_text_fills_missing_slots_with_empty_string():
+    assert render_text("Sayın {isim}, {x}.", {"isim": "Ali"}) == "Sayın Ali, ."
+
+def test_render_segments_turns_leading_punctuation_into_pauses():
+    segments = render_segments("Sayın {isim}, bakiyeniz {tutar} liradır.", {"isim": "Ali", "tutar": "250"})
+    assert segments == [
+        (STATIC, "Sayın", 0), (SLOT, "Ali", 0), (STATIC, "bakiyeniz", 150), (SLOT, "250", 0), (STATIC, "liradır.", 0),
+    ]
+
+def test_render_segments_keeps_the_longest_pause():
+    segments = render_segments("Merhaba {isim}. , hoş geldiniz", {"isim": "Ali"})
+    assert segments[-1] == (STATIC, "hoş geldiniz", 300)
+
+def test_render_segments_skips_punctuation_only_parts():
+    segments = render_segments("{a} - {b}", {"a": "bir", "b": "iki"})
+    assert [text for _, text, _ in segments] == ["bir", "iki"]
+
+def test_render_segments_accepts_any_script():
+    segments = render_segments("Здравствуйте, {имя}.", {"имя": "Иван"})
+    assert [text for _, text, _ in segments] == ["Здравствуйте,", "Иван"]
+
+def test_render_segments_missing_slot():
+    with pytest.raises(TemplateError, match="isim"):
+        render_segments("Sayın {isim}", {})
+
+def test_render_segments_empty_template():
+    with pytest.raises(TemplateError):
+        render_segments("{a} ... !", {"a": "  "})